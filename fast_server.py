@@ -12,6 +12,8 @@ from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import re
 
+from src.utils.logging import logger
+
 print("🚀 Starting DeepGuard Fast Server...")
 
 app = FastAPI(title="DeepGuard API", version="1.0")
@@ -117,7 +119,8 @@ async def analyze_notification(data: dict):
     content = data.get("content", "")
     sender = data.get("sender", "unknown")
     
-    print(f"🔍 ANALYZING: '{content}' from {sender}")
+    # Message content and sender are structured fields, redacted by the log writer
+    logger.info("Analyzing notification", extra={"fields": {"content": content, "sender": sender}})
     
     # Use enhanced keyword detection
     analysis = enhanced_harassment_check(content)
@@ -156,9 +159,8 @@ async def analyze_notification(data: dict):
         "detection_method": "keyword_enhanced"
     }
     
-    print(f"🎯 RESULT: {risk_percentage}% RISK SCORE - {threat_level} THREAT - Method: keyword_enhanced")
-    if keywords:
-        print(f"🔍 Keywords detected: {keywords}")
+    logger.info("Result: %d%% risk score - %s threat - method: keyword_enhanced", risk_percentage, threat_level,
+                extra={"fields": {"keywords": keywords}})
     
     return result
 
@@ -0,0 +1,19 @@
+# gunicorn.conf.py
+# Loaded automatically by gunicorn from the working directory.
+
+import os
+
+
+def pre_fork(server, worker):
+    # Runs in the master before each (re)spawn. server.WORKERS holds the live
+    # workers only (reaped ones are removed before child_exit), so the lowest
+    # slot none of them holds is free: a replacement takes over the slot of
+    # the worker it replaces and two live workers never share one.
+    in_use = {getattr(live, "deepguard_slot", None) for live in server.WORKERS.values()}
+    worker.deepguard_slot = next(slot for slot in range(len(in_use) + 1) if slot not in in_use)
+
+
+def post_fork(server, worker):
+    # src/core/threads.py hands each slot its own slice of the CPUs
+    os.environ["DEEPGUARD_WORKER_COUNT"] = str(server.num_workers)
+    os.environ["DEEPGUARD_WORKER_SLOT"] = str(worker.deepguard_slot)
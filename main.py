@@ -11,14 +11,14 @@ from typing import Optional, List, Dict
 from datetime import datetime
 import uvicorn, uuid
 
-from src.core.security import create_access_token, verify_password, get_password_hash
+from src.core.security import create_access_token, verify_password_async, get_password_hash_async
+from src.services.analytics import scan_analytics
 from src.utils.logging import logger
 
 app = FastAPI(title="DeepGuard API v3.0", version="3.0.0")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
 users_db = {}
-analytics_db = {"total_scans": 0, "threats_detected": 0, "recent_scans": []}
 
 @app.on_event("startup")
 def initialize_users_db():
@@ -27,9 +27,18 @@ def initialize_users_db():
         "username": "testuser",
         "email": "test@deepguard.com",
         "full_name": "Test User",
-        "hashed_password": get_password_hash("password123")
+        # bcrypt of "password123", precomputed to keep hashing out of startup
+        "hashed_password": "$2b$12$KZJXMutxldUhNGDPo.Rsm.T457ABaYQEasO34vMFvGElstadJ2iUi"
     }
 
+@app.on_event("startup")
+async def start_analytics():
+    scan_analytics.start()
+
+@app.on_event("shutdown")
+async def stop_analytics():
+    await scan_analytics.stop()
+
 class SignupRequest(BaseModel):
     username: str; email: str; password: str; full_name: Optional[str] = None
 
@@ -72,7 +81,9 @@ async def health():
 @app.post("/api/v1/auth/signup")
 async def signup(r: SignupRequest):
     if r.username in users_db: raise HTTPException(400, "Username exists")
-    users_db[r.username] = {"user_id": str(len(users_db)+1), "username": r.username, "email": r.email, "full_name": r.full_name or r.username, "hashed_password": get_password_hash(r.password)}
+    hashed = await get_password_hash_async(r.password)
+    if r.username in users_db: raise HTTPException(400, "Username exists")  # taken while hashing
+    users_db[r.username] = {"user_id": str(len(users_db)+1), "username": r.username, "email": r.email, "full_name": r.full_name or r.username, "hashed_password": hashed}
     token = create_access_token({"sub": r.username})
     user = {k:v for k,v in users_db[r.username].items() if k!="hashed_password"}
     return {"success": True, "message": "Registered", "data": {"access_token": token, "token_type": "bearer", "user": user}}
@@ -80,7 +91,7 @@ async def signup(r: SignupRequest):
 @app.post("/api/v1/auth/login")
 async def login(r: LoginRequest):
     u = users_db.get(r.username)
-    if not u or not verify_password(r.password, u["hashed_password"]): raise HTTPException(401, "Invalid credentials")
+    if not u or not await verify_password_async(r.password, u["hashed_password"]): raise HTTPException(401, "Invalid credentials")
     token = create_access_token({"sub": r.username})
     user = {k:v for k,v in u.items() if k!="hashed_password"}
     return {"success": True, "message": "Login OK", "data": {"access_token": token, "token_type": "bearer", "user": user}}
@@ -94,8 +105,7 @@ async def get_me(authorization: Optional[str] = Header(None)):
 @app.post("/api/v1/scan_text")
 async def scan_text(r: ScanRequest):
     a = enhanced_harassment_check(r.text)
-    analytics_db["total_scans"] += 1
-    if a["is_harassment"]: analytics_db["threats_detected"] += 1
+    scan_analytics.record(a["is_harassment"], a["severity"], a["threat_level"], "scan_text")
     res = {"is_harassment": a["is_harassment"], "confidence": round(a["confidence"], 3), "severity": a["severity"], "threat_level": a["threat_level"], "keywords_detected": a["keywords"], "risk_score": int(a["toxic_score"]*100), "explanation": f"Threat: {a['threat_level']}" if a["is_harassment"] else "Safe"}
     return {"success": True, "message": "Scan complete", "data": res}
 
@@ -106,15 +116,14 @@ async def scan_image():
 @app.post("/api/v1/mobile/analyze-notification")
 async def analyze_notification(p: NotificationPayload):
     a = enhanced_harassment_check(p.content)
-    analytics_db["total_scans"] += 1
-    if a["is_harassment"]: analytics_db["threats_detected"] += 1
+    scan_analytics.record(a["is_harassment"], a["severity"], a["threat_level"], "notification")
     risk = int(a["toxic_score"]*100)
     return {"harassment": {"is_harassment": a["is_harassment"], "confidence": round(a["confidence"], 3), "type": "threat" if a["is_harassment"] else "safe", "severity": a["severity"], "keywords_detected": a["keywords"], "explanation": f"HARASSMENT: {risk}% risk" if a["is_harassment"] else "SAFE"}, "analysis_id": str(uuid.uuid4()), "timestamp": p.timestamp or int(datetime.now().timestamp()*1000), "risk_score": risk, "threat_level": a["threat_level"], "detection_method": "keyword_enhanced"}
 
 @app.get("/api/v1/analytics/overview")
 async def get_analytics():
-    safe = analytics_db["total_scans"] - analytics_db["threats_detected"]
-    return {"success": True, "data": {"total_scans": analytics_db["total_scans"], "threats_detected": analytics_db["threats_detected"], "threats_blocked": analytics_db["threats_detected"], "safe_messages": safe, "recent_activity": analytics_db["recent_scans"][:10]}}
+    # Precomputed across all workers; see src/services/analytics.py
+    return {"success": True, "data": await scan_analytics.overview()}
 
 if __name__ == "__main__":
     print("\n" + "="*60)
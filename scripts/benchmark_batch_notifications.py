@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Compares scoring a deep scan one notification at a time (the old
+analyze-batch-notifications behaviour) with the native batch path.
+
+    python scripts/benchmark_batch_notifications.py --count 1000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+from starlette.requests import Request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api.mobile_routes import (
+    BatchNotificationRequest,
+    NotificationMessage,
+    analyze_batch_notifications,
+    analyze_notification,
+)
+
+SAMPLES = [
+    "Hey! How are you doing today?",
+    "You're so stupid and worthless!",
+    "See you at the game tonight",
+    "I will hurt you if you show up again",
+    "lol that was hilarious",
+    "You're pathetic and should disappear!",
+]
+
+
+def make_request(count: int) -> BatchNotificationRequest:
+    return BatchNotificationRequest(
+        device_id="bench-device",
+        notifications=[
+            NotificationMessage(
+                sender=f"sender{i % 50}",
+                message_text=random.choice(SAMPLES),
+                app_name="WhatsApp",
+                timestamp=datetime.now(),
+                device_id="bench-device",
+            )
+            for i in range(count)
+        ],
+    )
+
+
+# Plain JSON client: no Accept header
+HTTP_REQUEST = Request({"type": "http", "headers": []})
+
+
+async def per_notification(request: BatchNotificationRequest) -> None:
+    for notification in request.notifications:
+        await analyze_notification(notification, HTTP_REQUEST, current_user="bench")
+
+
+async def native_batch(request: BatchNotificationRequest) -> None:
+    await analyze_batch_notifications(request, HTTP_REQUEST, current_user="bench")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=1000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    request = make_request(args.count)
+    timings = {}
+    for name, run in (("per-notification", per_notification), ("native batch", native_batch)):
+        start = time.perf_counter()
+        asyncio.run(run(request))
+        timings[name] = time.perf_counter() - start
+        print(f"{name:>17}: {timings[name] * 1000:9.1f} ms  ({args.count / timings[name]:,.0f} notifications/s)")
+    print(f"{'speedup':>17}: {timings['per-notification'] / timings['native batch']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Compares DeepfakeModel latency in eager fp32 mode against the optimized
+execution mode at batch sizes 1, 8 and 32.
+
+    python scripts/benchmark_deepfake.py --compile-mode trace
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from src.models.deepfake import DeepfakeModel, cpu_supports_bf16
+
+
+def time_model(model: DeepfakeModel, batch_size: int, repeats: int) -> float:
+    """Median milliseconds per batch, after warm-up (which also compiles)."""
+    pixel_values = torch.rand(batch_size, 3, 224, 224)
+    for _ in range(2):
+        model.predict_logits(pixel_values)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_logits(pixel_values)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", default="google/vit-base-patch16-224")
+    parser.add_argument("--compile-mode", default="trace", choices=["none", "compile", "trace"])
+    parser.add_argument("--no-bf16", action="store_true")
+    parser.add_argument("--cache-dir", default="models/cache")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    eager = DeepfakeModel(args.model)
+    optimized = DeepfakeModel(
+        args.model,
+        optimized=True,
+        bf16=not args.no_bf16,
+        compile_mode=args.compile_mode,
+        cache_dir=args.cache_dir,
+    )
+    print(f"threads={torch.get_num_threads()} bf16={optimized.use_bf16} "
+          f"(cpu support: {cpu_supports_bf16()}) compile_mode={args.compile_mode}")
+    print(f"{'batch':>5} {'eager ms':>10} {'optimized ms':>13} {'speedup':>8}")
+    for batch_size in args.batch_sizes:
+        eager_ms = time_model(eager, batch_size, args.repeats)
+        optimized_ms = time_model(optimized, batch_size, args.repeats)
+        print(f"{batch_size:>5} {eager_ms:>10.1f} {optimized_ms:>13.1f} {eager_ms / optimized_ms:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
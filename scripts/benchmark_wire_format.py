@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Compares JSON and MessagePack for the mobile wire format: encode/decode
+time and payload size of NotificationMessage, BatchNotificationRequest and
+HarassmentAlert lists.
+
+    python scripts/benchmark_wire_format.py --batch 1000
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import msgpack
+from pydantic_core import to_json, to_jsonable_python
+
+from src.api.mobile_routes import BatchNotificationRequest, HarassmentAlert, NotificationMessage
+
+
+def notification(i: int) -> NotificationMessage:
+    return NotificationMessage(
+        sender=f"contact {i % 40}",
+        message_text="You're pathetic 😡 and everyone knows it, stop texting me!!",
+        app_name="WhatsApp",
+        timestamp=datetime.now(),
+        package_name="com.whatsapp",
+        device_id="a1b2c3d4e5f6",
+    )
+
+
+def alert(i: int) -> HarassmentAlert:
+    return HarassmentAlert(
+        is_harassment=i % 3 == 0,
+        confidence_score=0.7123456789,
+        severity_level="high",
+        threat_categories=["toxic"],
+        alert_id=str(uuid.uuid4()),
+        timestamp=datetime.now(),
+        recommendation="Block sender and report to authorities if threats escalate",
+    )
+
+
+def measure(name: str, payload, number: int) -> None:
+    plain = to_jsonable_python(payload)
+    json_bytes = to_json(payload)
+    packed = msgpack.packb(plain)
+    results = {
+        "json encode": timeit.timeit(lambda: to_json(payload), number=number),
+        "msgpack encode": timeit.timeit(lambda: msgpack.packb(to_jsonable_python(payload)), number=number),
+        "json decode": timeit.timeit(lambda: json.loads(json_bytes), number=number),
+        "msgpack decode": timeit.timeit(lambda: msgpack.unpackb(packed), number=number),
+    }
+    print(f"\n{name}: json {len(json_bytes):,} B, msgpack {len(packed):,} B "
+          f"({100 * len(packed) / len(json_bytes):.0f}%)")
+    for label, seconds in results.items():
+        print(f"  {label:>15}: {seconds / number * 1e6:10.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    measure("NotificationMessage", notification(0), args.number * 50)
+    measure("HarassmentAlert", alert(0), args.number * 50)
+    batch = BatchNotificationRequest(device_id="a1b2c3d4e5f6",
+                                     notifications=[notification(i) for i in range(args.batch)])
+    measure(f"BatchNotificationRequest x{args.batch}", batch, args.number)
+    measure(f"List[HarassmentAlert] x{args.batch}", [alert(i) for i in range(args.batch)], args.number)
+
+
+if __name__ == "__main__":
+    main()
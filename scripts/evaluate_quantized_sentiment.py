@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Builds the int8 sentiment model and compares it with fp32 on a local corpus.
+
+    python scripts/evaluate_quantized_sentiment.py --corpus messages.txt [--model NAME]
+
+The corpus is a text file with one message per line. The int8 model is only
+approved (and so only activated by HARASSMENT_QUANTIZED) when label agreement
+with fp32 reaches --min-agreement; otherwise the script exits non-zero.
+The model and cache directory default to HARASSMENT_MODEL_PATH and
+MODEL_CACHE_DIR; pass --model to approve a version before rolling it out.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transformers import AutoTokenizer, pipeline
+
+from src.core.config import settings
+from src.models.quantization import build_quantized_model, load_quantized_model, write_approval
+
+
+def read_corpus(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def negative_score(result: dict) -> float:
+    # Compare on one axis so a flipped label shows up as a large delta
+    return result["score"] if result["label"].upper() == "NEGATIVE" else 1.0 - result["score"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", required=True)
+    parser.add_argument("--model", default=settings.HARASSMENT_MODEL_PATH)
+    parser.add_argument("--cache-dir", default=settings.MODEL_CACHE_DIR)
+    parser.add_argument("--min-agreement", type=float, default=0.98)
+    parser.add_argument("--rebuild", action="store_true", help="re-quantize even if cached")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    texts = read_corpus(args.corpus)
+    if not texts:
+        sys.exit(f"Corpus {args.corpus} is empty")
+
+    quantized = None if args.rebuild else load_quantized_model(args.model, args.cache_dir)
+    if quantized is None:
+        print("Quantizing sentiment model...")
+        quantized = build_quantized_model(args.model, args.cache_dir)
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    fp32 = pipeline("sentiment-analysis", model=args.model, device=-1)
+    int8 = pipeline("sentiment-analysis", model=quantized, tokenizer=tokenizer, device=-1)
+
+    start = time.perf_counter()
+    fp32_results = fp32(texts, batch_size=args.batch_size, truncation=True)
+    fp32_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    int8_results = int8(texts, batch_size=args.batch_size, truncation=True)
+    int8_seconds = time.perf_counter() - start
+
+    agree = sum(a["label"] == b["label"] for a, b in zip(fp32_results, int8_results))
+    deltas = [abs(negative_score(a) - negative_score(b)) for a, b in zip(fp32_results, int8_results)]
+    # HarassmentDetector only uses the model when NEGATIVE scores above 0.8
+    trigger_agree = sum(
+        (negative_score(a) > 0.8) == (negative_score(b) > 0.8)
+        for a, b in zip(fp32_results, int8_results)
+    )
+
+    report = {
+        "samples": len(texts),
+        "label_agreement": agree / len(texts),
+        "trigger_agreement": trigger_agree / len(texts),
+        "mean_score_delta": sum(deltas) / len(deltas),
+        "max_score_delta": max(deltas),
+        "fp32_seconds": round(fp32_seconds, 3),
+        "int8_seconds": round(int8_seconds, 3),
+        "min_agreement": args.min_agreement,
+    }
+    report["approved"] = report["label_agreement"] >= args.min_agreement
+    write_approval(args.cache_dir, args.model, report)
+
+    for key, value in report.items():
+        print(f"{key:>18}: {value}")
+    if not report["approved"]:
+        sys.exit("❌ int8 model rejected: agreement below threshold, fp32 stays active")
+    print("✅ int8 model approved; set HARASSMENT_QUANTIZED=true to activate it")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from src.models.harassment import HarassmentDetector
+from src.utils.logging import logger
 
 print("🤖 Initializing DeepGuard AI Harassment Detection...")
 try:
@@ -43,7 +44,8 @@ async def analyze_notification(data: dict):
     content = data.get("content", "")
     sender = data.get("sender", "unknown")
     
-    print(f"🔍 ANALYZING: '{content}' from {sender}")
+    # Message content and sender are structured fields, redacted by the log writer
+    logger.info("Analyzing notification", extra={"fields": {"content": content, "sender": sender}})
     
     if detector:
         # Use AI model
@@ -53,7 +55,7 @@ async def analyze_notification(data: dict):
             method = analysis_result.get('method', 'AI_model')
             keywords = analysis_result.get('found_keywords', [])
         except Exception as e:
-            print(f"⚠️ AI analysis failed: {e}")
+            logger.warning("AI analysis failed: %s", e)
             toxic_score = simple_keyword_check(content)
             method = 'keyword_fallback'
             keywords = []
@@ -95,9 +97,8 @@ async def analyze_notification(data: dict):
         "detection_method": method
     }
     
-    print(f"🎯 RESULT: {risk_percentage}% RISK SCORE - {threat_level} THREAT - Method: {method}")
-    if keywords:
-        print(f"🔍 Keywords detected: {keywords}")
+    logger.info("Result: %d%% risk score - %s threat - method: %s", risk_percentage, threat_level, method,
+                extra={"fields": {"keywords": keywords}})
     
     return result
 
@@ -0,0 +1,146 @@
+# src/api/admission.py
+# Admission control for the mobile ingest routes, ahead of body validation.
+
+import math
+import re
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.api.encoding import is_msgpack_body, msgpack
+from src.core.config import settings
+from src.core.security import decode_access_token
+from src.services.admission import admission_controller
+
+DEVICE_HEADER = b"x-device-id"
+# Found in raw JSON bodies without parsing or validating them
+_DEVICE_ID_PATTERN = re.compile(rb'"device_id"\s*:\s*"([^"\\]{1,128})"')
+_NOTIFICATION_MARKER = b'"message_text"'
+
+
+class AdmissionMiddleware:
+    """
+    Rate-limits /mobile/analyze-notification and /mobile/analyze-batch-notifications
+    per device and per user before FastAPI parses the body:
+
+    - bodies over MOBILE_MAX_BODY_BYTES or batches over MOBILE_MAX_BATCH_SIZE
+      notifications get 413
+    - a request costs one token per notification, charged to the device
+      (X-Device-ID header, else the body's device_id) and to the user (token
+      subject, else client address). JSON bodies are scanned without being
+      parsed; MessagePack bodies are decoded, and one that can't be is charged
+      as a full MOBILE_MAX_BATCH_SIZE batch
+    - requests the buckets can't pay for get 429 with Retry-After and the
+      refill time in seconds
+
+    The streaming scan is charged one token per request against the user only.
+    """
+
+    def __init__(self, app: ASGIApp, prefix: str):
+        self.app = app
+        self.buffered_paths = {f"{prefix}/mobile/analyze-notification", f"{prefix}/mobile/analyze-batch-notifications"}
+        self.stream_path = f"{prefix}/mobile/analyze-batch-notifications/stream"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return await self.app(scope, receive, send)
+        path = scope["path"]
+        if path == self.stream_path:
+            wait = admission_controller.admit(None, self._user(scope))
+            if wait:
+                return await self._throttled(wait)(scope, receive, send)
+            return await self.app(scope, receive, send)
+        if path not in self.buffered_paths:
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        length = headers.get(b"content-length")
+        if length and length.isdigit() and int(length) > settings.MOBILE_MAX_BODY_BYTES:
+            return await self._too_large("Request body too large")(scope, receive, send)
+
+        body = b""
+        more = True
+        while more:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+            if len(body) > settings.MOBILE_MAX_BODY_BYTES:
+                return await self._too_large("Request body too large")(scope, receive, send)
+
+        if is_msgpack_body(headers.get(b"content-type", b"").decode(errors="replace")):
+            cost, body_device_id = self._msgpack_cost(body)
+        else:
+            cost, body_device_id = self._json_cost(body)
+        if cost > settings.MOBILE_MAX_BATCH_SIZE:
+            return await self._too_large(
+                f"Batch of {cost} notifications exceeds the limit of {settings.MOBILE_MAX_BATCH_SIZE}"
+            )(scope, receive, send)
+
+        device_id = headers.get(DEVICE_HEADER)
+        device_id = device_id.decode(errors="replace") if device_id is not None else body_device_id
+        wait = admission_controller.admit(device_id, self._user(scope), cost)
+        if wait:
+            return await self._throttled(wait)(scope, receive, send)
+
+        # Hand the already-read body on to the route
+        replayed = False
+
+        async def replay() -> dict:
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, replay, send)
+
+    @staticmethod
+    def _json_cost(body: bytes) -> Tuple[int, Optional[str]]:
+        match = _DEVICE_ID_PATTERN.search(body)
+        device_id = match.group(1).decode(errors="replace") if match else None
+        return max(1, body.count(_NOTIFICATION_MARKER)), device_id
+
+    @staticmethod
+    def _msgpack_cost(body: bytes) -> Tuple[int, Optional[str]]:
+        try:
+            decoded: Any = msgpack.unpackb(body) if msgpack is not None else None
+        except (ValueError, TypeError):
+            decoded = None
+        if not isinstance(decoded, dict):
+            # Nothing to count: charge it as the largest batch the route accepts
+            return settings.MOBILE_MAX_BATCH_SIZE, None
+        # A single notification, or a batch request {"device_id", "notifications": [...]}
+        notifications = decoded.get("notifications")
+        if not isinstance(notifications, list):
+            notifications = []
+        device_id = next((n["device_id"] for n in [decoded] + notifications
+                          if isinstance(n, dict) and isinstance(n.get("device_id"), str)), None)
+        return max(1, len(notifications)), device_id[:128] if device_id else None
+
+    @staticmethod
+    def _user(scope: Scope) -> str:
+        authorization = dict(scope["headers"]).get(b"authorization", b"").decode(errors="replace")
+        if authorization.lower().startswith("bearer "):
+            try:
+                return f"user:{decode_access_token(authorization[7:])}"
+            except HTTPException:
+                pass  # the route's own auth check will answer 401
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    @staticmethod
+    def _throttled(wait: float) -> JSONResponse:
+        return JSONResponse(
+            {"detail": "Rate limit exceeded", "retry_after_seconds": round(wait, 3)},
+            status_code=429,
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+    @staticmethod
+    def _too_large(detail: str) -> JSONResponse:
+        admission_controller.count_too_large()
+        return JSONResponse({"detail": detail}, status_code=413)
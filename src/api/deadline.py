@@ -0,0 +1,84 @@
+# src/api/deadline.py
+# Per-request deadlines, and cancellation when the client goes away.
+
+import asyncio
+from typing import Dict, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.services.deadline import Deadline, deadline_stats, request_deadline
+
+DEADLINE_HEADER = b"x-request-deadline-ms"
+
+
+class DeadlineMiddleware:
+    """
+    Gives each HTTP request a Deadline: the X-Request-Deadline-Ms header
+    (how long the client will wait, capped at `max_ms`), else the route's
+    default from `route_defaults_ms`, else none. The detection layer reads
+    it (see src/services/deadline.py): inference still queued when it
+    passes is dropped, and video analysis stops between frame batches.
+
+    Once the route has read the request body, the client connection is
+    watched; a disconnect cancels the deadline the same way.
+    """
+
+    def __init__(self, app: ASGIApp, prefix: str, route_defaults_ms: Dict[str, float], max_ms: float):
+        self.app = app
+        self.route_defaults_ms = {f"{prefix}{path}": ms for path, ms in route_defaults_ms.items()}
+        self.max_ms = max_ms
+
+    def _timeout_ms(self, scope: Scope) -> Optional[float]:
+        header = dict(scope["headers"]).get(DEADLINE_HEADER)
+        if header is not None:
+            try:
+                requested = float(header)
+            except ValueError:
+                requested = None
+            if requested is not None and requested > 0:
+                return min(requested, self.max_ms)
+        return self.route_defaults_ms.get(scope["path"])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timeout_ms = self._timeout_ms(scope)
+        if timeout_ms is None:
+            return await self.app(scope, receive, send)
+
+        deadline = Deadline(timeout_ms / 1000)
+        deadline_stats.add("requests_with_deadline")
+        watcher: Optional[asyncio.Task] = None
+        responded = False
+
+        async def watch() -> Message:
+            message = await receive()
+            if message["type"] == "http.disconnect" and not responded:
+                deadline_stats.add("client_disconnects")
+                deadline.cancel()
+            return message
+
+        async def watched_receive() -> Message:
+            nonlocal watcher
+            if watcher is not None:
+                return await asyncio.shield(watcher)
+            message = await receive()
+            if message["type"] == "http.request" and not message.get("more_body", False):
+                # Body fully read: the next message can only be the disconnect
+                watcher = asyncio.ensure_future(watch())
+            return message
+
+        async def tracked_send(message: Message) -> None:
+            nonlocal responded
+            if message["type"] == "http.response.start":
+                responded = True
+                if message["status"] == 504 and deadline.done() and not deadline.cancelled:
+                    deadline_stats.add("deadline_exceeded")
+            await send(message)
+
+        try:
+            with request_deadline(deadline):
+                await self.app(scope, watched_receive, tracked_send)
+        finally:
+            if watcher is not None and not watcher.done():
+                watcher.cancel()
@@ -0,0 +1,170 @@
+# src/api/diagnostics_routes.py
+
+import asyncio
+import os
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+
+from src.core import threads
+from src.core.config import settings
+from src.core.security import get_current_user
+from src.services.admission import admission_controller
+from src.services.deadline import deadline_stats
+from src.services.dedup import notification_dedup
+from src.services.jobs import media_jobs
+from src.services.model_registry import model_registry
+from src.services.notification import alert_mailer
+from src.services.overload import overload_controller
+from src.services.scheduler import scheduler
+from src.services.sender_lists import sender_lists
+
+# Operational introspection for the running worker
+diagnostics_router = APIRouter(prefix="/diagnostics", tags=["Diagnostics"])
+
+
+@diagnostics_router.get("/threads")
+async def get_thread_plan(current_user: str = Depends(get_current_user)):
+    """
+    Reports the CPU thread plan this worker is running under.
+    """
+    plan = threads.current_plan
+    return {
+        "pid": os.getpid(),
+        "plan": plan.as_dict() if plan else None,
+    }
+
+
+@diagnostics_router.get("/overload")
+async def get_overload_state(current_user: str = Depends(get_current_user)):
+    """
+    Reports the current service mode, inference queue depth and recent latency.
+    """
+    return overload_controller.snapshot()
+
+
+@diagnostics_router.get("/scheduler")
+async def get_scheduler_state(current_user: str = Depends(get_current_user)):
+    """
+    Reports queued and completed inference jobs per priority lane.
+    """
+    return scheduler.stats()
+
+
+@diagnostics_router.get("/dedup")
+async def get_dedup_state(current_user: str = Depends(get_current_user)):
+    """
+    Reports duplicate notifications answered from the idempotency window.
+    """
+    return notification_dedup.stats()
+
+
+@diagnostics_router.get("/admission")
+async def get_admission_state(current_user: str = Depends(get_current_user)):
+    """
+    Reports admitted versus throttled mobile ingest requests.
+    """
+    return admission_controller.snapshot()
+
+
+@diagnostics_router.get("/sender-lists")
+async def get_sender_list_state(current_user: str = Depends(get_current_user)):
+    """
+    Reports notifications settled by device allow/block lists.
+    """
+    return sender_lists.stats()
+
+
+@diagnostics_router.get("/mail")
+async def get_mail_state(current_user: str = Depends(get_current_user)):
+    """
+    Reports queued, sent and failed alert emails.
+    """
+    return alert_mailer.stats()
+
+
+@diagnostics_router.get("/jobs")
+async def get_job_state(current_user: str = Depends(get_current_user)):
+    """
+    Reports this worker's queued and running media jobs.
+    """
+    return media_jobs.stats()
+
+
+@diagnostics_router.get("/deadlines")
+async def get_deadline_state(current_user: str = Depends(get_current_user)):
+    """
+    Reports requests cut short by deadlines or disconnects, and the queued
+    jobs and video frames that were skipped as a result.
+    """
+    return deadline_stats.snapshot()
+
+
+class ModelDeployRequest(BaseModel):
+    """Schema for rolling out a model version (shadow_fraction > 0: as a shadow candidate)"""
+    name: str
+    shadow_fraction: float = 0.0
+
+
+def _model_kind(kind: str) -> str:
+    if kind not in model_registry.status():
+        raise HTTPException(status_code=404, detail=f"Unknown model kind: {kind}")
+    return kind
+
+
+def _model_admin(current_user: str = Depends(get_current_user)) -> str:
+    if current_user not in settings.MODEL_ADMIN_USERS:
+        raise HTTPException(status_code=403, detail="Model rollouts are restricted to model administrators")
+    return current_user
+
+
+def _rollout_name(name: str) -> str:
+    allowed = {settings.DEEPFAKE_MODEL_PATH, settings.HARASSMENT_MODEL_PATH, *settings.MODEL_ROLLOUT_ALLOWLIST}
+    if name not in allowed:
+        raise HTTPException(status_code=403, detail=f"Model version {name} is not on the rollout allow-list")
+    return name
+
+
+@diagnostics_router.get("/models")
+async def get_model_state(current_user: str = Depends(get_current_user)):
+    """
+    Reports the serving, loading, draining and shadow model versions, with
+    the shadow candidate's agreement and latency against the current model.
+    """
+    return model_registry.status()
+
+
+@diagnostics_router.put("/models/{kind}", status_code=202)
+async def deploy_model(kind: str, request: ModelDeployRequest, current_user: str = Depends(_model_admin)):
+    """
+    Rolls a model version out to every worker. It is loaded and warmed up
+    in the background, then either replaces the current version or, with
+    shadow_fraction > 0, runs on that fraction of traffic as a shadow.
+    Model administrators only, and only versions on the allow-list.
+    """
+    if not 0.0 <= request.shadow_fraction <= 1.0:
+        raise HTTPException(status_code=422, detail="shadow_fraction must be between 0 and 1")
+    # The manifest is read and written under a file lock: keep that off the event loop
+    entry = await asyncio.to_thread(model_registry.wanted, _model_kind(kind))
+    _rollout_name(request.name)
+    if request.shadow_fraction > 0:
+        entry["shadow"] = {"name": request.name, "fraction": request.shadow_fraction}
+    else:
+        entry["name"] = request.name
+        if entry["shadow"] and entry["shadow"]["name"] == request.name:
+            entry["shadow"] = None
+    await asyncio.to_thread(model_registry.publish, kind, entry)
+    return model_registry.status()[kind]
+
+
+@diagnostics_router.post("/models/{kind}/promote")
+async def promote_model(kind: str, current_user: str = Depends(_model_admin)):
+    """
+    Makes the shadow candidate the serving version on every worker.
+    Model administrators only.
+    """
+    entry = await asyncio.to_thread(model_registry.wanted, _model_kind(kind))
+    if not entry["shadow"]:
+        raise HTTPException(status_code=409, detail="No shadow candidate to promote")
+    await asyncio.to_thread(model_registry.publish, kind, {"name": entry["shadow"]["name"], "shadow": None})
+    return model_registry.status()[kind]
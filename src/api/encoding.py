@@ -0,0 +1,83 @@
+# src/api/encoding.py
+# Content negotiation between JSON and MessagePack for the mobile routes.
+
+from typing import Any, Callable
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+from pydantic_core import to_json, to_jsonable_python
+
+try:
+    import msgpack
+except ImportError:  # optional: without it the mobile routes speak JSON only
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+
+
+def _media_type(value: str) -> str:
+    return value.split(";", 1)[0].strip().lower()
+
+
+def is_msgpack_body(content_type: str) -> bool:
+    """True when a Content-Type header value names MessagePack."""
+    return _media_type(content_type) in MSGPACK_MEDIA_TYPES
+
+
+def wants_msgpack(request: Request) -> bool:
+    """True when the client lists a MessagePack type in Accept (and we can produce it)."""
+    if msgpack is None:
+        return False
+    accept = request.headers.get("accept", "")
+    return any(_media_type(part) in MSGPACK_MEDIA_TYPES for part in accept.split(","))
+
+
+def negotiated_response(request: Request, payload: Any, status_code: int = 200) -> Response:
+    """
+    Serializes a model (or list of models) as MessagePack or JSON, per Accept.
+    Field names and values are the same in both; datetimes are ISO strings.
+    """
+    if wants_msgpack(request):
+        content = msgpack.packb(to_jsonable_python(payload))
+        return Response(content=content, status_code=status_code, media_type=MSGPACK_MEDIA_TYPE)
+    return Response(content=to_json(payload), status_code=status_code, media_type="application/json")
+
+
+class _MsgPackRequest(Request):
+    """Presents a MessagePack body to FastAPI as if it were already-parsed JSON."""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            try:
+                self._json = msgpack.unpackb(await self.body())
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid MessagePack body: {e}")
+        return self._json
+
+
+class NegotiatingRoute(APIRoute):
+    """
+    Accepts MessagePack request bodies (Content-Type application/msgpack)
+    alongside JSON. Responses are negotiated by the endpoints themselves via
+    negotiated_response().
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def negotiating_handler(request: Request) -> Response:
+            if is_msgpack_body(request.headers.get("content-type", "")):
+                if msgpack is None:
+                    raise HTTPException(status_code=415, detail="MessagePack support is not installed")
+                # FastAPI only parses bodies it believes are JSON; relabel the
+                # request and let _MsgPackRequest.json() decode the real body
+                scope = dict(request.scope)
+                scope["headers"] = [
+                    (name, b"application/json" if name == b"content-type" else value)
+                    for name, value in request.scope["headers"]
+                ]
+                request = _MsgPackRequest(scope, request.receive)
+            return await handler(request)
+
+        return negotiating_handler
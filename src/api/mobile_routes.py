@@ -1,17 +1,35 @@
 # src/api/mobile_routes.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+import asyncio
+import html
+import json
+import numpy as np
+import time
 import uuid
 
-from src.services.detection import detect_harassment
-from src.core.security import get_current_user
+from src.services.detection import detect_harassment, detect_harassment_batch
+from src.services.device_stats import device_stats
+from src.services.incident_log import ALERT, INCIDENT, incident_log
+from src.services.reputation import sender_reputation
+from src.services.conversation import conversation_tracker
+from src.services.dedup import notification_dedup, notification_key
+from src.services.sender_lists import BLOCK, sender_lists
+from src.services.notification import MAIL_ALERT_MIN_SEVERITY, MAIL_ALERT_TO, alert_mailer, header_text
+from src.services.overload import request_mode
+from src.services.scheduler import Priority
+from src.core.config import settings
+from src.api.encoding import NegotiatingRoute, negotiated_response
+from src.core.security import get_current_user, decode_access_token
 from src.utils.logging import logger
 
 # Mobile-specific router
-mobile_router = APIRouter(prefix="/mobile", tags=["Mobile"])
+# Bodies may be JSON or MessagePack; responses follow the Accept header
+mobile_router = APIRouter(prefix="/mobile", tags=["Mobile"], route_class=NegotiatingRoute)
 
 # --- Mobile-Specific Schemas ---
 class NotificationMessage(BaseModel):
@@ -23,6 +41,13 @@ class NotificationMessage(BaseModel):
     package_name: Optional[str] = None
     device_id: str
 
+class ConversationContext(BaseModel):
+    """Thread-level scores for one (device, sender, app) conversation"""
+    message_score: float  # this message alone
+    thread_score: float   # the conversation so far, this message included
+    thread_messages: int
+    thread_keywords: List[str]
+
 class HarassmentAlert(BaseModel):
     """Schema for harassment alert response"""
     is_harassment: bool
@@ -32,74 +57,328 @@ class HarassmentAlert(BaseModel):
     alert_id: str
     timestamp: datetime
     recommendation: str
+    service_mode: str = "full"  # "full", "degraded" or "cached_only"; re-scan if not full
+    escalated: bool = False  # severity raised because the sender keeps harassing
+    context: Optional[ConversationContext] = None  # only in conversation-context mode
+    sender_list: Optional[str] = None  # "allow" or "block": decided by the device's lists, not scored
 
 class BatchNotificationRequest(BaseModel):
     """Schema for batch notification analysis"""
     notifications: List[NotificationMessage]
     device_id: str
 
+class SenderListsRequest(BaseModel):
+    """Schema for a device's trusted and blocked senders (replaces both lists)"""
+    allow: List[str] = []
+    block: List[str] = []
+
+# --- Alert Thresholds ---
+# Severity bands on confidence, checked highest first (anything lower is "low")
+SEVERITY_BANDS = [(0.9, "critical"), (0.7, "high"), (0.5, "medium")]
+SEVERITY_ORDER = ["low", "medium", "high", "critical"]
+# Confirmed harassment above this confidence gets the escalation advice
+ESCALATION_CONFIDENCE = 0.7
+RECOMMEND_ESCALATE = "Block sender and report to authorities if threats escalate"
+RECOMMEND_MONITOR = "Monitor sender and consider blocking if pattern continues"
+RECOMMEND_NONE = "No action required"
+RECOMMEND_TRUSTED = "Trusted sender, not analyzed"
+RECOMMEND_BLOCKED = "Sender is blocked on this device"
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Set on /analyze-notification responses that replay an earlier alert
+REPLAY_HEADER = "X-Idempotent-Replay"
+
 # --- Mobile Endpoints ---
 
+def _build_alert(result: Dict) -> HarassmentAlert:
+    """Turns a detection result into the alert sent back to the device."""
+    # Extract harassment analysis results
+    harassment_data = result.get("harassment", {})
+    
+    # Determine if it's harassment and confidence
+    is_harassment = harassment_data.get("is_harassment", False)
+    confidence = harassment_data.get("confidence", 0.0)
+    
+    # Determine severity level based on confidence
+    severity = next((level for floor, level in SEVERITY_BANDS if confidence >= floor), "low")
+    
+    # Generate alert ID for tracking
+    alert_id = str(uuid.uuid4())
+    
+    # Get threat categories (customize based on your model)
+    threat_categories = harassment_data.get("categories", ["general"])
+    
+    # Generate recommendation
+    if is_harassment and confidence > ESCALATION_CONFIDENCE:
+        recommendation = RECOMMEND_ESCALATE
+    elif is_harassment:
+        recommendation = RECOMMEND_MONITOR
+    else:
+        recommendation = RECOMMEND_NONE
+    
+    return HarassmentAlert(
+        is_harassment=is_harassment,
+        confidence_score=confidence,
+        severity_level=severity,
+        threat_categories=threat_categories,
+        alert_id=alert_id,
+        timestamp=datetime.now(),
+        recommendation=recommendation,
+        service_mode=result.get("service_mode", "full")
+    )
+
+
+def _build_alerts(results: List[Dict]) -> List[HarassmentAlert]:
+    """
+    _build_alert for a whole deep scan: thresholds are applied to numpy
+    arrays and alerts are constructed without re-running validation.
+    """
+    count = len(results)
+    harassment = [result.get("harassment") or {} for result in results]
+    confidence = np.fromiter((h.get("confidence", 0.0) for h in harassment), dtype=float, count=count)
+    flagged = np.fromiter((h.get("is_harassment", False) for h in harassment), dtype=bool, count=count)
+
+    severity = np.select(
+        [confidence >= floor for floor, _ in SEVERITY_BANDS],
+        [level for _, level in SEVERITY_BANDS],
+        default="low",
+    )
+    recommendation = np.where(
+        flagged & (confidence > ESCALATION_CONFIDENCE),
+        RECOMMEND_ESCALATE,
+        np.where(flagged, RECOMMEND_MONITOR, RECOMMEND_NONE),
+    )
+
+    now = datetime.now()
+    return [
+        HarassmentAlert.model_construct(
+            is_harassment=bool(flagged[i]),
+            confidence_score=float(confidence[i]),
+            severity_level=str(severity[i]),
+            threat_categories=harassment[i].get("categories", ["general"]),
+            alert_id=str(uuid.uuid4()),
+            timestamp=now,
+            recommendation=str(recommendation[i]),
+            service_mode=results[i].get("service_mode", "full"),
+        )
+        for i in range(count)
+    ]
+
+
+def _escalate(alert: HarassmentAlert, notification: NotificationMessage) -> HarassmentAlert:
+    """
+    Raises severity for senders with recent repeated harassment on this
+    device, so a run of individually mild messages is not ignored.
+    Constant time and memory per message (see src/services/reputation.py).
+    """
+    if not alert.is_harassment:
+        return alert
+    recent = sender_reputation.record_harassment(notification.device_id, notification.sender)
+    levels = sender_reputation.escalation_levels(recent)
+    if levels:
+        current = SEVERITY_ORDER.index(alert.severity_level)
+        alert.severity_level = SEVERITY_ORDER[min(len(SEVERITY_ORDER) - 1, current + levels)]
+        alert.recommendation = RECOMMEND_ESCALATE
+        alert.escalated = True
+    return alert
+
+
+def _update_context(result: Dict, notification: NotificationMessage) -> ConversationContext:
+    """Folds this message into its conversation thread (O(1), see src/services/conversation.py)."""
+    harassment_data = result.get("harassment") or {}
+    raw_scores = harassment_data.get("raw_scores")
+    if isinstance(raw_scores, dict) and "TOXIC" in raw_scores:
+        message_score = raw_scores["TOXIC"]
+        keywords = raw_scores.get("found_keywords", [])
+    else:
+        confidence = harassment_data.get("confidence", 0.0)
+        message_score = confidence if harassment_data.get("is_harassment") else 1.0 - confidence
+        keywords = []
+    return ConversationContext(**conversation_tracker.update(
+        (notification.device_id, notification.sender, notification.app_name), message_score, keywords
+    ))
+
+
+def _sender_list_alert(decision: str) -> HarassmentAlert:
+    """The alert for a sender on the device's allow or block list; nothing is scored."""
+    blocked = decision == BLOCK
+    return HarassmentAlert(
+        is_harassment=blocked,
+        confidence_score=1.0 if blocked else 0.0,
+        severity_level="high" if blocked else "low",
+        threat_categories=["blocked_sender"] if blocked else [],
+        alert_id=str(uuid.uuid4()),
+        timestamp=datetime.now(),
+        recommendation=RECOMMEND_BLOCKED if blocked else RECOMMEND_TRUSTED,
+        sender_list=decision,
+    )
+
+
+def _email_alert(notification: NotificationMessage, alert: HarassmentAlert) -> None:
+    """Queues an alert email (sent in per-recipient digests); the message text is never included."""
+    if (not alert.is_harassment or alert.sender_list is not None
+            or SEVERITY_ORDER.index(alert.severity_level) < SEVERITY_ORDER.index(MAIL_ALERT_MIN_SEVERITY)):
+        return
+    # app_name comes from the client: keep it from adding header lines
+    subject = f"{alert.severity_level.capitalize()} harassment alert on {header_text(notification.app_name)}"
+    body = (
+        f"<p>Device: {html.escape(notification.device_id)}<br>"
+        f"Categories: {html.escape(', '.join(alert.threat_categories))}<br>"
+        f"Confidence: {alert.confidence_score:.2f}<br>"
+        f"Alert ID: {alert.alert_id}</p>"
+        f"<p>{html.escape(alert.recommendation)}</p>"
+    )
+    for recipient in MAIL_ALERT_TO:
+        alert_mailer.enqueue(recipient, subject, body)
+
+
+def _record_alerts(notifications: List[NotificationMessage], alerts: List[HarassmentAlert]) -> None:
+    # In-memory only: device stats, the incident log and alert emails are written out in batches
+    for notification, alert in zip(notifications, alerts):
+        device_stats.record(notification.device_id, notification.app_name, alert.is_harassment, alert.severity_level)
+        incident_log.append(ALERT, alert.alert_id, {
+            "alert": alert,
+            "device_id": notification.device_id,
+            "app_name": notification.app_name,
+        })
+        _email_alert(notification, alert)
+
+
+def _dedup_key(notification: NotificationMessage) -> bytes:
+    return notification_key(
+        notification.device_id, notification.timestamp,
+        notification.sender, notification.app_name, notification.message_text,
+    )
+
+
+async def _score_alerts(notifications: List[NotificationMessage], priority: Priority) -> List[HarassmentAlert]:
+    results = await detect_harassment_batch([n.message_text for n in notifications], priority)
+    # A device batch is answered as a whole: fail it on the first chunk that failed
+    failed = next((result for result in results if isinstance(result, BaseException)), None)
+    if failed is not None:
+        raise failed
+    alerts = _build_alerts(results)
+    _record_alerts(notifications, alerts)
+    return alerts
+
+
+def _interrupted_claim() -> HTTPException:
+    # What copies waiting on a claim get when its request is cancelled
+    # (client gone, deadline passed): their own clients are still waiting
+    return HTTPException(
+        status_code=503,
+        detail="Analysis of this notification was interrupted, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def _deduplicated_alerts(notifications: List[NotificationMessage], priority: Priority) -> List[HarassmentAlert]:
+    """
+    _score_alerts for notifications that may be redelivered copies: copies
+    of a notification answered within the dedup window, being scored right
+    now, or repeated in this list get that alert back; only the rest are scored.
+    """
+    keys = [_dedup_key(n) for n in notifications]
+    alerts: List[Optional[HarassmentAlert]] = [notification_dedup.get(key) for key in keys]
+    owned: Dict[bytes, int] = {}  # key -> index of its first fresh occurrence
+    waiting: Dict[int, asyncio.Future] = {}
+    for index, (key, alert) in enumerate(zip(keys, alerts)):
+        if alert is not None or key in owned:
+            continue
+        pending = notification_dedup.claim(key)
+        if pending is None:
+            owned[key] = index
+        else:
+            waiting[index] = pending
+
+    if owned:
+        try:
+            fresh = await _score_alerts([notifications[i] for i in owned.values()], priority)
+        except Exception as e:
+            for key in owned:
+                notification_dedup.release(key, e)
+            raise
+        except asyncio.CancelledError:
+            for key in owned:
+                notification_dedup.release(key, _interrupted_claim())
+            raise
+        for (key, index), alert in zip(owned.items(), fresh):
+            alerts[index] = alert
+            notification_dedup.complete(key, alert)
+    for index, pending in waiting.items():
+        alerts[index] = await asyncio.shield(pending)
+    return [alert if alert is not None else alerts[owned[key]] for key, alert in zip(keys, alerts)]
+
+
 @mobile_router.post("/analyze-notification", response_model=HarassmentAlert)
 async def analyze_notification(
     notification: NotificationMessage,
+    request: Request,
+    context: bool = False,
     current_user: str = Depends(get_current_user)
 ):
     """
     Analyzes a single notification message for harassment content.
     Optimized for real-time mobile notifications.
+    With ?context=true the alert also carries the conversation's thread score.
+    A redelivered copy gets the original alert back, marked by the
+    X-Idempotent-Replay header, without being scored again.
+    Senders on the device's allow or block list are answered without scoring.
     """
+    key = _dedup_key(notification)
+    claimed = False
     try:
-        logger.info(f"Analyzing notification from {notification.app_name}: {notification.sender}")
-        
-        # Perform harassment detection
-        result = await detect_harassment(notification.message_text)
-        
-        # Extract harassment analysis results
-        harassment_data = result.get("harassment", {})
-        
-        # Determine if it's harassment and confidence
-        is_harassment = harassment_data.get("is_harassment", False)
-        confidence = harassment_data.get("confidence", 0.0)
-        
-        # Determine severity level based on confidence
-        if confidence >= 0.9:
-            severity = "critical"
-        elif confidence >= 0.7:
-            severity = "high"
-        elif confidence >= 0.5:
-            severity = "medium"
-        else:
-            severity = "low"
-        
-        # Generate alert ID for tracking
-        alert_id = str(uuid.uuid4())
-        
-        # Get threat categories (customize based on your model)
-        threat_categories = harassment_data.get("categories", ["general"])
+        original = notification_dedup.get(key)
+        if original is None:
+            pending = notification_dedup.claim(key)
+            claimed = pending is None
+            if pending is not None:
+                original = await asyncio.shield(pending)
+        if original is not None:
+            response = negotiated_response(request, original)
+            response.headers[REPLAY_HEADER] = "true"
+            return response
+
+        # Trusted and blocked senders are settled by the device's lists
+        decision = await sender_lists.check(notification.device_id, notification.sender)
+        if decision is not None:
+            alert = _sender_list_alert(decision)
+            if decision == BLOCK:
+                _record_alerts([notification], [alert])
+            notification_dedup.complete(key, alert)
+            return negotiated_response(request, alert)
+
+        # Lazy %-formatting: unsampled lines cost no string building; the sender
+        # goes in a structured field so the log writer can redact it
+        logger.info("Analyzing notification from %s", notification.app_name,
+                    extra={"fields": {"sender": notification.sender}})
         
-        # Generate recommendation
-        if is_harassment and confidence > 0.7:
-            recommendation = "Block sender and report to authorities if threats escalate"
-        elif is_harassment:
-            recommendation = "Monitor sender and consider blocking if pattern continues"
-        else:
-            recommendation = "No action required"
+        # Perform harassment detection (interactive lane: a user is waiting)
+        result = await detect_harassment(notification.message_text, Priority.INTERACTIVE)
+        alert = _escalate(_build_alert(result), notification)
+        if context:
+            alert.context = _update_context(result, notification)
+        _record_alerts([notification], [alert])
+        notification_dedup.complete(key, alert)
         
         # Log the analysis for monitoring
-        logger.info(f"Harassment analysis: {is_harassment}, confidence: {confidence}")
+        logger.info("Harassment analysis: %s, confidence: %.3f", alert.is_harassment, alert.confidence_score)
         
-        return HarassmentAlert(
-            is_harassment=is_harassment,
-            confidence_score=confidence,
-            severity_level=severity,
-            threat_categories=threat_categories,
-            alert_id=alert_id,
-            timestamp=datetime.now(),
-            recommendation=recommendation
-        )
+        return negotiated_response(request, alert)
         
+    except HTTPException as e:
+        # e.g. the request deadline passed; a waiting copy may retry
+        if claimed:
+            notification_dedup.release(key, e)
+        raise
+    except asyncio.CancelledError:
+        # Otherwise the claim stays in flight and every later copy hangs on it
+        if claimed:
+            notification_dedup.release(key, _interrupted_claim())
+        raise
     except Exception as e:
+        if claimed:
+            notification_dedup.release(key, e)
         logger.error(f"Mobile notification analysis failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
@@ -107,31 +386,275 @@ async def analyze_notification(
 @mobile_router.post("/analyze-batch-notifications", response_model=List[HarassmentAlert])
 async def analyze_batch_notifications(
     request: BatchNotificationRequest,
+    http_request: Request,
     current_user: str = Depends(get_current_user)
 ):
     """
     Analyzes multiple notifications in batch for deep scan functionality.
+    Runs in the bulk lane, in chunks, so real-time alerts are not held up.
     """
     try:
-        logger.info(f"Processing batch of {len(request.notifications)} notifications")
-        
-        alerts = []
-        for notification in request.notifications:
-            # Reuse the single notification analysis logic
-            alert = await analyze_notification(notification, current_user)
-            alerts.append(alert)
+        started = time.perf_counter()
+        alerts = await _deduplicated_alerts(request.notifications, Priority.BULK)
         
-        # Log batch results
+        # One summary line for the whole batch
         harassment_count = sum(1 for alert in alerts if alert.is_harassment)
-        logger.info(f"Batch analysis complete: {harassment_count}/{len(alerts)} flagged as harassment")
+        logger.info(
+            "Batch analysis complete for %s: %d/%d flagged as harassment in %.1f ms",
+            request.device_id, harassment_count, len(alerts), (time.perf_counter() - started) * 1000,
+        )
         
-        return alerts
+        # Alerts are already well-formed; serialize directly instead of re-validating
+        return negotiated_response(http_request, alerts)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Batch notification analysis failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
 
 
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that leaves `receive` to the body iterator. The stock
+    one listens for disconnects on `receive` while streaming, which would
+    swallow the request body we are still reading; reading the body
+    already surfaces a disconnect as ClientDisconnect.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def _ndjson_line(payload: Dict) -> bytes:
+    return json.dumps(payload).encode() + b"\n"
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'line'}: {e['msg']}" for e in error.errors()
+    )
+
+
+async def _score_stream_chunk(pending: List[Tuple[int, NotificationMessage]]) -> List[bytes]:
+    """Scores one chunk of parsed lines; returns one NDJSON result line per input line."""
+    try:
+        alerts = await _deduplicated_alerts([n for _, n in pending], Priority.BULK)
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        return [_ndjson_line({"line": line_no, "error": f"Analysis failed: {detail}"}) for line_no, _ in pending]
+    return [
+        b'{"line":%d,"alert":%s}\n' % (line_no, alert.model_dump_json().encode())
+        for (line_no, _), alert in zip(pending, alerts)
+    ]
+
+
+async def _stream_alerts(request: Request) -> AsyncIterator[bytes]:
+    """
+    Parses the NDJSON body as it arrives and yields results chunk by chunk.
+    At most one partial line and one chunk of notifications are held in memory.
+    """
+    started = time.perf_counter()
+    chunk_size = max(1, settings.BULK_CHUNK_SIZE)
+    buffer = b""
+    pending: List[Tuple[int, NotificationMessage]] = []
+    line_no = scanned = flagged = 0
+
+    async def flush() -> AsyncIterator[bytes]:
+        nonlocal pending, scanned, flagged
+        lines = await _score_stream_chunk(pending)
+        scanned += len(pending)
+        flagged += sum(1 for line in lines if b'"is_harassment":true' in line)
+        pending = []
+        for line in lines:
+            yield line
+
+    def parse(raw: bytes) -> Optional[bytes]:
+        """Queues a valid line for scoring; returns an error line otherwise."""
+        try:
+            pending.append((line_no, NotificationMessage.model_validate_json(raw)))
+        except ValidationError as e:
+            return _ndjson_line({"line": line_no, "error": _validation_message(e)})
+        return None
+
+    async for part in request.stream():
+        buffer += part
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > settings.STREAM_MAX_LINE_BYTES:
+            yield _ndjson_line({"line": line_no + 1, "error": "Line too long, stream aborted"})
+            yield _ndjson_line({"service_mode": request_mode().value})
+            return
+        for raw in lines:
+            line_no += 1
+            if raw.strip():
+                error = parse(raw)
+                if error:
+                    yield error
+            if len(pending) >= chunk_size:
+                async for line in flush():
+                    yield line
+        # Score what this network read delivered, so slow uploads still see
+        # results promptly instead of waiting for a full chunk
+        if pending:
+            async for line in flush():
+                yield line
+
+    if buffer.strip():
+        line_no += 1
+        error = parse(buffer)
+        if error:
+            yield error
+    if pending:
+        async for line in flush():
+            yield line
+
+    # The X-Service-Mode header went out before any of this was scored
+    yield _ndjson_line({"service_mode": request_mode().value})
+    logger.info(
+        "Streamed scan complete: %d/%d flagged as harassment (%d lines) in %.1f ms",
+        flagged, scanned, line_no, (time.perf_counter() - started) * 1000,
+    )
+
+
+@mobile_router.post("/analyze-batch-notifications/stream")
+async def analyze_notification_stream(
+    request: Request,
+    current_user: str = Depends(get_current_user)
+):
+    """
+    Streaming deep scan. The body is NDJSON, one NotificationMessage per line.
+    Each line is validated as it arrives and scored in chunks in the bulk lane;
+    results are streamed back as NDJSON lines, {"line": n, "alert": {...}} or
+    {"line": n, "error": "..."}, as soon as their chunk is done. The last line,
+    {"service_mode": "..."}, is the cheapest mode any chunk was scored in.
+    """
+    return _DuplexStreamingResponse(_stream_alerts(request), media_type=NDJSON_MEDIA_TYPE)
+
+
+def _websocket_token(websocket: WebSocket) -> Optional[str]:
+    """Bearer token from the Authorization header, or ?token= for clients that cannot set headers."""
+    authorization = websocket.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return authorization[7:]
+    return websocket.query_params.get("token")
+
+
+async def _receive_notifications(websocket: WebSocket, queue: "asyncio.Queue") -> None:
+    """
+    Reads frames into the connection's bounded queue. When the queue is full
+    this stops reading, so TCP backpressure slows down a flooding device.
+    """
+    try:
+        while True:
+            frame = await websocket.receive_text()
+            try:
+                data = json.loads(frame)
+                ref = data.pop("ref", None) if isinstance(data, dict) else None
+                await queue.put((ref, NotificationMessage.model_validate(data)))
+            except ValidationError as e:
+                await queue.put((ref, _validation_message(e)))
+            except ValueError as e:
+                await queue.put((None, f"Invalid JSON: {e}"))
+    except WebSocketDisconnect:
+        pass
+
+
+async def _next_notification(queue: "asyncio.Queue", receiver: "asyncio.Task",
+                             timeout: Optional[float] = None) -> Any:
+    """
+    The next queued item; None once the queue is empty and the reader has
+    stopped. Watching the reader task itself means no end-of-stream marker
+    has to fit into a full queue. Raises asyncio.TimeoutError after `timeout`.
+    """
+    if queue.empty() and receiver.done():
+        return None
+    getter = asyncio.ensure_future(queue.get())
+    done, _ = await asyncio.wait({getter, receiver}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    if getter in done:
+        return getter.result()
+    getter.cancel()
+    if receiver in done:
+        return None if queue.empty() else queue.get_nowait()
+    raise asyncio.TimeoutError
+
+
+async def _send_alerts(websocket: WebSocket, queue: "asyncio.Queue", receiver: "asyncio.Task",
+                       device_id: str) -> None:
+    """
+    Micro-batches queued notifications: after the first arrives, waits up to
+    WS_BATCH_WINDOW_MS for more (at most WS_BATCH_SIZE) and scores them in one
+    interactive-lane call, then sends one frame per notification.
+    """
+    window = settings.WS_BATCH_WINDOW_MS / 1000
+    loop = asyncio.get_running_loop()
+    closed = False
+    while not closed:
+        item = await _next_notification(queue, receiver)
+        if item is None:
+            break
+        batch = [item]
+        deadline = loop.time() + window
+        while len(batch) < settings.WS_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await _next_notification(queue, receiver, timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                closed = True
+                break
+            batch.append(item)
+
+        frames = [{"ref": ref, "error": entry} for ref, entry in batch if isinstance(entry, str)]
+        valid = [(ref, entry) for ref, entry in batch if not isinstance(entry, str)]
+        if valid:
+            try:
+                alerts = await _deduplicated_alerts([n for _, n in valid], Priority.INTERACTIVE)
+                frames += [
+                    {"ref": ref, "alert": alert.model_dump(mode="json")}
+                    for (ref, _), alert in zip(valid, alerts)
+                ]
+            except Exception as e:
+                logger.error("WebSocket batch analysis failed for %s: %s", device_id, e)
+                frames += [{"ref": ref, "error": "Analysis failed"} for ref, _ in valid]
+        for frame in frames:
+            await websocket.send_json(frame)
+
+
+@mobile_router.websocket("/ws/{device_id}")
+async def notification_socket(websocket: WebSocket, device_id: str):
+    """
+    Persistent channel for continuous monitoring. The device authenticates
+    once (bearer token in the Authorization header or ?token=), then sends
+    NotificationMessage JSON frames, optionally with a "ref" it wants echoed,
+    and receives {"ref", "alert"} or {"ref", "error"} frames back.
+    """
+    token = _websocket_token(websocket)
+    try:
+        current_user = decode_access_token(token) if token else None
+    except HTTPException:
+        current_user = None
+    if current_user is None:
+        await websocket.close(code=1008)  # policy violation
+        return
+
+    await websocket.accept()
+    logger.info("WebSocket monitoring opened for device %s", device_id)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_MAX_PENDING)
+    receiver = asyncio.create_task(_receive_notifications(websocket, queue))
+    try:
+        await _send_alerts(websocket, queue, receiver, device_id)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        logger.info("WebSocket monitoring closed for device %s", device_id)
+
+
 @mobile_router.get("/device-status/{device_id}")
 async def get_device_status(
     device_id: str,
@@ -141,15 +664,18 @@ async def get_device_status(
     Gets monitoring status and statistics for a specific device.
     """
     try:
-        # This would typically query a database for device statistics
-        # For now, returning mock data structure
+        # One keyed read of the device's per-app aggregates
+        stats = await asyncio.to_thread(device_stats.device_status, device_id)
         return {
             "device_id": device_id,
             "monitoring_active": True,
             "last_check": datetime.now(),
-            "total_messages_analyzed": 0,  # Would come from database
-            "harassment_detected": 0,      # Would come from database
-            "apps_monitored": ["WhatsApp", "Messenger", "SMS", "Instagram", "Telegram"]
+            "last_seen": stats["last_seen"],
+            "total_messages_analyzed": stats["messages_analyzed"],
+            "harassment_detected": stats["harassment_detected"],
+            "severity_histogram": stats["severity_histogram"],
+            "apps_monitored": sorted(stats["apps"]),
+            "apps": stats["apps"],
         }
         
     except Exception as e:
@@ -157,6 +683,29 @@ async def get_device_status(
         raise HTTPException(status_code=500, detail=f"Status check failed: {str(e)}")
 
 
+@mobile_router.put("/devices/{device_id}/sender-lists")
+async def update_sender_lists(
+    device_id: str,
+    lists: SenderListsRequest,
+    current_user: str = Depends(get_current_user)
+):
+    """
+    Replaces the device's trusted (allow) and blocked senders. Notifications
+    from these senders are no longer scored: trusted ones are cleared and
+    blocked ones raise an alert straight away.
+    """
+    try:
+        counts = await sender_lists.replace(device_id, lists.allow, lists.block)
+        logger.info("Sender lists updated for %s: %d allowed, %d blocked", device_id, counts["allow"], counts["block"])
+        return {"device_id": device_id, "allow_count": counts["allow"], "block_count": counts["block"]}
+
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        logger.error("Sender list update failed: %s", e)
+        raise HTTPException(status_code=500, detail=f"Sender list update failed: {str(e)}")
+
+
 @mobile_router.post("/report-incident")
 async def report_incident(
     alert_id: str,
@@ -165,23 +714,38 @@ async def report_incident(
 ):
     """
     Allows users to report harassment incidents for further action.
+    The incident is linked to the stored alert it refers to.
     """
     try:
-        # This would typically store incident reports in a database
-        # and potentially trigger notifications to authorities
-        
+        alert = await asyncio.to_thread(incident_log.get, ALERT, alert_id)
+        if alert is None:
+            raise HTTPException(status_code=404, detail=f"Unknown alert_id: {alert_id}")
+
         incident_id = str(uuid.uuid4())
+        incident = {
+            "incident_id": incident_id,
+            "alert_id": alert_id,
+            "device_id": alert["device_id"],
+            "additional_info": additional_info,
+            "reported_by": current_user,
+            "timestamp": datetime.now(),
+        }
+        # Unlike alerts, an incident is only acknowledged once it is on disk
+        await asyncio.wrap_future(incident_log.append(INCIDENT, incident_id, incident))
         
         logger.info(f"Incident reported: alert_id={alert_id}, incident_id={incident_id}")
         
         return {
             "incident_id": incident_id,
             "alert_id": alert_id,
+            "alert": alert["alert"],
             "status": "reported",
-            "timestamp": datetime.now(),
+            "timestamp": incident["timestamp"],
             "message": "Incident reported successfully. Authorities will be notified if required."
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Incident reporting failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Incident reporting failed: {str(e)}")
\ No newline at end of file
@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
+import asyncio
+import time
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, File, Response, UploadFile
 from fastapi.security import OAuth2PasswordRequestForm
-from typing import Dict, List
+from typing import Any, Dict, List
 
 # --- Schema Imports ---
 from .schemas import (
@@ -8,16 +12,25 @@ from .schemas import (
     HarassmentRequest,
     AnalysisResponse,
     BatchAnalysisRequest,
-    HealthCheckResponse
+    BatchAnalysisResponse,
+    HealthCheckResponse,
+    JobStatusResponse
 )
 
 # --- Service and Security Imports ---
-from src.services.detection import detect_deepfake, detect_harassment
+from src.services.detection import (
+    detect_deepfake,
+    detect_deepfake_batch,
+    detect_harassment,
+    detect_harassment_batch
+)
+from src.services.jobs import media_jobs
+from src.services.scheduler import Priority
+from src.core.config import settings
 from src.core.security import (
     get_current_user,
-    verify_password,
-    create_access_token,
-    get_password_hash
+    verify_password_async,
+    create_access_token
 )
 from src.utils.logging import logger
 
@@ -31,7 +44,8 @@ fake_users_db = {
         "username": "johndoe",
         "full_name": "John Doe",
         "email": "johndoe@example.com",
-        "hashed_password": get_password_hash("secret"),
+        # bcrypt of "secret", precomputed so importing this module doesn't hash
+        "hashed_password": "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW",
         "disabled": False,
     }
 }
@@ -42,7 +56,7 @@ fake_users_db = {
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     """Handles user login and returns an access token."""
     user = fake_users_db.get(form_data.username)
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    if not user or not await verify_password_async(form_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=401,
             detail="Incorrect username or password",
@@ -74,6 +88,8 @@ async def analyze_deepfake(
             result=result,
             message="Analysis completed successfully"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Deepfake analysis failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -93,38 +109,68 @@ async def analyze_harassment(
             result=result,
             message="Analysis completed successfully"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Harassment analysis failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/analyze/batch", response_model=List[AnalysisResponse], tags=["Analysis"])
+@router.post("/analyze/batch", response_model=BatchAnalysisResponse, tags=["Analysis"])
 async def analyze_batch(
     request: BatchAnalysisRequest,
     current_user: str = Depends(get_current_user)
 ):
-    """Processes multiple items for analysis in a single batch."""
-    try:
-        results = []
-        for item in request.items:
-            if item.type == "deepfake":
-                result = await detect_deepfake(item.content)
-            elif item.type == "harassment":
-                result = await detect_harassment(item.content)
+    """
+    Processes multiple items for analysis in a single batch.
+    Items are grouped by type and each group goes through the model's batched
+    path concurrently; a failing item is reported in place without aborting
+    the rest.
+    """
+    started = time.perf_counter()
+    groups: Dict[str, List[int]] = {}
+    for index, item in enumerate(request.items):
+        groups.setdefault(item.type, []).append(index)
+
+    outcomes: List[Any] = [None] * len(request.items)
+    group_ms: Dict[str, float] = {}
+
+    async def run_group(item_type: str, indices: List[int]):
+        group_started = time.perf_counter()
+        contents = [request.items[index].content for index in indices]
+        try:
+            if item_type == "deepfake":
+                results = await detect_deepfake_batch(contents, Priority.BULK)
+            elif item_type == "harassment":
+                results = await detect_harassment_batch(contents, Priority.BULK)
             else:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported analysis type: {item.type}"
-                )
-            results.append(AnalysisResponse(
+                results = [ValueError(f"Unsupported analysis type: {item_type}")] * len(indices)
+        except Exception as e:
+            results = [e] * len(indices)
+        for index, result in zip(indices, results):
+            outcomes[index] = result
+        group_ms[item_type] = round((time.perf_counter() - group_started) * 1000, 2)
+
+    await asyncio.gather(*[run_group(item_type, indices) for item_type, indices in groups.items()])
+
+    responses = []
+    for item, outcome in zip(request.items, outcomes):
+        if isinstance(outcome, BaseException):
+            detail = outcome.detail if isinstance(outcome, HTTPException) else str(outcome)
+            logger.error("Batch item (%s) failed: %s", item.type, detail)
+            responses.append(AnalysisResponse(success=False, result={}, message=str(detail)))
+        else:
+            responses.append(AnalysisResponse(
                 success=True,
-                result=result,
+                result=outcome,
                 message=f"{item.type} analysis completed"
             ))
-        return results
-    except Exception as e:
-        logger.error(f"Batch analysis failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+
+    return BatchAnalysisResponse(
+        results=responses,
+        total_ms=round((time.perf_counter() - started) * 1000, 2),
+        group_ms=group_ms,
+    )
 
 
 @router.post("/upload", response_model=AnalysisResponse, tags=["Analysis"])
@@ -149,6 +195,71 @@ async def upload_file(
             result=result,
             message="File analysis completed successfully"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"File upload and analysis failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# --- Media Analysis Jobs ---
+def _job_response(job: Dict[str, Any]) -> JobStatusResponse:
+    return JobStatusResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        analysis_type=job["analysis_type"],
+        created_at=datetime.fromtimestamp(job["created_at"]),
+        updated_at=datetime.fromtimestamp(job["updated_at"]),
+        expires_at=datetime.fromtimestamp(job["expires_at"]),
+        frames_processed=job["frames_processed"],
+        frames_total=job["frames_total"],
+        result=job["result"],
+        error=job["error"],
+    )
+
+
+@router.post("/jobs", response_model=JobStatusResponse, status_code=202, tags=["Jobs"])
+async def submit_job(
+    response: Response,
+    file: UploadFile = File(...),
+    analysis_type: str = "deepfake",
+    current_user: str = Depends(get_current_user)
+):
+    """
+    Queues a file for analysis and returns its job at once. Use this instead
+    of /upload for large media, e.g. long videos; poll the job for progress
+    and the result.
+    """
+    if analysis_type != "deepfake":
+        raise HTTPException(status_code=400, detail=f"Unsupported analysis type: {analysis_type}")
+    try:
+        job = await media_jobs.submit(file.file, analysis_type, current_user)
+        logger.info("Media job %s queued", job["job_id"])
+        response.headers["Location"] = f"{settings.API_PREFIX}/jobs/{job['job_id']}"
+        return _job_response(job)
+    except Exception as e:
+        logger.error("Job submission failed: %s", e)
+        raise HTTPException(status_code=500, detail=f"Job submission failed: {str(e)}")
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse, tags=["Jobs"])
+async def get_job(
+    job_id: str,
+    wait: float = 0.0,
+    current_user: str = Depends(get_current_user)
+):
+    """
+    Status, progress (frames analysed) and, once finished, the result of a
+    job. With ?wait=N (seconds, capped at JOB_MAX_WAIT_SECONDS) the request
+    is held until the job finishes or makes progress (long poll).
+    """
+    try:
+        job = await media_jobs.get(job_id, current_user, min(max(0.0, wait), settings.JOB_MAX_WAIT_SECONDS))
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+        return _job_response(job)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Job lookup failed: %s", e)
+        raise HTTPException(status_code=500, detail=f"Job lookup failed: {str(e)}")
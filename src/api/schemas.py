@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 
@@ -27,5 +29,24 @@ class BatchAnalysisRequest(BaseModel):
     items: List[BatchAnalysisItem]
 
 
+class BatchAnalysisResponse(BaseModel):
+    results: List[AnalysisResponse]  # same order as the request items
+    total_ms: float
+    group_ms: Dict[str, float]  # wall time per analysis type; groups run concurrently
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str  # "queued", "running", "succeeded" or "failed"
+    analysis_type: str
+    created_at: datetime
+    updated_at: datetime
+    expires_at: datetime  # the job is forgotten after this
+    frames_processed: int
+    frames_total: Optional[int] = None  # known once analysis starts
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
 class HealthCheckResponse(BaseModel):
     status: str
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 class Settings(BaseSettings):
     """
@@ -27,12 +27,139 @@ class Settings(BaseSettings):
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000"]
 
     # Model Settings
-    DEEPFAKE_MODEL_PATH: str = "models/deepfake.pt"
-    HARASSMENT_MODEL_PATH: str = "models/harassment.pt"
+    # Initial model versions: a Hugging Face hub id or a local save_pretrained()
+    # directory. Later versions are rolled out through MODEL_REGISTRY_FILE.
+    DEEPFAKE_MODEL_PATH: str = "google/vit-base-patch16-224"
+    HARASSMENT_MODEL_PATH: str = "distilbert-base-uncased-finetuned-sst-2-english"
+    # Shared by all workers: each one polls it and hot-swaps to the versions it names
+    MODEL_REGISTRY_FILE: str = "models/registry.json"
+    MODEL_REGISTRY_POLL_SECONDS: float = 10.0
+    # Shadow runs waiting for the shadow thread; beyond this samples are skipped
+    MODEL_SHADOW_QUEUE_SIZE: int = 8
+    # Who may roll models out through the API, and which versions (besides the
+    # initial ones) they may roll out; empty means rollouts by manifest only
+    MODEL_ADMIN_USERS: List[str] = []
+    MODEL_ROLLOUT_ALLOWLIST: List[str] = []
+    # Compiled graphs, quantized weights etc. are cached here between restarts
+    MODEL_CACHE_DIR: str = "models/cache"
+
+    # Deepfake ViT execution ("optimized" = inference_mode + channels-last)
+    DEEPFAKE_OPTIMIZED: bool = False
+    DEEPFAKE_BF16: bool = True
+    DEEPFAKE_COMPILE_MODE: str = "none"  # "none", "compile" or "trace"
+
+    # Harassment sentiment model: use the approved int8 variant from MODEL_CACHE_DIR
+    HARASSMENT_QUANTIZED: bool = False
+
+    # Inference execution
+    INFERENCE_THREADS: int = 1
+    # Priority lanes: "strict" or "weighted" (interactive:bulk jobs served 8:1)
+    SCHEDULER_POLICY: str = "weighted"
+    SCHEDULER_INTERACTIVE_WEIGHT: int = 8
+    SCHEDULER_BULK_WEIGHT: int = 1
+    # Bulk batches are split into jobs of this many items
+    BULK_CHUNK_SIZE: int = 16
+    # NDJSON streaming scans abort on a single line longer than this
+    STREAM_MAX_LINE_BYTES: int = 65536
+    # WebSocket monitoring: per-connection micro-batching and flow control
+    WS_BATCH_SIZE: int = 16
+    WS_BATCH_WINDOW_MS: float = 10.0
+    WS_MAX_PENDING: int = 64
+    VIDEO_MAX_FRAMES: int = 32
+    VIDEO_DEGRADED_MAX_FRAMES: int = 8
+    MEDIA_CACHE_SIZE: int = 256
+
+    # Overload protection (steps down full -> degraded -> cached_only). Latency
+    # is the p95 time inference waited in the queue, over at least MIN_SAMPLES
+    OVERLOAD_QUEUE_HIGH: int = 16
+    OVERLOAD_QUEUE_LOW: int = 4
+    OVERLOAD_LATENCY_HIGH_MS: float = 2000.0
+    OVERLOAD_LATENCY_LOW_MS: float = 500.0
+    OVERLOAD_COOLDOWN_SECONDS: float = 15.0
+    OVERLOAD_MIN_SAMPLES: int = 8
+
+    # Per-device statistics (SQLite, written in batches)
+    DEVICE_STATS_DB: str = "device_stats.db"
+    DEVICE_STATS_FLUSH_SECONDS: float = 2.0
+
+    # Append-only alert/incident log (one directory per worker, group commit)
+    INCIDENT_LOG_DIR: str = "data/incidents"
+    INCIDENT_SEGMENT_BYTES: int = 64 * 1024 * 1024
+    INCIDENT_COMMIT_INTERVAL_MS: float = 5.0
+    # Oldest segments of a worker's directory are deleted beyond this (0: keep all)
+    INCIDENT_RETENTION_BYTES: int = 1024 * 1024 * 1024
+
+    # Per-sender escalation: decaying count-min sketch of recent harassment
+    # per (device, sender); 4 x 65536 cells is 2 MB per worker
+    REPUTATION_SKETCH_WIDTH: int = 65536
+    REPUTATION_SKETCH_DEPTH: int = 4
+    REPUTATION_HALF_LIFE_SECONDS: float = 3600.0
+    ESCALATION_REPEATS_PER_LEVEL: float = 3.0
+
+    # Conversation-context scoring per (device, sender, app) thread
+    CONVERSATION_MAX_THREADS: int = 100000
+    CONVERSATION_IDLE_SECONDS: float = 1800.0
+    CONVERSATION_DECAY: float = 0.8
+    CONVERSATION_KEYWORD_WINDOW: int = 16
+
+    # Idempotent ingest: redelivered notifications get their original alert
+    DEDUP_WINDOW_SECONDS: float = 300.0
+    DEDUP_BLOOM_ERROR_RATE: float = 0.001
+    # Alerts remembered per worker; copies of older notifications are scored
+    # again even within the window. Also sizes the Bloom filter
+    DEDUP_LRU_SIZE: int = 10000
+
+    # Admission control on the mobile ingest routes (one token per notification)
+    ADMISSION_DEVICE_RATE: float = 5.0
+    ADMISSION_DEVICE_BURST: float = 100.0
+    ADMISSION_USER_RATE: float = 20.0
+    ADMISSION_USER_BURST: float = 500.0
+    ADMISSION_TABLE_SIZE: int = 100000
+    ADMISSION_PRUNE_SECONDS: float = 60.0
+    MOBILE_MAX_BATCH_SIZE: int = 500
+    MOBILE_MAX_BODY_BYTES: int = 2 * 1024 * 1024
+
+    # Per-device allow/block lists of senders, checked before scoring. Each
+    # list is a fixed-size Bloom filter in memory (2000 senders at 1% is 2.4 KB)
+    SENDER_LISTS_DB: str = "sender_lists.db"
+    SENDER_LIST_MAX_ENTRIES: int = 2000
+    SENDER_LIST_ERROR_RATE: float = 0.01
+    SENDER_LIST_CACHE_DEVICES: int = 10000
+    SENDER_LIST_REFRESH_SECONDS: float = 30.0
+
+    # Asynchronous media analysis jobs (SQLite job table, media spooled to disk)
+    JOBS_DB: str = "jobs.db"
+    JOB_MEDIA_DIR: str = "data/jobs"
+    JOB_WORKERS: int = 2
+    JOB_TTL_SECONDS: float = 3600.0
+    JOB_MAX_WAIT_SECONDS: float = 30.0
+    JOB_PROGRESS_WRITE_SECONDS: float = 1.0
+    JOB_SWEEP_SECONDS: float = 60.0
+    # Unfinished jobs untouched by their worker this long are taken over by another
+    JOB_CLAIM_SECONDS: float = 60.0
+
+    # Request deadlines (ms, per route under API_PREFIX); clients may send
+    # X-Request-Deadline-Ms instead, up to REQUEST_DEADLINE_MAX_MS
+    REQUEST_DEADLINES_MS: Dict[str, float] = {
+        "/mobile/analyze-notification": 5000.0,
+        "/mobile/analyze-batch-notifications": 60000.0,
+        "/analyze/harassment": 5000.0,
+        "/analyze/deepfake": 60000.0,
+        "/analyze/batch": 120000.0,
+        "/upload": 120000.0,
+    }
+    REQUEST_DEADLINE_MAX_MS: float = 300000.0
+
+    # CPU Thread Budget
+    # Total cores shared by all workers (0 = every core this process may run on)
+    CPU_THREAD_BUDGET: int = 0
+    TORCH_INTEROP_THREADS: int = 1
+    TOKENIZERS_PARALLELISM: bool = False
+    PIN_WORKER_CPUS: bool = False
 
     class Config:
         env_file = ".env"
         case_sensitive = False
 
 # Create a single, importable instance of the Settings class
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -1,6 +1,11 @@
+import asyncio
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Optional, Tuple
 
 from dotenv import load_dotenv  # <-- 1. Import the library
 from fastapi import Security, HTTPException, Depends
@@ -20,6 +25,11 @@ load_dotenv()  # <-- 2. Load the .env file
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Verified tokens remembered per worker (0 disables the cache)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# bcrypt threads per worker, and how many hash jobs may wait for them
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
 
 # This check ensures the app will crash if the secret key is missing
 if SECRET_KEY is None:
@@ -41,6 +51,36 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+# Each bcrypt call takes 100-250 ms of CPU. Request handlers use the async
+# variants below, which run it on a small dedicated pool so a burst of logins
+# neither blocks the event loop nor takes over the inference threads.
+_hash_pool = ThreadPoolExecutor(max_workers=max(1, PASSWORD_HASH_WORKERS), thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(max(1, PASSWORD_HASH_MAX_PENDING))
+
+
+async def _run_hashing(fn: Callable[..., Any], *args: Any) -> Any:
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503,
+            detail="Too many authentication requests in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        future = _hash_pool.submit(fn, *args)
+    except BaseException:
+        _hash_slots.release()
+        raise
+    # The slot is held until bcrypt finishes, even if the request is cancelled
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return await asyncio.wrap_future(future)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hashing(get_password_hash, password)
+
+
 # ----------------------------------------------------
 # JWT utilities
 # ----------------------------------------------------
@@ -51,18 +91,69 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+# ----------------------------------------------------
+# Verified-token cache
+# ----------------------------------------------------
+class TokenCache:
+    """
+    Bounded LRU of token -> verified claims, so repeat requests skip the
+    signature check. An entry never outlives its token's exp.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            claims, exp = entry
+            if exp <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return claims
+
+    def put(self, token: str, claims: dict) -> None:
+        exp = claims.get("exp")
+        if not self.max_size or exp is None:
+            return
+        with self._lock:
+            self._entries[token] = (claims, float(exp))
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drops cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+
+
 # ----------------------------------------------------
 # Current user dependency
 # ----------------------------------------------------
-def get_current_user(token: str = Security(oauth2_scheme)) -> str:
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+def decode_access_token(token: str) -> str:
+    """Returns the token's subject; raises HTTPException(401) if invalid."""
+    claims = token_cache.get(token)
+    if claims is None:
+        try:
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+        if claims.get("sub") is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        return username
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+        token_cache.put(token, claims)
+    return claims["sub"]
+
+def get_current_user(token: str = Security(oauth2_scheme)) -> str:
+    return decode_access_token(token)
 
 def get_current_active_user(current_user: str = Depends(get_current_user)) -> str:
     # Here you could check against a DB whether user is active
@@ -0,0 +1,126 @@
+# src/core/threads.py
+
+import os
+from dataclasses import dataclass, asdict, field
+from typing import Any, Dict, List, Optional
+
+from src.core.config import Settings
+
+# Set by gunicorn.conf.py in each worker so the planner knows how many
+# processes share the host and which slice of the CPU budget is its own.
+WORKER_COUNT_ENV = "DEEPGUARD_WORKER_COUNT"
+WORKER_SLOT_ENV = "DEEPGUARD_WORKER_SLOT"
+
+
+@dataclass
+class ThreadPlan:
+    """Per-worker share of the host's CPU budget."""
+    available_cores: int
+    workers: int
+    worker_slot: Optional[int]
+    intra_op_threads: int
+    inter_op_threads: int
+    opencv_threads: int
+    tokenizers_parallelism: bool
+    cpu_affinity: Optional[List[int]] = None
+    applied: Dict[str, Any] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _available_cpus() -> List[int]:
+    """CPUs this process is allowed to run on (respects cgroups/taskset)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    if value is None or not value.isdigit():
+        return None
+    return int(value)
+
+
+def plan_threads(settings: Settings) -> ThreadPlan:
+    """
+    Splits the available cores evenly among the running workers (as reported
+    by gunicorn, falling back to Settings.WORKERS).
+    Each worker gets at least one intra-op thread, so an oversized
+    WORKERS value degrades to one thread per worker instead of oversubscribing.
+    """
+    cpus = _available_cpus()
+    budget = settings.CPU_THREAD_BUDGET or len(cpus)
+    budget = max(1, min(budget, len(cpus)))
+    workers = max(1, _env_int(WORKER_COUNT_ENV) or settings.WORKERS)
+    per_worker = max(1, budget // workers)
+    slot = _env_int(WORKER_SLOT_ENV)
+
+    affinity = None
+    if settings.PIN_WORKER_CPUS and slot is not None:
+        start = ((slot % workers) * per_worker) % len(cpus)
+        affinity = cpus[start:start + per_worker]
+
+    return ThreadPlan(
+        available_cores=budget,
+        workers=workers,
+        worker_slot=slot,
+        intra_op_threads=per_worker,
+        inter_op_threads=max(1, min(settings.TORCH_INTEROP_THREADS, per_worker)),
+        opencv_threads=per_worker,
+        tokenizers_parallelism=settings.TOKENIZERS_PARALLELISM,
+        cpu_affinity=affinity,
+    )
+
+
+def apply_thread_plan(plan: ThreadPlan) -> ThreadPlan:
+    """
+    Applies the plan to this process. Must run before torch/tokenizers do any
+    work: the environment variables are only read when those libraries start
+    their thread pools.
+    """
+    threads = str(plan.intra_op_threads)
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = threads
+    os.environ["TOKENIZERS_PARALLELISM"] = "true" if plan.tokenizers_parallelism else "false"
+    plan.applied["env"] = True
+
+    if plan.cpu_affinity and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, plan.cpu_affinity)
+            plan.applied["affinity"] = True
+        except OSError as e:
+            plan.applied["affinity"] = f"failed: {e}"
+
+    try:
+        import torch
+        torch.set_num_threads(plan.intra_op_threads)
+        plan.applied["torch_intra_op"] = torch.get_num_threads()
+        try:
+            torch.set_num_interop_threads(plan.inter_op_threads)
+        except RuntimeError:
+            # Inter-op pool already started; keep whatever torch is using
+            pass
+        plan.applied["torch_inter_op"] = torch.get_num_interop_threads()
+    except ImportError:
+        plan.applied["torch_intra_op"] = None
+
+    try:
+        import cv2
+        cv2.setNumThreads(plan.opencv_threads)
+        plan.applied["opencv"] = cv2.getNumThreads()
+    except ImportError:
+        plan.applied["opencv"] = None
+
+    return plan
+
+
+# Plan for this worker, filled in by configure_threads() at startup
+current_plan: Optional[ThreadPlan] = None
+
+
+def configure_threads(settings: Settings) -> ThreadPlan:
+    global current_plan
+    current_plan = apply_thread_plan(plan_threads(settings))
+    return current_plan
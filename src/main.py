@@ -1,15 +1,29 @@
 # src/main.py
 
-from fastapi import FastAPI, Depends
+import asyncio
+
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import your centralized settings and logger
 from src.core.config import Settings, settings
-from src.utils.logging import logger
+from src.utils.logging import logger, request_log_context
+
+# Size torch/tokenizers/OpenCV thread pools before the routers import the models
+from src.core.threads import configure_threads
+thread_plan = configure_threads(settings)
+logger.info("CPU thread plan: %s", thread_plan.as_dict())
 
 # Import the router that contains all your endpoints
 from src.api.routes import router as api_router
 from src.api.mobile_routes import mobile_router
+from src.api.diagnostics_routes import diagnostics_router
+from src.api.admission import AdmissionMiddleware
+from src.api.deadline import DeadlineMiddleware
+from src.services.incident_log import incident_log
+from src.services.jobs import media_jobs
+from src.services.notification import alert_mailer
+from src.services.overload import request_mode, track_request_modes
 
 # Metadata for API documentation tags
 tags_metadata = [
@@ -29,6 +43,10 @@ tags_metadata = [
         "name": "Mobile",
         "description": "Mobile-specific endpoints for real-time notification monitoring.",
     },
+    {
+        "name": "Diagnostics",
+        "description": "Runtime introspection of the serving worker.",
+    },
 ]
 
 # Create the main FastAPI application instance
@@ -43,11 +61,64 @@ app = FastAPI(
 )
 
 # --- Application Lifecycle Events ---
-# Note: Startup and shutdown events removed to fix async issues
-# Models are loaded lazily when first accessed
+# Models are loaded lazily when first accessed; the hooks below only open
+# and hand off this worker's own state
+
+@app.on_event("startup")
+async def open_incident_log():
+    # Claims this worker's log directory and indexes records left past the index
+    await asyncio.to_thread(incident_log.open)
+
+
+@app.on_event("shutdown")
+async def close_incident_log():
+    await asyncio.to_thread(incident_log.close)
+
+
+@app.on_event("shutdown")
+async def close_alert_mailer():
+    # Alerts still in their digest window or backing off would go down with the worker
+    await alert_mailer.close()
 
 
+@app.on_event("shutdown")
+async def close_media_jobs():
+    # Stops the job tasks; unfinished jobs are claimed by a live worker once they go stale
+    await media_jobs.close()
+
+
+# --- Admission Control ---
+# Per-device/per-user token buckets on the mobile ingest routes, ahead of body parsing
+app.add_middleware(AdmissionMiddleware, prefix=settings.API_PREFIX)
+
+# --- Service Mode Header ---
+# Lets clients notice degraded answers on any endpoint and re-scan later
+@app.middleware("http")
+async def add_service_mode_header(request: Request, call_next):
+    # Log lines of this request carry its route and share one sampling decision
+    with request_log_context(request.url.path), track_request_modes():
+        response = await call_next(request)
+        # The mode this request's inference actually ran under, if it ran any.
+        # A streamed body is produced after this, so for streams the header
+        # only covers work done before the response started; the NDJSON scan
+        # reports its mode in a final line instead
+        response.headers["X-Service-Mode"] = request_mode().value
+    return response
+
+
+# --- Request Deadlines ---
+# Outermost but for CORS: it sets the deadline for everything below and
+# sees the client's disconnect directly
+app.add_middleware(
+    DeadlineMiddleware,
+    prefix=settings.API_PREFIX,
+    route_defaults_ms=settings.REQUEST_DEADLINES_MS,
+    max_ms=settings.REQUEST_DEADLINE_MAX_MS,
+)
+
 # --- Add CORS Middleware ---
+# Added last so it is outermost: the 429/413/504 answered by the middleware
+# above still carry the CORS headers browsers need to read them
 if settings.ALLOWED_ORIGINS:
     app.add_middleware(
         CORSMiddleware,
@@ -57,9 +128,11 @@ if settings.ALLOWED_ORIGINS:
         allow_headers=["*"],
     )
 
+
 # --- Include Your API Routers ---
 app.include_router(api_router, prefix=settings.API_PREFIX)
 app.include_router(mobile_router, prefix=settings.API_PREFIX)
+app.include_router(diagnostics_router, prefix=settings.API_PREFIX)
 
 
 @app.get("/", tags=["Health"])
@@ -1,29 +1,174 @@
+import hashlib
+import os
+import threading
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional
+
 import torch
 from PIL import Image
 from transformers import AutoModelForImageClassification, AutoImageProcessor
 
+
+def cpu_supports_bf16() -> bool:
+    """
+    True when the CPU has native bf16 math (AMX or AVX512-BF16).
+    Without it autocast emulates bf16 and is slower than plain fp32.
+    """
+    for probe in ("_is_amx_tile_supported", "_is_avx512_bf16_supported"):
+        check = getattr(torch.cpu, probe, None)
+        if check is not None and check():
+            return True
+    return False
+
+
+class _LogitsOnly(torch.nn.Module):
+    """Wraps a HF classifier so it takes and returns plain tensors (traceable)."""
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return self.model(pixel_values=pixel_values).logits
+
+
 class DeepfakeModel:
-    def __init__(self, model_name: str):
+    def __init__(
+        self,
+        model_name: str,
+        optimized: bool = False,
+        bf16: bool = False,
+        compile_mode: str = "none",
+        cache_dir: Optional[str] = None,
+    ):
+        """
+        `optimized` switches from plain fp32 eager execution to inference_mode
+        with channels-last inputs, plus (each opt-in) bf16 autocast and a
+        compiled graph: compile_mode is "none", "compile" (torch.compile) or
+        "trace" (TorchScript, one graph per batch size, cached in cache_dir).
+        """
+        self.model_name = model_name
         self.processor = AutoImageProcessor.from_pretrained(model_name)
         self.model = AutoModelForImageClassification.from_pretrained(model_name)
         self.model.eval()
 
+        self.optimized = optimized
+        self.use_bf16 = optimized and bf16 and cpu_supports_bf16()
+        self.compile_mode = compile_mode if optimized else "none"
+        self.cache_dir = cache_dir
+        self._logits = _LogitsOnly(self.model).eval()
+        self._runners: Dict[int, Callable[[torch.Tensor], torch.Tensor]] = {}
+        # Inference threads share the model: trace/compile each batch size once
+        self._runners_lock = threading.Lock()
+
+        if self.optimized:
+            # The patch embedding is a Conv2d; NHWC lets oneDNN skip reorders
+            self.model.to(memory_format=torch.channels_last)
+        if self.compile_mode == "compile" and cache_dir:
+            # Inductor reuses compiled kernels across restarts from this dir
+            os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.join(cache_dir, "inductor"))
+            os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+
     def analyze_image(self, image: Image.Image) -> dict:
         """
         Processes an image and returns a dictionary with the prediction and score.
         """
-        inputs = self.processor(images=image, return_tensors="pt")
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-        
-        logits = outputs.logits
-        probabilities = torch.nn.functional.softmax(logits, dim=1)[0]
-        
-        # Get the top prediction's index and score
-        top_prob, top_idx = torch.max(probabilities, dim=0)
-        predicted_label = self.model.config.id2label[top_idx.item()]
-        
-        return {"prediction": predicted_label, "score": top_prob.item()}
+        return self.analyze_images([image])[0]
+
+    def analyze_images(self, images: List[Image.Image]) -> List[dict]:
+        """
+        Classifies several images in one forward pass.
+        """
+        inputs = self.processor(images=images, return_tensors="pt")
+        logits = self.predict_logits(inputs["pixel_values"])
+        probabilities = torch.nn.functional.softmax(logits, dim=1)
+
+        # Get each image's top prediction and score
+        top_probs, top_idxs = torch.max(probabilities, dim=1)
+        return [
+            {"prediction": self.model.config.id2label[idx.item()], "score": prob.item()}
+            for prob, idx in zip(top_probs, top_idxs)
+        ]
+
+    def predict_logits(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        """Runs the classifier on preprocessed pixel values under the configured mode."""
+        if not self.optimized:
+            with torch.no_grad():
+                return self._logits(pixel_values)
+
+        pixel_values = pixel_values.contiguous(memory_format=torch.channels_last)
+        runner = self._runner(pixel_values.shape[0])
+        with torch.inference_mode(), self._autocast():
+            logits = runner(pixel_values)
+        return logits.float()
+
+    def _autocast(self):
+        if self.use_bf16:
+            return torch.autocast(device_type="cpu", dtype=torch.bfloat16)
+        return nullcontext()
+
+    def _runner(self, batch_size: int) -> Callable[[torch.Tensor], torch.Tensor]:
+        if self.compile_mode == "none":
+            return self._logits
+        # A single compiled callable; dynamo specialises per input shape itself
+        key = 0 if self.compile_mode == "compile" else batch_size
+        runner = self._runners.get(key)
+        if runner is None:
+            with self._runners_lock:
+                runner = self._runners.get(key)
+                if runner is None:
+                    if self.compile_mode == "compile":
+                        runner = torch.compile(self._logits, dynamic=False)
+                    else:
+                        runner = self._load_or_trace(batch_size)
+                    self._runners[key] = runner
+        return runner
+
+    def _weights_fingerprint(self) -> str:
+        """
+        Identifies the exact weights loaded: a local directory by its files'
+        sizes and mtimes (it may be updated in place), a hub model by the
+        resolved commit.
+        """
+        if os.path.isdir(self.model_name):
+            entries = []
+            for name in sorted(os.listdir(self.model_name)):
+                stat = os.stat(os.path.join(self.model_name, name))
+                entries.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+            return ",".join(entries)
+        return getattr(self.model.config, "_commit_hash", None) or self.model.config.to_json_string()
+
+    def _trace_path(self, batch_size: int) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        key = f"{self.model_name}|{self._weights_fingerprint()}|{torch.__version__}|bf16={self.use_bf16}"
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"deepfake-{digest}-b{batch_size}.pt")
+
+    def _load_or_trace(self, batch_size: int) -> torch.jit.ScriptModule:
+        path = self._trace_path(batch_size)
+        if path and os.path.exists(path):
+            try:
+                return torch.jit.load(path)
+            except RuntimeError:
+                # Stale or corrupt artifact; fall through and re-trace
+                pass
+
+        size = self.processor.size
+        height = size.get("height", size.get("shortest_edge", 224))
+        width = size.get("width", height)
+        example = torch.rand(batch_size, 3, height, width).contiguous(memory_format=torch.channels_last)
+        with torch.no_grad(), self._autocast():
+            traced = torch.jit.trace(self._logits, example, check_trace=False)
+        traced = torch.jit.freeze(traced)
+
+        if path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Other workers may be loading this path: never expose a partial file
+            temporary = f"{path}.{os.getpid()}.tmp"
+            torch.jit.save(traced, temporary)
+            os.replace(temporary, path)
+        return traced
 
     def analyze_video(self, video_frames: list) -> list:
         """
@@ -36,4 +181,4 @@ class DeepfakeModel:
             results.append(result)
         # For simplicity, we can return the result of the most confident frame
         # or an average. Here we return all results.
-        return results
\ No newline at end of file
+        return results
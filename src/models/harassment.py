@@ -1,49 +1,125 @@
-from typing import List, Dict
-from transformers import pipeline
+import re
+from typing import List, Dict, Optional
+from transformers import pipeline, AutoTokenizer
+
+from src.models.quantization import load_quantized_model, read_approval
+
+SENTIMENT_MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+SENTIMENT_BATCH_SIZE = 32
+
+# High severity threats (immediate danger)
+HIGH_SEVERITY_KEYWORDS = [
+    'kill', 'murder', 'slaughter', 'assassinate', 'eliminate', 'execute',
+    'destroy', 'annihilate', 'harm', 'hurt', 'attack', 'assault', 'beat',
+    'violence', 'violent', 'threat', 'threaten', 'revenge', 'payback'
+]
+
+# Medium severity harassment
+MEDIUM_SEVERITY_KEYWORDS = [
+    'hate', 'despise', 'loathe', 'disgust', 'sick', 'pathetic', 'worthless',
+    'useless', 'failure', 'reject', 'trash', 'garbage', 'waste', 'scum'
+]
+
+# Low severity offensive language
+LOW_SEVERITY_KEYWORDS = [
+    'stupid', 'idiot', 'moron', 'dumb', 'fool', 'loser', 'freak', 'weirdo',
+    'ugly', 'fat', 'gross', 'disgusting', 'annoying', 'irritating'
+]
+
+# Profanity (context-dependent)
+PROFANITY_KEYWORDS = [
+    'fuck', 'shit', 'bitch', 'ass', 'damn', 'hell', 'bastard', 'crap'
+]
+
+
+def _keyword_pattern(keywords: List[str]) -> "re.Pattern":
+    # One whole-word alternation per category, compiled once at import
+    return re.compile(r'\b(?:' + '|'.join(re.escape(k) for k in keywords) + r')\b')
+
+
+_HIGH_PATTERN = _keyword_pattern(HIGH_SEVERITY_KEYWORDS)
+_MEDIUM_PATTERN = _keyword_pattern(MEDIUM_SEVERITY_KEYWORDS)
+_LOW_PATTERN = _keyword_pattern(LOW_SEVERITY_KEYWORDS)
+_PROFANITY_PATTERN = _keyword_pattern(PROFANITY_KEYWORDS)
+
+
+def _find_keywords(text_lower: str, keywords: List[str], pattern: "re.Pattern") -> List[str]:
+    """Keywords present in the text, each once, in keyword-list order"""
+    found = set(pattern.findall(text_lower))
+    return [keyword for keyword in keywords if keyword in found] if found else []
 
 class HarassmentDetector:
-    def __init__(self):
+    def __init__(self, quantized: bool = False, cache_dir: Optional[str] = None,
+                 model_name: str = SENTIMENT_MODEL_NAME):
         # Use keyword-based detection as primary method (more reliable)
+        self.model_name = model_name
         self.model = None
         self.model_type = "keyword"
+        self.precision = None
         print("🛡️ Using keyword-based harassment detection (most reliable method)")
         
         # Optional: Try to load a simple sentiment model as backup
         try:
             # Use a simple, reliable sentiment analysis model
-            self.model = pipeline("sentiment-analysis", 
-                                model="distilbert-base-uncased-finetuned-sst-2-english",
-                                device=-1)
+            self.model = self._load_sentiment_pipeline(quantized, cache_dir)
             self.model_type = "sentiment"
-            print("✅ Sentiment analysis model loaded as backup")
+            print(f"✅ Sentiment analysis model loaded as backup ({self.precision})")
         except Exception as e:
             print(f"⚠️ AI model not available, using keyword detection only: {e}")
             self.model = None
 
-    def analyze_text(self, text: str) -> Dict[str, float]:
-        """Analyze a single text for harassment"""
-        # Primary method: Use keyword-based detection (most reliable)
-        keyword_check = self._simple_harassment_check(text)
+    def _load_sentiment_pipeline(self, quantized: bool, cache_dir: Optional[str]):
+        """
+        Prefers the int8 model when requested, but only once the evaluation
+        script has approved it (scripts/evaluate_quantized_sentiment.py).
+        """
+        if quantized and cache_dir:
+            if read_approval(cache_dir, self.model_name) is None:
+                print("⚠️ Quantized sentiment model not approved, using fp32")
+            else:
+                model = load_quantized_model(self.model_name, cache_dir)
+                if model is not None:
+                    self.precision = "int8"
+                    return pipeline("sentiment-analysis",
+                                    model=model,
+                                    tokenizer=AutoTokenizer.from_pretrained(self.model_name),
+                                    device=-1)
+                print("⚠️ Quantized sentiment model missing or stale, using fp32")
+
+        self.precision = "fp32"
+        return pipeline("sentiment-analysis",
+                        model=self.model_name,
+                        device=-1)
+
+    def analyze_text(self, text: str, use_model: bool = True) -> Dict[str, float]:
+        """Analyze a single text for harassment (use_model=False: keywords only)"""
+        return self.detect_harassment([text], use_model)[0]
+
+    def _sentiment(self, texts: List[str]) -> List[Optional[Dict]]:
+        """One batched sentiment pass over all texts (None where unavailable)"""
+        if not (texts and self.model and self.model_type == "sentiment"):
+            return [None] * len(texts)
+        try:
+            # Over-length texts are scored on their first max-length tokens; without
+            # truncation one of them would fail the sentiment pass for the whole batch
+            return self.model(texts, batch_size=SENTIMENT_BATCH_SIZE, truncation=True)
+        except Exception as e:
+            print(f"⚠️ AI analysis failed: {e}")
+            return [None] * len(texts)
+
+    def _combine(self, keyword_check: Dict, sentiment: Optional[Dict]) -> Dict[str, float]:
         keyword_toxic = keyword_check.get('TOXIC', 0.0)
-        
-        # Secondary method: Try AI model if available
         ai_toxic = 0.0
         ai_label = "UNKNOWN"
         
-        if self.model and self.model_type == "sentiment":
-            try:
-                results = self.model(text)
-                if isinstance(results, list) and len(results) > 0:
-                    result = results[0]
-                    label = result['label'].upper()
-                    score = result['score']
-                    ai_label = label
-                    
-                    # For sentiment models, strong negative sentiment might indicate harassment
-                    if label == "NEGATIVE" and score > 0.8:
-                        ai_toxic = score * 0.6  # Scale down AI confidence
-            except Exception as e:
-                print(f"⚠️ AI analysis failed: {e}")
+        if sentiment:
+            label = sentiment['label'].upper()
+            score = sentiment['score']
+            ai_label = label
+            
+            # For sentiment models, strong negative sentiment might indicate harassment
+            if label == "NEGATIVE" and score > 0.8:
+                ai_toxic = score * 0.6  # Scale down AI confidence
         
         # Combine results - prioritize keyword detection
         final_toxic_score = max(keyword_toxic, ai_toxic)
@@ -61,59 +137,11 @@ class HarassmentDetector:
 
     def _simple_harassment_check(self, text: str) -> Dict[str, float]:
         """Enhanced keyword-based harassment detection"""
-        
-        # High severity threats (immediate danger)
-        high_severity_keywords = [
-            'kill', 'murder', 'slaughter', 'assassinate', 'eliminate', 'execute',
-            'destroy', 'annihilate', 'harm', 'hurt', 'attack', 'assault', 'beat',
-            'violence', 'violent', 'threat', 'threaten', 'revenge', 'payback'
-        ]
-        
-        # Medium severity harassment  
-        medium_severity_keywords = [
-            'hate', 'despise', 'loathe', 'disgust', 'sick', 'pathetic', 'worthless',
-            'useless', 'failure', 'reject', 'trash', 'garbage', 'waste', 'scum'
-        ]
-        
-        # Low severity offensive language
-        low_severity_keywords = [
-            'stupid', 'idiot', 'moron', 'dumb', 'fool', 'loser', 'freak', 'weirdo',
-            'ugly', 'fat', 'gross', 'disgusting', 'annoying', 'irritating'
-        ]
-        
-        # Profanity (context-dependent)
-        profanity_keywords = [
-            'fuck', 'shit', 'bitch', 'ass', 'damn', 'hell', 'bastard', 'crap'
-        ]
-        
         text_lower = text.lower().strip()
-        high_matches = []
-        medium_matches = []
-        low_matches = []
-        profanity_matches = []
-        
-        import re
-        
-        # Check each category
-        for keyword in high_severity_keywords:
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, text_lower):
-                high_matches.append(keyword)
-                
-        for keyword in medium_severity_keywords:
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, text_lower):
-                medium_matches.append(keyword)
-                
-        for keyword in low_severity_keywords:
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, text_lower):
-                low_matches.append(keyword)
-                
-        for keyword in profanity_keywords:
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, text_lower):
-                profanity_matches.append(keyword)
+        high_matches = _find_keywords(text_lower, HIGH_SEVERITY_KEYWORDS, _HIGH_PATTERN)
+        medium_matches = _find_keywords(text_lower, MEDIUM_SEVERITY_KEYWORDS, _MEDIUM_PATTERN)
+        low_matches = _find_keywords(text_lower, LOW_SEVERITY_KEYWORDS, _LOW_PATTERN)
+        profanity_matches = _find_keywords(text_lower, PROFANITY_KEYWORDS, _PROFANITY_PATTERN)
         
         # Calculate threat score based on severity
         toxic_score = 0.0
@@ -152,6 +180,8 @@ class HarassmentDetector:
                 'found_keywords': []
             }
 
-    def detect_harassment(self, texts: List[str]) -> List[Dict[str, float]]:
-        """Detect harassment in a list of texts"""
-        return [self.analyze_text(text) for text in texts]
\ No newline at end of file
+    def detect_harassment(self, texts: List[str], use_model: bool = True) -> List[Dict[str, float]]:
+        """Detect harassment in a list of texts (one batched model call)"""
+        keyword_checks = [self._simple_harassment_check(text) for text in texts]
+        sentiments = self._sentiment(texts) if use_model else [None] * len(texts)
+        return [self._combine(check, sentiment) for check, sentiment in zip(keyword_checks, sentiments)]
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import torch
+from transformers import AutoConfig, AutoModelForSequenceClassification
+
+# Artifacts live side by side in the model cache directory, one pair per model:
+#   sentiment-int8-<model>.pt             quantized state dict
+#   sentiment-int8-<model>.approval.json  evaluation report; the int8 model is only
+#                                         activated when this exists and passed
+QUANTIZED_WEIGHTS = "sentiment-int8-{model}.pt"
+APPROVAL_REPORT = "sentiment-int8-{model}.approval.json"
+
+
+def _artifact_paths(cache_dir: str, model_name: str) -> Tuple[str, str]:
+    model = hashlib.sha1(model_name.encode()).hexdigest()[:16]
+    return (os.path.join(cache_dir, QUANTIZED_WEIGHTS.format(model=model)),
+            os.path.join(cache_dir, APPROVAL_REPORT.format(model=model)))
+
+
+def _weights_fingerprint(model_name: str) -> str:
+    """
+    Identifies the exact source weights: a local directory by its files'
+    sizes and mtimes (it may be updated in place), a hub model by the
+    resolved commit.
+    """
+    if os.path.isdir(model_name):
+        entries = []
+        for name in sorted(os.listdir(model_name)):
+            stat = os.stat(os.path.join(model_name, name))
+            entries.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+        return ",".join(entries)
+    config = AutoConfig.from_pretrained(model_name)
+    return getattr(config, "_commit_hash", None) or config.to_json_string()
+
+
+def _artifact_key(model_name: str) -> str:
+    # Quantized state dicts are tied to the source weights and torch version
+    return f"{model_name}|{_weights_fingerprint(model_name)}|torch={torch.__version__}"
+
+
+def quantize_linear_layers(model: torch.nn.Module) -> torch.nn.Module:
+    """Dynamic int8 quantization of every nn.Linear (weights int8, activations fp32)."""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def build_quantized_model(model_name: str, cache_dir: str) -> torch.nn.Module:
+    """
+    Quantizes `model_name` and stores the result in cache_dir.
+    Any earlier approval is discarded: a rebuilt model must be re-evaluated.
+    """
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    quantized = quantize_linear_layers(model)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path, report = _artifact_paths(cache_dir, model_name)
+    torch.save({"key": _artifact_key(model_name), "state_dict": quantized.state_dict()}, path)
+    if os.path.exists(report):
+        os.remove(report)
+    return quantized
+
+
+def load_quantized_model(model_name: str, cache_dir: str) -> Optional[torch.nn.Module]:
+    """Loads the cached int8 model, or None if missing or built from other weights."""
+    path, _ = _artifact_paths(cache_dir, model_name)
+    if not os.path.exists(path):
+        return None
+    artifact = torch.load(path, map_location="cpu", weights_only=False)
+    if artifact.get("key") != _artifact_key(model_name):
+        return None
+
+    # Rebuild the quantized module structure, then restore the int8 weights;
+    # from_config skips loading the fp32 weights altogether
+    config = AutoConfig.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_config(config).eval()
+    quantized = quantize_linear_layers(model)
+    quantized.load_state_dict(artifact["state_dict"])
+    return quantized
+
+
+def write_approval(cache_dir: str, model_name: str, report: Dict[str, Any]) -> None:
+    report = dict(report, key=_artifact_key(model_name))
+    with open(_artifact_paths(cache_dir, model_name)[1], "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def read_approval(cache_dir: str, model_name: str) -> Optional[Dict[str, Any]]:
+    """The evaluation report, if one exists for these weights and it passed."""
+    _, path = _artifact_paths(cache_dir, model_name)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        report = json.load(f)
+    if report.get("key") != _artifact_key(model_name) or not report.get("approved"):
+        return None
+    return report
@@ -0,0 +1,114 @@
+# src/services/admission.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.config import settings
+
+
+class TokenBucketTable:
+    """
+    One token bucket per key: `rate` tokens per second up to `burst`.
+    Each entry is just (tokens, updated_at). A bucket that has refilled
+    completely is indistinguishable from a new one, so prune() drops those;
+    beyond `max_entries` the least recently used keys go first.
+    """
+
+    def __init__(self, rate: float, burst: float, max_entries: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_entries = max_entries
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _tokens(self, key: str, now: float) -> float:
+        entry = self._buckets.get(key)
+        if entry is None:
+            return self.burst
+        tokens, updated_at = entry
+        return min(self.burst, tokens + (now - updated_at) * self.rate)
+
+    def wait_time(self, key: str, cost: float, now: float) -> float:
+        """Seconds until `cost` tokens are available (0 if they are now)."""
+        missing = min(cost, self.burst) - self._tokens(key, now)
+        return max(0.0, missing / self.rate)
+
+    def consume(self, key: str, cost: float, now: float) -> None:
+        self._buckets[key] = (self._tokens(key, now) - min(cost, self.burst), now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_entries:
+            self._buckets.popitem(last=False)
+
+    def prune(self, now: float) -> None:
+        full = [key for key, (tokens, updated_at) in self._buckets.items()
+                if tokens + (now - updated_at) * self.rate >= self.burst]
+        for key in full:
+            del self._buckets[key]
+
+
+class AdmissionController:
+    """
+    Per-device and per-user admission for the mobile ingest routes. A request
+    costs one token per notification; it is admitted only if both its
+    device's and its user's buckets can pay, and then both are charged.
+    """
+
+    def __init__(
+        self,
+        device_rate: float,
+        device_burst: float,
+        user_rate: float,
+        user_burst: float,
+        max_entries: int,
+        prune_interval: float,
+    ):
+        self.devices = TokenBucketTable(device_rate, device_burst, max_entries)
+        self.users = TokenBucketTable(user_rate, user_burst, max_entries)
+        self.prune_interval = prune_interval
+        self._pruned_at = time.monotonic()
+        self._counts: Dict[str, int] = {"admitted": 0, "throttled_device": 0, "throttled_user": 0, "too_large": 0}
+        self._lock = threading.Lock()
+
+    def admit(self, device_id: Optional[str], user: str, cost: int = 1, now: Optional[float] = None) -> float:
+        """Charges the request and returns 0, or returns the seconds to wait before retrying."""
+        now = time.monotonic() if now is None else now
+        checks: List[Tuple[str, TokenBucketTable, str]] = [("throttled_user", self.users, user)]
+        if device_id:
+            checks.insert(0, ("throttled_device", self.devices, device_id))
+        with self._lock:
+            if now - self._pruned_at >= self.prune_interval:
+                self.devices.prune(now)
+                self.users.prune(now)
+                self._pruned_at = now
+            waits = [(table.wait_time(key, cost, now), counter) for counter, table, key in checks]
+            wait, counter = max(waits)
+            if wait > 0:
+                self._counts[counter] += 1
+                return wait
+            for _, table, key in checks:
+                table.consume(key, cost, now)
+            self._counts["admitted"] += 1
+            return 0.0
+
+    def count_too_large(self) -> None:
+        with self._lock:
+            self._counts["too_large"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._counts, tracked_devices=len(self.devices), tracked_users=len(self.users))
+
+
+# One per worker process
+admission_controller = AdmissionController(
+    device_rate=settings.ADMISSION_DEVICE_RATE,
+    device_burst=settings.ADMISSION_DEVICE_BURST,
+    user_rate=settings.ADMISSION_USER_RATE,
+    user_burst=settings.ADMISSION_USER_BURST,
+    max_entries=settings.ADMISSION_TABLE_SIZE,
+    prune_interval=settings.ADMISSION_PRUNE_SECONDS,
+)
@@ -0,0 +1,218 @@
+# src/services/analytics.py
+# Scan analytics shared by all workers of the v3 server (main.py).
+
+import asyncio
+import os
+import sqlite3
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from src.utils.logging import logger
+
+ANALYTICS_DB = os.getenv("ANALYTICS_DB", "analytics.db")
+ANALYTICS_FLUSH_SECONDS = float(os.getenv("ANALYTICS_FLUSH_SECONDS", "5"))
+# Recent scans kept per worker between flushes, and in the store overall
+ANALYTICS_RECENT_SIZE = int(os.getenv("ANALYTICS_RECENT_SIZE", "100"))
+# How long rollups are kept, per bucket
+ROLLUP_RETENTION = {"minute": 2 * 24 * 3600, "hour": 90 * 24 * 3600}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    scans INTEGER NOT NULL,
+    threats INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    bucket TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    scans INTEGER NOT NULL,
+    threats INTEGER NOT NULL,
+    PRIMARY KEY (bucket, start)
+);
+CREATE TABLE IF NOT EXISTS recent_scans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    is_harassment INTEGER NOT NULL,
+    severity TEXT,
+    threat_level TEXT,
+    source TEXT
+);
+"""
+
+
+class AnalyticsStore:
+    """
+    SQLite (WAL) store of precomputed aggregates: running totals, per-minute
+    and per-hour rollups and the most recent scans. Every worker flushes
+    into the same file, so reads see all of them.
+    """
+
+    def __init__(self, path: str, recent_size: int):
+        self.path = path
+        self.recent_size = recent_size
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        if not self._initialized:
+            # Created on first use, so importing the module touches no files
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def apply(self, minutes: Dict[int, List[int]], recent: List[Tuple]) -> None:
+        """Adds one worker's deltas ({minute start: [scans, threats]}) in a single transaction."""
+        hours: Dict[int, List[int]] = {}
+        for start, (scans, threats) in minutes.items():
+            hour = hours.setdefault(start - start % 3600, [0, 0])
+            hour[0] += scans
+            hour[1] += threats
+        scans = sum(counts[0] for counts in minutes.values())
+        threats = sum(counts[1] for counts in minutes.values())
+        now = time.time()
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO totals (id, scans, threats) VALUES (1, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET scans = scans + excluded.scans, threats = threats + excluded.threats",
+                    (scans, threats),
+                )
+                for bucket, rows in (("minute", minutes), ("hour", hours)):
+                    conn.executemany(
+                        "INSERT INTO rollups (bucket, start, scans, threats) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(bucket, start) DO UPDATE SET "
+                        "scans = scans + excluded.scans, threats = threats + excluded.threats",
+                        [(bucket, start, s, t) for start, (s, t) in rows.items()],
+                    )
+                    conn.execute("DELETE FROM rollups WHERE bucket = ? AND start < ?",
+                                 (bucket, now - ROLLUP_RETENTION[bucket]))
+                if recent:
+                    conn.executemany(
+                        "INSERT INTO recent_scans (ts, is_harassment, severity, threat_level, source) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        recent,
+                    )
+                    conn.execute("DELETE FROM recent_scans WHERE id <= (SELECT MAX(id) FROM recent_scans) - ?",
+                                 (self.recent_size,))
+        finally:
+            conn.close()
+
+    def overview(self, recent_limit: int = 10) -> Dict[str, Any]:
+        """Reads the precomputed aggregates; cost does not grow with traffic."""
+        now = int(time.time())
+        conn = self._connect()
+        try:
+            totals = conn.execute("SELECT scans, threats FROM totals WHERE id = 1").fetchone() or (0, 0)
+            current = {
+                bucket: conn.execute(
+                    "SELECT scans, threats FROM rollups WHERE bucket = ? AND start = ?",
+                    (bucket, now - now % size),
+                ).fetchone() or (0, 0)
+                for bucket, size in (("minute", 60), ("hour", 3600))
+            }
+            recent = conn.execute(
+                "SELECT ts, is_harassment, severity, threat_level, source FROM recent_scans "
+                "ORDER BY id DESC LIMIT ?",
+                (recent_limit,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return {"totals": totals, "current": current, "recent": recent}
+
+
+class ScanAnalytics:
+    """
+    Per-worker side of the analytics. record() runs on the event loop and
+    only bumps plain counters and a bounded ring buffer (no locks, no I/O);
+    a background task periodically hands the deltas to the AnalyticsStore.
+    """
+
+    def __init__(self, store: AnalyticsStore, flush_seconds: float, recent_size: int):
+        self.store = store
+        self.flush_seconds = flush_seconds
+        self._minutes: Dict[int, List[int]] = {}  # minute start -> [scans, threats]
+        self._recent: Deque[Tuple] = deque(maxlen=recent_size)
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, is_harassment: bool, severity: str, threat_level: str, source: str) -> None:
+        now = time.time()
+        counts = self._minutes.setdefault(int(now) - int(now) % 60, [0, 0])
+        counts[0] += 1
+        counts[1] += int(is_harassment)
+        self._recent.append((now, int(is_harassment), severity, threat_level, source))
+
+    async def flush(self) -> None:
+        # Swap the buffers on the loop thread, write them on a worker thread
+        minutes, self._minutes = self._minutes, {}
+        recent = list(self._recent)
+        self._recent.clear()
+        if not minutes:
+            return
+        try:
+            await asyncio.to_thread(self.store.apply, minutes, recent)
+        except Exception as e:
+            logger.warning("Analytics flush failed, retrying next interval: %s", e)
+            for start, (scans, threats) in minutes.items():
+                counts = self._minutes.setdefault(start, [0, 0])
+                counts[0] += scans
+                counts[1] += threats
+            self._recent.extendleft(reversed(recent))
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def overview(self) -> Dict[str, Any]:
+        """
+        All workers' flushed aggregates, plus this worker's not yet flushed
+        counts (at most `flush_seconds` old).
+        """
+        stored = await asyncio.to_thread(self.store.overview)
+        scans, threats = stored["totals"]
+        scans += sum(counts[0] for counts in self._minutes.values())
+        threats += sum(counts[1] for counts in self._minutes.values())
+
+        recent = sorted(list(self._recent) + stored["recent"], key=lambda scan: scan[0], reverse=True)[:10]
+        return {
+            "total_scans": scans,
+            "threats_detected": threats,
+            "threats_blocked": threats,
+            "safe_messages": scans - threats,
+            "current_minute": dict(zip(("scans", "threats"), stored["current"]["minute"])),
+            "current_hour": dict(zip(("scans", "threats"), stored["current"]["hour"])),
+            "recent_activity": [
+                {
+                    "timestamp": datetime.fromtimestamp(ts, timezone.utc).isoformat(),
+                    "is_harassment": bool(is_harassment),
+                    "severity": severity,
+                    "threat_level": threat_level,
+                    "source": source,
+                }
+                for ts, is_harassment, severity, threat_level, source in recent
+            ],
+        }
+
+
+# One per worker process, all sharing ANALYTICS_DB
+scan_analytics = ScanAnalytics(
+    AnalyticsStore(ANALYTICS_DB, ANALYTICS_RECENT_SIZE),
+    flush_seconds=ANALYTICS_FLUSH_SECONDS,
+    recent_size=ANALYTICS_RECENT_SIZE,
+)
@@ -0,0 +1,100 @@
+# src/services/conversation.py
+
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+from src.core.config import settings
+
+# Per-message scores are capped so one message can't make a thread certain
+_MAX_MESSAGE_SCORE = 0.95
+
+ThreadKey = Tuple[str, str, str]  # (device_id, sender, app_name)
+
+
+class _ThreadState:
+    __slots__ = ("log_safe", "messages", "last_seen", "keywords")
+
+    def __init__(self, keyword_window: int):
+        self.log_safe = 0.0  # decayed sum of log(1 - message score)
+        self.messages = 0
+        self.last_seen = 0.0
+        self.keywords: Deque[str] = deque(maxlen=keyword_window)
+
+
+class ConversationTracker:
+    """
+    Thread-level harassment score per (device_id, sender, app_name), updated
+    in O(1) per message instead of rescoring the conversation.
+
+    The thread score is a noisy-or over the thread's messages with older
+    messages fading by `decay` per new message:
+
+        log_safe = decay * log_safe + log(1 - message_score)
+        thread_score = 1 - exp(log_safe)
+
+    so several mildly hostile messages add up, while benign ones let it
+    fade. State is a few numbers plus the last `keyword_window` keyword
+    hits per thread; at most `max_threads` are kept, least recently active
+    first out, and threads idle for `idle_seconds` are dropped.
+    Not thread-safe: used from the event loop only.
+    """
+
+    def __init__(self, max_threads: int, idle_seconds: float, decay: float, keyword_window: int):
+        self.max_threads = max_threads
+        self.idle_seconds = idle_seconds
+        self.decay = decay
+        self.keyword_window = keyword_window
+        self._threads: "OrderedDict[ThreadKey, _ThreadState]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._threads)
+
+    def update(
+        self,
+        key: ThreadKey,
+        message_score: float,
+        keywords: Iterable[str] = (),
+        now: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        now = time.monotonic() if now is None else now
+        self._evict_idle(now)
+
+        state = self._threads.get(key)
+        if state is None:
+            state = self._threads[key] = _ThreadState(self.keyword_window)
+            if len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+        else:
+            self._threads.move_to_end(key)
+
+        score = min(max(message_score, 0.0), _MAX_MESSAGE_SCORE)
+        state.log_safe = self.decay * state.log_safe + math.log1p(-score)
+        state.messages += 1
+        state.last_seen = now
+        state.keywords.extend(keywords)
+
+        return {
+            "message_score": message_score,
+            "thread_score": 1.0 - math.exp(state.log_safe),
+            "thread_messages": state.messages,
+            "thread_keywords": sorted(set(state.keywords)),
+        }
+
+    def _evict_idle(self, now: float) -> None:
+        # Threads are kept in last-activity order, so idle ones are at the front
+        while self._threads:
+            key, state = next(iter(self._threads.items()))
+            if now - state.last_seen < self.idle_seconds:
+                break
+            del self._threads[key]
+
+
+# One per worker process
+conversation_tracker = ConversationTracker(
+    max_threads=settings.CONVERSATION_MAX_THREADS,
+    idle_seconds=settings.CONVERSATION_IDLE_SECONDS,
+    decay=settings.CONVERSATION_DECAY,
+    keyword_window=settings.CONVERSATION_KEYWORD_WINDOW,
+)
@@ -0,0 +1,117 @@
+# src/services/deadline.py
+
+import asyncio
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from fastapi import HTTPException
+
+
+class DeadlineExceeded(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=504, detail="Request deadline exceeded")
+
+
+class RequestCancelled(HTTPException):
+    def __init__(self):
+        # 499: the client closed the request; nobody reads this response
+        super().__init__(status_code=499, detail="Client closed request")
+
+
+class Deadline:
+    """
+    When the work for one request stops being useful: at `timeout_seconds`
+    from now, or as soon as cancel() is called (the client went away).
+    done() is a plain read, safe from inference threads between frame batches.
+    """
+
+    def __init__(self, timeout_seconds: Optional[float]):
+        self.expires_at = time.monotonic() + timeout_seconds if timeout_seconds is not None else None
+        self.cancelled = False
+        self._cancel_event: Optional[asyncio.Event] = None
+
+    def remaining(self) -> Optional[float]:
+        return None if self.expires_at is None else max(0.0, self.expires_at - time.monotonic())
+
+    def done(self) -> bool:
+        return self.cancelled or (self.expires_at is not None and time.monotonic() >= self.expires_at)
+
+    def error(self) -> HTTPException:
+        return RequestCancelled() if self.cancelled else DeadlineExceeded()
+
+    def check(self) -> None:
+        if self.done():
+            raise self.error()
+
+    def cancel(self) -> None:
+        """Called on the event loop when the client disconnects."""
+        self.cancelled = True
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+
+    async def wait(self, future: "asyncio.Future[Any]") -> Any:
+        """
+        Awaits `future` until the deadline. On expiry or cancellation the
+        future is cancelled, so work still queued behind it is dropped, and
+        DeadlineExceeded / RequestCancelled is raised.
+        """
+        if self._cancel_event is None:
+            self._cancel_event = asyncio.Event()
+            if self.cancelled:
+                self._cancel_event.set()
+        cancelled = asyncio.ensure_future(self._cancel_event.wait())
+        try:
+            done, _ = await asyncio.wait({future, cancelled}, timeout=self.remaining(),
+                                         return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        finally:
+            cancelled.cancel()
+        if future in done:
+            return future.result()
+        future.cancel()
+        raise self.error()
+
+
+class DeadlineStats:
+    """Counts work that deadlines and disconnects saved. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys((
+            "requests_with_deadline", "deadline_exceeded", "client_disconnects",
+            "dropped_queued", "aborted_running", "frames_skipped",
+        ), 0)
+
+    def add(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+# The deadline of the request being handled in this task (None: no deadline)
+_current: contextvars.ContextVar = contextvars.ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+@contextmanager
+def request_deadline(deadline: Optional[Deadline]) -> Iterator[None]:
+    token = _current.set(deadline)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+# One per worker process
+deadline_stats = DeadlineStats()
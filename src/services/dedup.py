@@ -0,0 +1,105 @@
+# src/services/dedup.py
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from src.core.config import settings
+from src.utils.bloom import RotatingBloomFilter
+
+
+def notification_key(device_id: str, timestamp: datetime, sender: str, app_name: str, text: str) -> bytes:
+    """Idempotency key: (device_id, timestamp, hash of the notification content)."""
+    content = hashlib.blake2b("\x00".join((sender, app_name, text)).encode(), digest_size=16).digest()
+    return hashlib.blake2b(
+        b"\x00".join((device_id.encode(), timestamp.isoformat().encode(), content)), digest_size=16
+    ).digest()
+
+
+class NotificationDeduplicator:
+    """
+    Remembers the alert sent for each notification for `window_seconds`, so
+    redelivered copies get the original alert back instead of being scored
+    again.
+
+    A rotating Bloom filter answers "never seen" for fresh notifications (the
+    common case) in constant memory; only on a "maybe" is the exact LRU of
+    recent alerts consulted. The LRU bounds what can be answered (the last
+    `lru_size` alerts), so each Bloom generation is sized to it: it then
+    covers every key the LRU still holds, and a "maybe" falls through only
+    on a false positive or an expired entry. A copy that arrives while the original is still
+    being scored waits for it (see claim()). Used from the event loop only.
+    """
+
+    def __init__(self, window_seconds: float, error_rate: float, lru_size: int):
+        self.window_seconds = window_seconds
+        self.lru_size = lru_size
+        self._seen = RotatingBloomFilter(lru_size, error_rate, window_seconds)
+        self._alerts: "OrderedDict[bytes, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[bytes, asyncio.Future] = {}
+        self.duplicates = 0
+
+    def get(self, key: bytes, now: Optional[float] = None) -> Optional[Any]:
+        """The alert already sent for this key, if it is within the window."""
+        now = time.monotonic() if now is None else now
+        if not self._seen.contains(key, now):
+            return None
+        entry = self._alerts.get(key)
+        if entry is None or now - entry[1] > self.window_seconds:
+            return None  # Bloom false positive, or no longer in the LRU
+        self._alerts.move_to_end(key)
+        self.duplicates += 1
+        return entry[0]
+
+    def put(self, key: bytes, alert: Any, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        self._seen.add(key, now)
+        self._alerts[key] = (alert, now)
+        self._alerts.move_to_end(key)
+        while len(self._alerts) > self.lru_size:
+            self._alerts.popitem(last=False)
+
+    def claim(self, key: bytes) -> Optional[asyncio.Future]:
+        """
+        Registers the caller as the one scoring `key`. Returns None if it now
+        owns the key (it must then call complete() or release()), or the
+        future of the copy already being scored, to await instead.
+        """
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.duplicates += 1
+            return pending
+        self._inflight[key] = asyncio.get_running_loop().create_future()
+        return None
+
+    def complete(self, key: bytes, alert: Any) -> None:
+        self.put(key, alert)
+        pending = self._inflight.pop(key, None)
+        if pending is not None and not pending.done():
+            pending.set_result(alert)
+
+    def release(self, key: bytes, error: BaseException) -> None:
+        """Gives up a claim; copies waiting on it fail the same way."""
+        pending = self._inflight.pop(key, None)
+        if pending is not None and not pending.done():
+            pending.set_exception(error)
+            pending.exception()  # retrieved here, so an unawaited future doesn't warn
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "duplicates": self.duplicates,
+            "remembered_alerts": len(self._alerts),
+            "inflight": len(self._inflight),
+            "bloom_bytes": self._seen.memory_bytes,
+        }
+
+
+# One per worker process
+notification_dedup = NotificationDeduplicator(
+    window_seconds=settings.DEDUP_WINDOW_SECONDS,
+    error_rate=settings.DEDUP_BLOOM_ERROR_RATE,
+    lru_size=settings.DEDUP_LRU_SIZE,
+)
@@ -1,96 +1,405 @@
 # src/services/detection.py
 
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from fastapi import HTTPException
-from typing import Dict, Any, Union
-from PIL import Image
+from typing import Dict, Any, List, Union, Callable, Optional, Tuple
+from PIL import Image, UnidentifiedImageError
+from src.core.config import settings
 from src.models.deepfake import DeepfakeModel
 from src.models.harassment import HarassmentDetector
+from src.services.deadline import current_deadline, deadline_stats
+from src.services.model_registry import model_registry
+from src.services.overload import ServiceMode, note_request_mode, overload_controller
+from src.services.scheduler import Priority, scheduler
+from src.utils.preprocessing import extract_video_frames
 import io
 
-# You would need a library like OpenCV to handle video frames
-# import cv2
-# import numpy as np
+# Frames per forward pass when analysing video
+VIDEO_FRAME_BATCH = 8
+
+# progress(frames_done, frames_total), called from the inference thread
+ProgressCallback = Callable[[int, int], None]
+
+
+class MediaResultCache:
+    """Small LRU of full-quality media results, keyed by model version and content hash."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+def _compare_deepfake(current: List[Dict[str, Any]], candidate: List[Dict[str, Any]]) -> Tuple[int, int, float]:
+    agreeing = sum(a["prediction"] == b["prediction"] for a, b in zip(current, candidate))
+    return len(current), agreeing, sum(abs(a["score"] - b["score"]) for a, b in zip(current, candidate))
+
+
+def _compare_harassment(current: List[Dict[str, Any]], candidate: List[Dict[str, Any]]) -> Tuple[int, int, float]:
+    agreeing = sum((a["TOXIC"] > 0.5) == (b["TOXIC"] > 0.5) for a, b in zip(current, candidate))
+    return len(current), agreeing, sum(abs(a["TOXIC"] - b["TOXIC"]) for a, b in zip(current, candidate))
+
 
 class DetectionService:
     def __init__(self):
-        # The model name is now updated to a valid one.
-        # Change this line for testing purposes
-        self.deepfake_model = DeepfakeModel(model_name="google/vit-base-patch16-224")
+        # Models are looked up per call: the registry may swap in new versions
+        model_registry.register("deepfake", settings.DEEPFAKE_MODEL_PATH, self._load_deepfake,
+                                self._warm_up_deepfake, _compare_deepfake)
+        model_registry.register("harassment", settings.HARASSMENT_MODEL_PATH, self._load_harassment,
+                                self._warm_up_harassment, _compare_harassment)
+        self.media_cache = MediaResultCache(settings.MEDIA_CACHE_SIZE)
+
+    @staticmethod
+    def _load_deepfake(name: str) -> DeepfakeModel:
+        return DeepfakeModel(
+            model_name=name,
+            optimized=settings.DEEPFAKE_OPTIMIZED,
+            bf16=settings.DEEPFAKE_BF16,
+            compile_mode=settings.DEEPFAKE_COMPILE_MODE,
+            cache_dir=settings.MODEL_CACHE_DIR,
+        )
+
+    @staticmethod
+    def _warm_up_deepfake(model: DeepfakeModel) -> None:
+        # The batch sizes served: single images and full video frame batches
+        blank = Image.new("RGB", (224, 224))
+        for batch_size in (1, VIDEO_FRAME_BATCH):
+            model.analyze_images([blank] * batch_size)
+
+    @staticmethod
+    def _load_harassment(name: str) -> HarassmentDetector:
+        detector = HarassmentDetector(
+            quantized=settings.HARASSMENT_QUANTIZED,
+            cache_dir=settings.MODEL_CACHE_DIR,
+            model_name=name,
+        )
+        # The configured model may fall back to keywords (e.g. offline start); a rollout may not
+        if detector.model is None and name != settings.HARASSMENT_MODEL_PATH:
+            raise RuntimeError(f"sentiment model {name} did not load")
+        return detector
+
+    @staticmethod
+    def _warm_up_harassment(model: HarassmentDetector) -> None:
+        model.detect_harassment(["warm up"])
 
-        self.harassment_model = HarassmentDetector()
+    @staticmethod
+    def _deepfake_images(model: DeepfakeModel, images: List[Image.Image]) -> List[Dict[str, Any]]:
+        """model.analyze_images, also sampled for the shadow candidate if one is installed."""
+        started = time.perf_counter()
+        results = model.analyze_images(images)
+        model_registry.shadow("deepfake", lambda candidate: candidate.analyze_images(images), results,
+                              (time.perf_counter() - started) * 1000)
+        return results
 
     def analyze_image(self, image: Image.Image) -> Dict[str, Any]:
         try:
-            # Corrected method call
-            deepfake_result = self.deepfake_model.analyze_image(image)
+            with model_registry.lease("deepfake") as model:
+                deepfake_result = self._deepfake_images(model, [image])[0]
             return {"deepfake": deepfake_result, "harassment": None}
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error analyzing image: {str(e)}")
 
-    def analyze_video(self, video_bytes: bytes) -> Dict[str, Any]:
-        # NOTE: Real video analysis requires extracting frames first.
-        # This is a placeholder showing how it would work if you had frames.
-        # For a real implementation, you'd use a library like OpenCV here.
+    def analyze_video(self, video_bytes: bytes, max_frames: int = settings.VIDEO_MAX_FRAMES,
+                      progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        frames = extract_video_frames(video_bytes, max_frames)
+        if not frames:
+            raise HTTPException(status_code=400, detail="Unsupported or unreadable media file")
+        deadline = current_deadline()
         try:
-            deepfake_result = {"status": "Video analysis not fully implemented."}
+            frame_results = []
+            # One model version for every frame of the video
+            with model_registry.lease("deepfake") as model:
+                for start in range(0, len(frames), VIDEO_FRAME_BATCH):
+                    if deadline is not None and deadline.done():
+                        # Nobody will read the result: skip the remaining frames
+                        deadline_stats.add("aborted_running")
+                        deadline_stats.add("frames_skipped", len(frames) - start)
+                        raise deadline.error()
+                    if progress is not None:
+                        progress(len(frame_results), len(frames))
+                    frame_results.extend(self._deepfake_images(model, frames[start:start + VIDEO_FRAME_BATCH]))
+            if progress is not None:
+                progress(len(frame_results), len(frames))
+            # Report the most confident frame, keeping every frame for the caller
+            top = max(frame_results, key=lambda r: r["score"])
+            deepfake_result = {
+                "prediction": top["prediction"],
+                "score": top["score"],
+                "frames_analyzed": len(frame_results),
+                "frames": frame_results,
+            }
             return {"deepfake": deepfake_result, "harassment": None}
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error analyzing video: {str(e)}")
 
-    def analyze_text(self, text: str) -> Dict[str, Any]:
+    @staticmethod
+    def _media_key(content: bytes) -> str:
+        # Results of a replaced model version are never served again
+        return f"{model_registry.current_name('deepfake')}:{hashlib.sha256(content).hexdigest()}"
+
+    def analyze_media(self, content: bytes, mode: ServiceMode,
+                      progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Image or video bytes, answered from the result cache when possible.
+        In cached_only mode a cache miss is deferred instead of analysed.
+        `progress` is told about frames as they are analysed (an image is one).
+        """
+        key = self._media_key(content)
+        cached = self.media_cache.get(key)
+        if cached is not None:
+            return dict(cached, cached=True)
+        if mode == ServiceMode.CACHED_ONLY:
+            return {
+                "deepfake": {"status": "deferred", "detail": "Service is overloaded, please re-scan later"},
+                "harassment": None,
+            }
+
+        try:
+            image = Image.open(io.BytesIO(content))
+        except UnidentifiedImageError:
+            image = None
+        if image is not None:
+            result = self.analyze_image(image)
+            if progress is not None:
+                progress(1, 1)
+        elif mode == ServiceMode.DEGRADED:
+            result = self.analyze_video(content, settings.VIDEO_DEGRADED_MAX_FRAMES, progress)
+        else:
+            result = self.analyze_video(content, progress=progress)
+
+        if mode == ServiceMode.FULL:
+            self.media_cache.put(key, result)
+        return result
+
+    def analyze_media_batch(self, contents: List[bytes], mode: ServiceMode) -> List[Any]:
+        """
+        analyze_media for many items: uncached images share forward passes,
+        and a failing item yields its exception instead of failing the rest.
+        """
+        if mode == ServiceMode.CACHED_ONLY:
+            return [self.analyze_media(content, mode) for content in contents]
+
+        results: List[Any] = [None] * len(contents)
+        pending = []  # (index, cache key, image) awaiting a batched forward pass
+        for index, content in enumerate(contents):
+            key = self._media_key(content)
+            cached = self.media_cache.get(key)
+            if cached is not None:
+                results[index] = dict(cached, cached=True)
+                continue
+            try:
+                pending.append((index, key, Image.open(io.BytesIO(content))))
+            except UnidentifiedImageError:
+                # Not an image: let analyze_media treat it as video
+                try:
+                    results[index] = self.analyze_media(content, mode)
+                except Exception as e:
+                    results[index] = e
+
+        deadline = current_deadline()
+        for start in range(0, len(pending), VIDEO_FRAME_BATCH):
+            chunk = pending[start:start + VIDEO_FRAME_BATCH]
+            if deadline is not None and deadline.done():
+                deadline_stats.add("aborted_running")
+                deadline_stats.add("frames_skipped", len(pending) - start)
+                for index, _, _ in pending[start:]:
+                    results[index] = deadline.error()
+                break
+            try:
+                with model_registry.lease("deepfake") as model:
+                    predictions = self._deepfake_images(model, [image for _, _, image in chunk])
+            except Exception as e:
+                for index, _, _ in chunk:
+                    results[index] = e
+                continue
+            for (index, key, _), prediction in zip(chunk, predictions):
+                results[index] = {"deepfake": prediction, "harassment": None}
+                if mode == ServiceMode.FULL:
+                    self.media_cache.put(key, results[index])
+        return results
+
+    def analyze_text(self, text: str, keyword_only: bool = False) -> Dict[str, Any]:
+        return self.analyze_texts([text], keyword_only)[0]
+
+    def analyze_texts(self, texts: List[str], keyword_only: bool = False) -> List[Dict[str, Any]]:
         try:
-            # detect_harassment returns a list, so we take the first result
-            harassment_results = self.harassment_model.detect_harassment([text])
-            harassment_result = harassment_results[0] if harassment_results else {}
-            
-            # Convert the model output to our expected format
-            if isinstance(harassment_result, dict):
-                # Check if this looks like harassment based on toxic-bert output
-                toxic_score = harassment_result.get('TOXIC', 0.0)
-                is_harassment = toxic_score > 0.5
-                confidence = toxic_score if is_harassment else (1.0 - toxic_score)
-                
-                formatted_result = {
-                    'is_harassment': is_harassment,
-                    'confidence': confidence,
-                    'raw_scores': harassment_result,
-                    'categories': ['toxic'] if is_harassment else ['safe']
-                }
-            else:
-                # Fallback format
-                formatted_result = {
-                    'is_harassment': False,
-                    'confidence': 0.0,
-                    'raw_scores': harassment_result,
-                    'categories': ['unknown']
-                }
-            
-            return {"deepfake": None, "harassment": formatted_result}
+            with model_registry.lease("harassment") as model:
+                started = time.perf_counter()
+                harassment_results = model.detect_harassment(texts, use_model=not keyword_only)
+                if not keyword_only:
+                    model_registry.shadow("harassment", lambda candidate: candidate.detect_harassment(texts),
+                                          harassment_results, (time.perf_counter() - started) * 1000)
+            return [
+                {"deepfake": None, "harassment": self._format_harassment(result)}
+                for result in harassment_results
+            ]
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error analyzing text: {str(e)}")
 
+    @staticmethod
+    def _format_harassment(harassment_result: Any) -> Dict[str, Any]:
+        # Convert the model output to our expected format
+        if isinstance(harassment_result, dict):
+            # Check if this looks like harassment based on toxic-bert output
+            toxic_score = harassment_result.get('TOXIC', 0.0)
+            is_harassment = toxic_score > 0.5
+            confidence = toxic_score if is_harassment else (1.0 - toxic_score)
+
+            return {
+                'is_harassment': is_harassment,
+                'confidence': confidence,
+                'raw_scores': harassment_result,
+                'categories': ['toxic'] if is_harassment else ['safe']
+            }
+        # Fallback format
+        return {
+            'is_harassment': False,
+            'confidence': 0.0,
+            'raw_scores': harassment_result,
+            'categories': ['unknown']
+        }
+
 
 # Instantiate service once
 _service = DetectionService()
 
 
+# Model calls run on the scheduler's threads so they never block the event
+# loop; jobs waiting there are the inference queue the overload controller watches.
+async def _run_inference(work: Callable[[ServiceMode], Any], priority: Priority) -> Tuple[ServiceMode, Any]:
+    """
+    Runs work(mode) in the given lane; returns (mode, result). Under a
+    request deadline the wait is cut short when it passes or the client
+    disconnects, and the job is dropped if it hasn't started.
+    """
+    mode = overload_controller.enter()
+    note_request_mode(mode)
+    queued_at = time.perf_counter()
+    started_at: List[float] = []
+    deadline = current_deadline()
+
+    def job() -> Any:
+        started_at.append(time.perf_counter())
+        return work(mode)
+
+    try:
+        future = asyncio.wrap_future(scheduler.submit(job, priority, deadline))
+        result = await (future if deadline is None else deadline.wait(future))
+    finally:
+        # Queue wait measures congestion; how long the work itself takes
+        # depends on what it is (one text vs. a whole video)
+        waited = (started_at[0] if started_at else time.perf_counter()) - queued_at
+        overload_controller.exit(waited * 1000)
+    return mode, result
+
+
 # Async wrappers for your routes.py
-async def detect_deepfake(file: Union[str, bytes]) -> Dict[str, Any]:
+async def detect_deepfake(file: Union[str, bytes], priority: Priority = Priority.INTERACTIVE,
+                          progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
     try:
         if isinstance(file, bytes):
-            image = Image.open(io.BytesIO(file))
-            return _service.analyze_image(image)
+            content = file
         elif isinstance(file, str):
-            image = Image.open(file)
-            return _service.analyze_image(image)
+            with open(file, "rb") as f:
+                content = f.read()
         else:
             raise HTTPException(status_code=400, detail="Unsupported file format")
+        mode, result = await _run_inference(lambda mode: _service.analyze_media(content, mode, progress), priority)
+        return dict(result, service_mode=mode.value)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Deepfake detection error: {str(e)}")
 
 
-async def detect_harassment(text: str) -> Dict[str, Any]:
+async def detect_deepfake_batch(files: List[str], priority: Priority = Priority.BULK) -> List[Any]:
+    """
+    Deepfake analysis for many files as BULK_CHUNK_SIZE-sized jobs. Each
+    entry is a result dict or the exception that item failed with.
+    """
+    results: List[Any] = [None] * len(files)
+    contents = []  # (index, bytes) of files that could be read
+    for index, path in enumerate(files):
+        try:
+            with open(path, "rb") as f:
+                contents.append((index, f.read()))
+        except OSError as e:
+            results[index] = HTTPException(status_code=400, detail=f"Cannot read file: {e}")
+
+    size = max(1, settings.BULK_CHUNK_SIZE)
+    chunks = [contents[start:start + size] for start in range(0, len(contents), size)]
+    scored = await asyncio.gather(*[
+        _run_inference(
+            lambda mode, chunk=chunk: _service.analyze_media_batch([content for _, content in chunk], mode),
+            priority,
+        )
+        for chunk in chunks
+    ], return_exceptions=True)
+
+    for chunk, outcome in zip(chunks, scored):
+        if isinstance(outcome, BaseException):
+            for index, _ in chunk:
+                results[index] = outcome
+            continue
+        mode, chunk_results = outcome
+        for (index, _), result in zip(chunk, chunk_results):
+            results[index] = result if isinstance(result, BaseException) else dict(result, service_mode=mode.value)
+    return results
+
+
+async def detect_harassment(text: str, priority: Priority = Priority.INTERACTIVE) -> Dict[str, Any]:
     try:
-        return _service.analyze_text(text)
+        mode, result = await _run_inference(
+            lambda mode: _service.analyze_text(text, keyword_only=mode != ServiceMode.FULL), priority
+        )
+        return dict(result, service_mode=mode.value)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Harassment detection error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Harassment detection error: {str(e)}")
+
+
+async def detect_harassment_batch(texts: List[str], priority: Priority = Priority.BULK) -> List[Any]:
+    """
+    Scores many texts as BULK_CHUNK_SIZE-sized jobs, so interactive work can
+    be scheduled between chunks. Results keep the order of `texts`; each
+    entry is a result dict or the exception its chunk failed with.
+    """
+    size = max(1, settings.BULK_CHUNK_SIZE)
+    chunks = [texts[start:start + size] for start in range(0, len(texts), size)]
+    scored = await asyncio.gather(*[
+        _run_inference(
+            lambda mode, chunk=chunk: _service.analyze_texts(chunk, keyword_only=mode != ServiceMode.FULL),
+            priority,
+        )
+        for chunk in chunks
+    ], return_exceptions=True)
+
+    results: List[Any] = []
+    for chunk, outcome in zip(chunks, scored):
+        if isinstance(outcome, BaseException):
+            results.extend([outcome] * len(chunk))
+            continue
+        mode, chunk_results = outcome
+        results.extend(dict(result, service_mode=mode.value) for result in chunk_results)
+    return results
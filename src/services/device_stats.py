@@ -0,0 +1,164 @@
+# src/services/device_stats.py
+
+import atexit
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.core.config import settings
+from src.utils.logging import logger
+
+SEVERITY_LEVELS = ("low", "medium", "high", "critical")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS device_app_stats (
+    device_id TEXT NOT NULL,
+    app_name TEXT NOT NULL,
+    messages INTEGER NOT NULL,
+    harassment INTEGER NOT NULL,
+    severity_low INTEGER NOT NULL,
+    severity_medium INTEGER NOT NULL,
+    severity_high INTEGER NOT NULL,
+    severity_critical INTEGER NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (device_id, app_name)
+) WITHOUT ROWID;
+"""
+
+_COUNTERS = ["messages", "harassment"] + [f"severity_{level}" for level in SEVERITY_LEVELS]
+# Counter columns add up; last_seen keeps the latest
+_UPSERT = (
+    f"INSERT INTO device_app_stats (device_id, app_name, {', '.join(_COUNTERS)}, last_seen) "
+    f"VALUES ({', '.join('?' * (len(_COUNTERS) + 3))}) "
+    f"ON CONFLICT(device_id, app_name) DO UPDATE SET "
+    + ", ".join(f"{c} = {c} + excluded.{c}" for c in _COUNTERS)
+    + ", last_seen = MAX(last_seen, excluded.last_seen)"
+)
+
+
+class DeviceStats:
+    """
+    Per-device, per-app message aggregates. record() only increments an
+    in-memory delta; a background thread writes the deltas to SQLite (WAL)
+    every `flush_seconds` in one transaction. The table is keyed by
+    (device_id, app_name), so a device's status is one index range read.
+    """
+
+    def __init__(self, path: str, flush_seconds: float):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        # device_id -> app_name -> [messages, harassment, low, medium, high, critical, last_seen]
+        self._pending: Dict[str, Dict[str, List[float]]] = {}
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._flusher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def record(self, device_id: str, app_name: str, is_harassment: bool, severity: str) -> None:
+        """Counts one analysed message; severity is only tallied for harassment."""
+        with self._lock:
+            counts = self._pending.setdefault(device_id, {}).get(app_name)
+            if counts is None:
+                counts = self._pending[device_id][app_name] = [0] * (len(_COUNTERS) + 1)
+            counts[0] += 1
+            if is_harassment:
+                counts[1] += 1
+                if severity in SEVERITY_LEVELS:
+                    counts[2 + SEVERITY_LEVELS.index(severity)] += 1
+            counts[-1] = time.time()
+        if self._flusher is None:
+            self._start()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        rows = [
+            (device_id, app_name, *counts)
+            for device_id, apps in pending.items()
+            for app_name, counts in apps.items()
+        ]
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(_UPSERT, rows)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning("Device stats flush failed, retrying next interval: %s", e)
+            with self._lock:
+                for device_id, app_name, *counts in rows:
+                    merged = self._pending.setdefault(device_id, {}).setdefault(app_name, [0] * len(counts))
+                    for i in range(len(counts) - 1):
+                        merged[i] += counts[i]
+                    merged[-1] = max(merged[-1], counts[-1])
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._run, name="device-stats", daemon=True)
+            self._flusher.start()
+        atexit.register(self.stop)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.flush_seconds):
+            self.flush()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.flush()
+
+    def device_status(self, device_id: str) -> Dict[str, Any]:
+        """Stored aggregates of one device merged with its not yet flushed deltas."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT app_name, {', '.join(_COUNTERS)}, last_seen FROM device_app_stats WHERE device_id = ?",
+                (device_id,),
+            ).fetchall()
+        finally:
+            conn.close()
+
+        apps: Dict[str, List[float]] = {app_name: list(counts) for app_name, *counts in rows}
+        with self._lock:
+            for app_name, counts in self._pending.get(device_id, {}).items():
+                merged = apps.setdefault(app_name, [0] * len(counts))
+                for i in range(len(counts) - 1):
+                    merged[i] += counts[i]
+                merged[-1] = max(merged[-1], counts[-1])
+
+        def summary(counts: List[float]) -> Dict[str, Any]:
+            return {
+                "messages_analyzed": int(counts[0]),
+                "harassment_detected": int(counts[1]),
+                "severity_histogram": {level: int(counts[2 + i]) for i, level in enumerate(SEVERITY_LEVELS)},
+            }
+
+        totals = [sum(column) for column in zip(*apps.values())] if apps else [0] * (len(_COUNTERS) + 1)
+        last_seen = max((counts[-1] for counts in apps.values()), default=None)
+        return {
+            **summary(totals),
+            "last_seen": datetime.fromtimestamp(last_seen) if last_seen else None,
+            "apps": {
+                app_name: dict(summary(counts), last_seen=datetime.fromtimestamp(counts[-1]))
+                for app_name, counts in apps.items()
+            },
+        }
+
+
+# One per worker process; workers share the database file
+device_stats = DeviceStats(settings.DEVICE_STATS_DB, settings.DEVICE_STATS_FLUSH_SECONDS)
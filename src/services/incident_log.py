@@ -0,0 +1,329 @@
+# src/services/incident_log.py
+
+import atexit
+import fcntl
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic_core import from_json, to_json
+
+from src.core.config import settings
+from src.utils.logging import logger
+
+ALERT = b"A"
+INCIDENT = b"I"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    log TEXT NOT NULL,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (kind, record_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS records_segment ON records (log, segment);
+CREATE TABLE IF NOT EXISTS positions (
+    log TEXT PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Where a committed record lives: (log directory, segment number, byte offset, length)
+_Location = Tuple[str, int, int, int]
+
+
+class IncidentLog:
+    """
+    Append-only log of alerts and incidents. Each worker appends to its own
+    directory under `root`, split into numbered segment files of about
+    `segment_bytes`. Each record is one line:
+
+        <kind> <id> <json>\\n      kind is A (alert) or I (incident)
+
+    Appends are buffered and written by a single thread every
+    `commit_interval_ms` as one write + fsync (group commit). Right after
+    the fsync the writer records where each record landed in an index
+    shared by all workers (`<root>/index.db`, SQLite WAL), along with how
+    far its directory is indexed, so a lookup is one indexed read whichever
+    worker wrote the record. On open, a writer only indexes what its
+    directory holds beyond that position (records fsynced just before a
+    crash), so startup does not grow with the size of the log.
+
+    A directory has one writer at a time: it is claimed with an exclusive
+    flock, and if `name` is held by a live process the next free `name.N`
+    is used instead. Once a directory's segments exceed `retention_bytes`
+    the oldest are deleted along with their index entries. Nothing is
+    touched on disk until open() (on startup, or on first use).
+    """
+
+    def __init__(self, root: str, name: str, segment_bytes: int, commit_interval_ms: float,
+                 retention_bytes: int = 0):
+        self.root = root
+        self.index_path = os.path.join(root, "index.db")
+        self.segment_bytes = segment_bytes
+        self.retention_bytes = retention_bytes
+        self.commit_interval = commit_interval_ms / 1000
+        self.name: Optional[str] = None
+        self._wanted_name = name
+        # Records appended but not yet in the index, readable meanwhile
+        self._pending: Dict[bytes, Dict[str, Any]] = {ALERT: {}, INCIDENT: {}}
+        self._buffer: List[Tuple[bytes, str, Any, Future]] = []
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._stopped = False
+        self._initialized = False
+        self._file = None
+
+    def open(self) -> None:
+        """Claims this worker's directory and indexes its unindexed tail; no-op once open."""
+        with self._open_lock:
+            if self._file is not None:
+                return
+            os.makedirs(self.root, exist_ok=True)
+            self.name, self._dir_lock = self._claim(self._wanted_name)
+            started = time.perf_counter()
+            self._repair_tail()
+            indexed = self._index_tail()
+            segments = self._segments(self.name)
+            self._segment = segments[-1] if segments else 0
+            path = self._segment_path(self.name, self._segment)
+            self._size = os.path.getsize(path) if os.path.exists(path) else 0
+            self._file = open(path, "ab")
+            self._stopped = False
+            self._writer = None
+            logger.info(
+                "Incident log %s opened, %d records indexed from its tail in %.1f ms",
+                self.name, indexed, (time.perf_counter() - started) * 1000,
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.index_path, timeout=5.0)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _claim(self, name: str) -> Tuple[str, Any]:
+        """Locks `name`, or the first free `name.N`, for this process; returns (directory, lock file)."""
+        for attempt in range(1024):
+            candidate = name if attempt == 0 else f"{name}.{attempt}"
+            os.makedirs(os.path.join(self.root, candidate), exist_ok=True)
+            lock = open(os.path.join(self.root, candidate, ".lock"), "a")
+            try:
+                # Released by the OS when this process exits, however it exits
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock.close()
+                continue
+            if candidate != name:
+                logger.warning("Incident log %s is held by another process, writing to %s", name, candidate)
+            return candidate, lock
+        raise RuntimeError(f"No free incident log directory for {name} under {self.root}")
+
+    def _segment_path(self, name: str, segment: int) -> str:
+        return os.path.join(self.root, name, f"{segment:08d}.log")
+
+    def _segments(self, name: str) -> List[int]:
+        return sorted(int(f[:-4]) for f in os.listdir(os.path.join(self.root, name)) if f.endswith(".log"))
+
+    def _repair_tail(self) -> None:
+        # A crash can leave a partial last record in our own newest segment
+        segments = self._segments(self.name)
+        if not segments:
+            return
+        path = self._segment_path(self.name, segments[-1])
+        with open(path, "rb") as f:
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            os.truncate(path, end)
+
+    def _index_tail(self) -> int:
+        """Indexes our records past the recorded position; returns how many."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT segment, offset FROM positions WHERE log = ?", (self.name,)).fetchone()
+            segment, offset = row or (0, 0)
+            entries = []
+            for current in [s for s in self._segments(self.name) if s >= segment]:
+                if current != segment:
+                    segment, offset = current, 0
+                with open(self._segment_path(self.name, current), "rb") as f:
+                    f.seek(offset)
+                    for line in f:
+                        kind, record_id, _ = line.split(b" ", 2)
+                        entries.append((kind.decode(), record_id.decode(), self.name, current, offset, len(line)))
+                        offset += len(line)
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)", entries)
+                conn.execute("INSERT OR REPLACE INTO positions VALUES (?, ?, ?)", (self.name, segment, offset))
+            return len(entries)
+        finally:
+            conn.close()
+
+    def append(self, kind: bytes, record_id: str, record: Any) -> Future:
+        """
+        Queues a record (a dict or pydantic model) for the next group commit
+        and returns at once; it is serialized on the writer thread. The
+        returned future resolves once the record is on disk and indexed:
+        callers that need durability await it, the alert path does not.
+        """
+        self.open()
+        done: Future = Future()
+        with self._lock:
+            self._buffer.append((kind, record_id, record, done))
+            self._pending[kind][record_id] = record
+        if self._writer is None:
+            self._start()
+        return done
+
+    def get(self, kind: bytes, record_id: str) -> Optional[Dict[str, Any]]:
+        self.open()
+        with self._lock:
+            record = self._pending[kind].get(record_id)
+        if record is not None:
+            return from_json(to_json(record))  # not indexed yet
+        conn = self._connect()
+        try:
+            location = conn.execute(
+                "SELECT log, segment, offset, length FROM records WHERE kind = ? AND record_id = ?",
+                (kind.decode(), record_id),
+            ).fetchone()
+        finally:
+            conn.close()
+        if location is None:
+            return None
+        name, segment, offset, length = location
+        try:
+            with open(self._segment_path(name, segment), "rb") as f:
+                f.seek(offset)
+                line = f.read(length)
+        except FileNotFoundError:
+            return None  # retired by its writer since we looked it up
+        return from_json(line.split(b" ", 2)[2])
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._run, name="incident-log", daemon=True)
+            self._writer.start()
+        atexit.register(self.close)
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wakeup.wait(self.commit_interval)
+            self._wakeup.clear()
+            self._commit()
+
+    def _commit(self) -> None:
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        try:
+            locations: List[_Location] = []
+            for kind, record_id, record, _ in batch:
+                line = kind + b" " + record_id.encode() + b" " + to_json(record) + b"\n"
+                if self._size and self._size + len(line) > self.segment_bytes:
+                    self._roll_segment()
+                locations.append((self.name, self._segment, self._size, len(line)))
+                self._file.write(line)
+                self._size += len(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except (OSError, ValueError) as e:
+            logger.error("Incident log commit of %d records failed: %s", len(batch), e)
+            for _, _, _, done in batch:
+                done.set_exception(e)
+            return
+
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)",
+                        [(kind.decode(), record_id) + location
+                         for (kind, record_id, _, _), location in zip(batch, locations)],
+                    )
+                    conn.execute("INSERT OR REPLACE INTO positions VALUES (?, ?, ?)",
+                                 (self.name, self._segment, self._size))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            # The records are on disk; they stay readable from memory, and
+            # the next open() indexes them from the tail
+            logger.error("Incident log index update of %d records failed: %s", len(batch), e)
+        else:
+            with self._lock:
+                for kind, record_id, record, _ in batch:
+                    if self._pending[kind].get(record_id) is record:
+                        del self._pending[kind][record_id]
+        for _, _, _, done in batch:
+            done.set_result(None)
+
+    def _roll_segment(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._segment += 1
+        self._size = 0
+        self._file = open(self._segment_path(self.name, self._segment), "ab")
+        if self.retention_bytes:
+            self._retire_segments()
+
+    def _retire_segments(self) -> None:
+        """Deletes our oldest segments while the directory is over retention_bytes."""
+        segments = self._segments(self.name)
+        sizes = {segment: os.path.getsize(self._segment_path(self.name, segment)) for segment in segments}
+        total = sum(sizes.values())
+        retired = []
+        for segment in segments[:-1]:  # never the one being written
+            if total <= self.retention_bytes:
+                break
+            os.remove(self._segment_path(self.name, segment))
+            total -= sizes[segment]
+            retired.append(segment)
+        if retired:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM records WHERE log = ? AND segment <= ?", (self.name, retired[-1]))
+            finally:
+                conn.close()
+            logger.info("Incident log %s retired %d segment(s)", self.name, len(retired))
+
+    def close(self) -> None:
+        """Commits whatever is buffered, stops the writer and releases the directory."""
+        if self._file is None:
+            return
+        self._stopped = True
+        self._wakeup.set()
+        if self._writer is not None:
+            self._writer.join()
+        self._commit()
+        self._file.close()
+        self._dir_lock.close()
+        self._file = None
+
+
+# One writer per worker process, opened on startup; a restarted worker reopens its slot's directory
+incident_log = IncidentLog(
+    settings.INCIDENT_LOG_DIR,
+    f"worker-{os.getenv('DEEPGUARD_WORKER_SLOT', '0')}",
+    segment_bytes=settings.INCIDENT_SEGMENT_BYTES,
+    commit_interval_ms=settings.INCIDENT_COMMIT_INTERVAL_MS,
+    retention_bytes=settings.INCIDENT_RETENTION_BYTES,
+)
@@ -0,0 +1,454 @@
+# src/services/jobs.py
+
+import asyncio
+import contextvars
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from src.core.config import settings
+from src.services.scheduler import Priority
+from src.utils.logging import logger
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    analysis_type TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    frames_processed INTEGER NOT NULL DEFAULT 0,
+    frames_total INTEGER,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_expiry ON jobs (expires_at);
+"""
+
+_COLUMNS = ("job_id", "owner", "analysis_type", "worker", "status", "created_at", "updated_at",
+            "expires_at", "frames_processed", "frames_total", "result", "error")
+
+# analyze(content, progress) -> result; progress(frames_done, frames_total) is thread-safe
+Analyzer = Callable[[bytes, Callable[[int, int], None]], Awaitable[Dict[str, Any]]]
+
+
+class JobStore:
+    """SQLite (WAL) table of jobs, shared by all workers; results are stored as JSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def insert(self, job: Dict[str, Any]) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    f"INSERT INTO jobs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                    [_encode(column, job.get(column)) for column in _COLUMNS],
+                )
+        finally:
+            conn.close()
+
+    def update(self, job_id: str, worker: str, **fields: Any) -> bool:
+        """Updates a job `worker` holds; False if it doesn't (any more)."""
+        # Progress only moves forward, so a late progress write can't undo a newer one
+        assignments = [
+            f"{column} = MAX({column}, ?)" if column == "frames_processed" else f"{column} = ?"
+            for column in fields
+        ]
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    f"UPDATE jobs SET {', '.join(assignments)} WHERE job_id = ? AND worker = ?",
+                    [_encode(column, value) for column, value in fields.items()] + [job_id, worker],
+                )
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id = ? AND expires_at >= ?",
+                (job_id, time.time()),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        job = dict(zip(_COLUMNS, row))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def heartbeat(self, worker: str, job_ids: List[str], now: float, ttl_seconds: float) -> None:
+        """Marks jobs `worker` is running or queueing as still held (and not expiring while they wait)."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "UPDATE jobs SET updated_at = ?, expires_at = MAX(expires_at, ?) "
+                    "WHERE job_id = ? AND worker = ? AND status IN (?, ?)",
+                    [(now, now + ttl_seconds, job_id, worker, QUEUED, RUNNING) for job_id in job_ids],
+                )
+        finally:
+            conn.close()
+
+    def claim_orphans(self, worker: str, stale_before: float, now: float) -> List[str]:
+        """
+        Moves unfinished jobs whose worker hasn't touched them since
+        `stale_before` (it died) to `worker`; returns their ids. The write
+        lock is held from select to update, so each orphan goes to one worker.
+        """
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                orphans = [row[0] for row in conn.execute(
+                    "SELECT job_id FROM jobs WHERE status IN (?, ?) AND worker != ? AND updated_at < ? "
+                    "ORDER BY created_at",
+                    (QUEUED, RUNNING, worker, stale_before),
+                )]
+                conn.executemany("UPDATE jobs SET worker = ?, updated_at = ? WHERE job_id = ?",
+                                 [(worker, now, job_id) for job_id in orphans])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return orphans
+        finally:
+            conn.close()
+
+    def delete_expired(self, now: float) -> List[str]:
+        """Removes jobs past their expiry; returns their ids."""
+        conn = self._connect()
+        try:
+            with conn:
+                expired = [row[0] for row in conn.execute("SELECT job_id FROM jobs WHERE expires_at < ?", (now,))]
+                conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in expired])
+            return expired
+        finally:
+            conn.close()
+
+
+def _encode(column: str, value: Any) -> Any:
+    return json.dumps(value, default=str) if column == "result" and value is not None else value
+
+
+class MediaJobs:
+    """
+    Long-running media analysis as jobs. submit() spools the upload to disk,
+    records the job and returns at once; `workers` background tasks run the
+    analysis one job each, in the bulk inference lane. Progress (frames
+    analysed) is kept live in memory and written to the job table at most
+    every `progress_write_seconds`, so any worker can answer a poll.
+
+    Each process holds its unfinished jobs under a `worker` id of its own
+    and touches them every `claim_seconds` / 4. Jobs nobody has touched for
+    `claim_seconds` belong to a process that died: any live one claims
+    them, atomically, and runs them again. A job expires `ttl_seconds`
+    after it last changed (so, once finished, `ttl_seconds` after it
+    finished) and is then swept from the table with its media. Used from
+    the event loop only; the tasks start on first use.
+    """
+
+    def __init__(self, store: JobStore, media_dir: str, worker: str, analyze: Analyzer, workers: int,
+                 ttl_seconds: float, progress_write_seconds: float, sweep_seconds: float,
+                 claim_seconds: float):
+        self.store = store
+        self.media_dir = media_dir
+        self.worker = worker
+        self.analyze = analyze
+        self.workers = max(1, workers)
+        self.ttl_seconds = ttl_seconds
+        self.progress_write_seconds = progress_write_seconds
+        self.sweep_seconds = sweep_seconds
+        self.claim_seconds = claim_seconds
+        self._live: Dict[str, Dict[str, Any]] = {}  # this worker's queued and running jobs
+        self._changed: Dict[str, asyncio.Event] = {}  # set (and replaced) whenever a live job changes
+        self._progress_written: Dict[str, float] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._starting = asyncio.Lock()
+
+    def _media_path(self, job_id: str) -> str:
+        return os.path.join(self.media_dir, job_id)
+
+    async def _start(self) -> None:
+        if self._tasks:
+            return
+        async with self._starting:
+            if self._tasks:
+                return  # started by a request that got here first
+            # Before the tasks are published: later requests spool into it at once
+            await asyncio.to_thread(os.makedirs, self.media_dir, exist_ok=True)
+            loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+            # Started from some request: run in a fresh context so jobs don't inherit its deadline
+            coroutines = [self._work() for _ in range(self.workers)] + [self._maintain()]
+            self._tasks = [contextvars.Context().run(loop.create_task, coroutine) for coroutine in coroutines]
+            await self.claim_orphans()
+
+    async def claim_orphans(self) -> int:
+        """Takes over the unfinished jobs of dead processes; returns how many."""
+        now = time.time()
+        orphans = await asyncio.to_thread(self.store.claim_orphans, self.worker, now - self.claim_seconds, now)
+        for job_id in orphans:
+            job = await asyncio.to_thread(self.store.get, job_id)
+            if job is None or job_id in self._live:
+                continue
+            if os.path.exists(self._media_path(job_id)):
+                job.update(status=QUEUED, frames_processed=0)
+                self._live[job_id] = job
+                self._changed[job_id] = asyncio.Event()
+                self._queue.put_nowait(job_id)
+            else:
+                await self._finish(job, error="Media was lost when the server restarted, please resubmit")
+        if orphans:
+            logger.info("Claimed %d unfinished media jobs of stopped workers", len(orphans))
+        return len(orphans)
+
+    async def submit(self, upload: BinaryIO, analysis_type: str, owner: str) -> Dict[str, Any]:
+        await self._start()
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        job = {
+            "job_id": job_id, "owner": owner, "analysis_type": analysis_type, "worker": self.worker,
+            "status": QUEUED, "created_at": now, "updated_at": now, "expires_at": now + self.ttl_seconds,
+            "frames_processed": 0, "frames_total": None, "result": None, "error": None,
+        }
+
+        def spool() -> None:
+            with open(self._media_path(job_id), "wb") as f:
+                shutil.copyfileobj(upload, f, 1024 * 1024)
+            self.store.insert(job)
+
+        await asyncio.to_thread(spool)
+        self._live[job_id] = job
+        self._changed[job_id] = asyncio.Event()
+        self._queue.put_nowait(job_id)
+        return dict(job)
+
+    async def get(self, job_id: str, owner: str, wait: float = 0.0) -> Optional[Dict[str, Any]]:
+        """
+        The job, or None if it is unknown, expired or someone else's. With
+        `wait`, returns as soon as the job finishes or its progress changes
+        (long poll), or after `wait` seconds.
+        """
+        await self._start()
+        job = await self._lookup(job_id)
+        if job is None or job["owner"] != owner:
+            return None
+        deadline = time.monotonic() + wait
+        while job["status"] not in FINISHED:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            changed = self._changed.get(job_id)
+            if changed is not None:
+                try:
+                    await asyncio.wait_for(changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                return await self._lookup(job_id)
+            # Another worker's job: watch the table (and take it over if that worker died)
+            if job["updated_at"] < time.time() - self.claim_seconds:
+                await self.claim_orphans()
+            await asyncio.sleep(min(remaining, self.progress_write_seconds))
+            latest = await self._lookup(job_id)
+            if latest is None or (latest["status"], latest["frames_processed"]) != (job["status"], job["frames_processed"]):
+                return latest
+        return job
+
+    async def _lookup(self, job_id: str) -> Optional[Dict[str, Any]]:
+        live = self._live.get(job_id)
+        if live is not None:
+            return dict(live)
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    def _notify(self, job_id: str) -> None:
+        changed = self._changed.get(job_id)
+        if changed is not None:
+            self._changed[job_id] = asyncio.Event()
+            changed.set()
+
+    def _on_progress(self, job_id: str, done: int, total: int) -> None:
+        job = self._live.get(job_id)
+        if job is None:
+            return
+        now = time.time()
+        job.update(frames_processed=done, frames_total=total, updated_at=now)
+        self._notify(job_id)
+        if now - self._progress_written.get(job_id, 0.0) >= self.progress_write_seconds:
+            self._progress_written[job_id] = now
+            asyncio.get_running_loop().create_task(asyncio.to_thread(
+                self.store.update, job_id, self.worker, frames_processed=done, frames_total=total,
+                updated_at=now, expires_at=now + self.ttl_seconds,
+            ))
+
+    async def _run(self, job_id: str) -> None:
+        job = self._live[job_id]
+        now = time.time()
+        job.update(status=RUNNING, updated_at=now, expires_at=now + self.ttl_seconds)
+        held = await asyncio.to_thread(self.store.update, job_id, self.worker, status=RUNNING,
+                                       updated_at=now, expires_at=job["expires_at"])
+        if not held:
+            # Taken over by another worker while it was queued here
+            self._drop(job_id)
+            return
+        self._notify(job_id)
+
+        loop = asyncio.get_running_loop()
+
+        def progress(done: int, total: int) -> None:
+            loop.call_soon_threadsafe(self._on_progress, job_id, done, total)
+
+        try:
+            content = await asyncio.to_thread(_read, self._media_path(job_id))
+            result = await self.analyze(content, progress)
+        except HTTPException as e:
+            await self._finish(job, error=str(e.detail))
+        except Exception as e:
+            logger.error("Media job %s failed: %s", job_id, e)
+            await self._finish(job, error=str(e))
+        else:
+            await self._finish(job, result=result)
+
+    async def _finish(self, job: Dict[str, Any], result: Optional[Dict[str, Any]] = None,
+                      error: Optional[str] = None) -> None:
+        job_id = job["job_id"]
+        await asyncio.sleep(0)  # let progress reported just before returning land first
+        now = time.time()
+        fields = {
+            "status": FAILED if error is not None else SUCCEEDED,
+            "updated_at": now,
+            "expires_at": now + self.ttl_seconds,
+            "frames_processed": job.get("frames_processed") or 0,
+            "frames_total": job.get("frames_total"),
+            "result": result,
+            "error": error,
+        }
+
+        def persist() -> bool:
+            # One thread call, so a cancelled caller can't record the job without removing its media
+            held = self.store.update(job_id, self.worker, **fields)
+            if held:
+                _remove(self._media_path(job_id))
+            return held
+
+        try:
+            if await asyncio.to_thread(persist):
+                job.update(fields)
+            else:
+                # Another worker took the job over and owns its media now
+                logger.warning("Media job %s was taken over by another worker, dropping this run", job_id)
+        finally:
+            self._drop(job_id)
+
+    def _drop(self, job_id: str) -> None:
+        self._live.pop(job_id, None)
+        self._progress_written.pop(job_id, None)
+        self._notify(job_id)
+        self._changed.pop(job_id, None)
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error("Media job %s could not be recorded: %s", job_id, e)
+
+    async def sweep(self) -> int:
+        expired = await asyncio.to_thread(self.store.delete_expired, time.time())
+        for job_id in expired:
+            await asyncio.to_thread(_remove, self._media_path(job_id))
+        return len(expired)
+
+    async def _maintain(self) -> None:
+        """Keeps this worker's jobs held, claims orphans and sweeps expired jobs."""
+        interval = self.claim_seconds / 4
+        swept_at = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.store.heartbeat, self.worker, list(self._live), time.time(),
+                                        self.ttl_seconds)
+                await self.claim_orphans()
+                if time.monotonic() - swept_at >= self.sweep_seconds:
+                    swept_at = time.monotonic()
+                    await self.sweep()
+            except Exception as e:
+                logger.warning("Media job maintenance failed, retrying next interval: %s", e)
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": sum(job["status"] == QUEUED for job in self._live.values()),
+            "running": sum(job["status"] == RUNNING for job in self._live.values()),
+        }
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _detect_deepfake(content: bytes, progress: Callable[[int, int], None]) -> Dict[str, Any]:
+    # Imported on first job: it loads the models, which the job table itself doesn't need
+    from src.services.detection import detect_deepfake
+    return await detect_deepfake(content, Priority.BULK, progress=progress)
+
+
+# One per worker process; the job table is shared, each process runs the jobs it holds
+media_jobs = MediaJobs(
+    JobStore(settings.JOBS_DB),
+    settings.JOB_MEDIA_DIR,
+    worker=f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}",
+    analyze=_detect_deepfake,
+    workers=settings.JOB_WORKERS,
+    ttl_seconds=settings.JOB_TTL_SECONDS,
+    progress_write_seconds=settings.JOB_PROGRESS_WRITE_SECONDS,
+    sweep_seconds=settings.JOB_SWEEP_SECONDS,
+    claim_seconds=settings.JOB_CLAIM_SECONDS,
+)
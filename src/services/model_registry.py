@@ -0,0 +1,369 @@
+# src/services/model_registry.py
+
+import fcntl
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.core.config import settings
+from src.utils.logging import logger
+
+# compare(current output, candidate output) -> (items compared, items agreeing, summed |score difference|)
+Comparator = Callable[[Any, Any], Tuple[int, int, float]]
+
+
+class ModelVersion:
+    """One loaded model, and how many calls are using it right now."""
+
+    def __init__(self, name: str, model: Any, warmup_ms: float):
+        self.name = name
+        self.model = model
+        self.warmup_ms = warmup_ms
+        self.loaded_at = time.time()
+        self.in_flight = 0
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "loaded_at": self.loaded_at,
+            "warmup_ms": round(self.warmup_ms, 1),
+            "in_flight": self.in_flight,
+        }
+
+
+def _shadow_counters() -> Dict[str, float]:
+    return dict.fromkeys(("samples", "items", "agreeing", "abs_diff", "current_ms", "candidate_ms",
+                          "candidate_ms_max", "skipped", "errors"), 0)
+
+
+class _Slot:
+    def __init__(self, loader: Callable[[str], Any], warm_up: Callable[[Any], None], compare: Comparator):
+        self.loader = loader
+        self.warm_up = warm_up
+        self.compare = compare
+        self.current: Optional[ModelVersion] = None
+        self.candidate: Optional[ModelVersion] = None
+        self.shadow_fraction = 0.0
+        # name -> (shadow fraction it is being loaded for (0: to serve), generation it was wanted in)
+        self.loading: Dict[str, Tuple[float, int]] = {}
+        # Bumped whenever the wanted serving / shadow version changes; a load finishing
+        # after a newer one was asked for is dropped instead of installed
+        self.serve_generation = 0
+        self.shadow_generation = 0
+        self.retired: List[ModelVersion] = []  # replaced, still finishing calls
+        self.last_error: Optional[str] = None
+        self.shadow_stats = _shadow_counters()
+
+
+class ModelRegistry:
+    """
+    The models in service, by kind ("deepfake", "harassment").
+
+    A new version is loaded and warmed up on a background thread while the
+    current one keeps serving, then swapped in with a single reference
+    assignment. Calls already holding the old version (see lease()) finish
+    on it, and it is released once the last of them returns.
+
+    A version can instead be installed as a shadow candidate: a sampled
+    fraction of calls is re-run on it on a separate thread, off the request
+    path, and its latency and outputs are compared with the current model's.
+
+    Rollouts are recorded in a manifest file that every worker polls, so all
+    workers converge on the same versions without a restart.
+    """
+
+    def __init__(self, manifest_path: str, poll_seconds: float, shadow_queue_size: int):
+        self.manifest_path = manifest_path
+        self.poll_seconds = poll_seconds
+        self.shadow_queue_size = shadow_queue_size
+        self._slots: Dict[str, _Slot] = {}
+        self._lock = threading.Lock()
+        self._shadow_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-shadow")
+        self._shadow_pending = 0
+        self._manifest_mtime: Optional[float] = None
+        self._watcher: Optional[threading.Thread] = None
+
+    def register(self, kind: str, name: str, loader: Callable[[str], Any],
+                 warm_up: Callable[[Any], None], compare: Comparator) -> None:
+        """Loads the initial version (serving needs it), then follows the manifest."""
+        slot = _Slot(loader, warm_up, compare)
+        slot.current = self._build(slot, name)
+        with self._lock:
+            self._slots[kind] = slot
+        self.reconcile(force=True)
+        self._start_watcher()
+
+    def _build(self, slot: _Slot, name: str) -> ModelVersion:
+        model = slot.loader(name)
+        started = time.perf_counter()
+        # First calls pay for lazy initialisation (graph tracing, allocator growth); pay it here
+        slot.warm_up(model)
+        return ModelVersion(name, model, (time.perf_counter() - started) * 1000)
+
+    @contextmanager
+    def lease(self, kind: str) -> Iterator[Any]:
+        """The current model, kept alive until the block ends even if it is swapped out meanwhile."""
+        slot = self._slots[kind]
+        with self._lock:
+            version = slot.current
+            version.in_flight += 1
+        try:
+            yield version.model
+        finally:
+            with self._lock:
+                version.in_flight -= 1
+                if version.in_flight == 0 and version in slot.retired:
+                    slot.retired.remove(version)
+
+    def current_name(self, kind: str) -> str:
+        """The name of the version serving `kind` right now."""
+        return self._slots[kind].current.name
+
+    # --- Rollouts ---
+
+    def deploy(self, kind: str, name: str, shadow_fraction: float = 0.0) -> bool:
+        """
+        Starts loading `name` in the background, to serve or, with
+        shadow_fraction > 0, as the shadow candidate. False if it is already loading.
+        """
+        slot = self._slots[kind]
+        with self._lock:
+            already_loading = name in slot.loading
+            if shadow_fraction > 0:
+                slot.shadow_generation += 1
+                generation = slot.shadow_generation
+            else:
+                slot.serve_generation += 1
+                generation = slot.serve_generation
+            slot.loading[name] = (shadow_fraction, generation)
+        if already_loading:
+            return False
+        threading.Thread(target=self._load, args=(kind, slot, name), name=f"model-load-{kind}", daemon=True).start()
+        return True
+
+    def _load(self, kind: str, slot: _Slot, name: str) -> None:
+        try:
+            version = self._build(slot, name)
+        except Exception as e:
+            logger.error("Loading %s model %s failed, keeping %s: %s", kind, name, slot.current.name, e)
+            with self._lock:
+                slot.loading.pop(name, None)
+                slot.last_error = f"{name}: {e}"
+            return
+        with self._lock:
+            fraction, generation = slot.loading.pop(name, (0.0, -1))
+            wanted = slot.shadow_generation if fraction > 0 else slot.serve_generation
+            if generation != wanted:
+                logger.info("%s model %s loaded after a newer version was asked for, dropping it", kind, name)
+                return
+            if fraction > 0:
+                slot.candidate = version
+                slot.shadow_fraction = fraction
+                slot.shadow_stats = _shadow_counters()
+            else:
+                self._swap(slot, version)
+        logger.info("%s model %s ready after %.0f ms warm-up, %s", kind, name, version.warmup_ms,
+                    "shadowing" if fraction > 0 else "now serving")
+
+    def _swap(self, slot: _Slot, version: ModelVersion) -> None:
+        # Caller holds the lock
+        old, slot.current = slot.current, version
+        if old.in_flight:
+            slot.retired.append(old)
+        if slot.candidate is version:
+            slot.candidate = None
+            slot.shadow_fraction = 0.0
+
+    def promote(self, kind: str) -> Optional[str]:
+        """Makes the shadow candidate the current version; returns its name."""
+        slot = self._slots[kind]
+        with self._lock:
+            candidate = slot.candidate
+            if candidate is None:
+                return None
+            slot.serve_generation += 1
+            slot.shadow_generation += 1
+            self._swap(slot, candidate)
+        logger.info("%s model %s promoted from shadow", kind, candidate.name)
+        return candidate.name
+
+    def stop_shadow(self, kind: str) -> None:
+        slot = self._slots[kind]
+        with self._lock:
+            slot.candidate = None
+            slot.shadow_fraction = 0.0
+            slot.shadow_generation += 1
+
+    # --- Shadow traffic ---
+
+    def shadow(self, kind: str, run: Callable[[Any], Any], current_output: Any, current_ms: float) -> None:
+        """
+        Maybe re-runs a call on the shadow candidate: run(candidate model)
+        is compared with `current_output`. Never blocks the caller; samples
+        are skipped while the shadow thread is `shadow_queue_size` behind.
+        """
+        slot = self._slots.get(kind)
+        if slot is None or slot.candidate is None or random.random() >= slot.shadow_fraction:
+            return
+        with self._lock:
+            candidate = slot.candidate
+            if candidate is None:
+                return
+            if self._shadow_pending >= self.shadow_queue_size:
+                slot.shadow_stats["skipped"] += 1
+                return
+            self._shadow_pending += 1
+            candidate.in_flight += 1
+        self._shadow_pool.submit(self._run_shadow, slot, candidate, run, current_output, current_ms)
+
+    def _run_shadow(self, slot: _Slot, candidate: ModelVersion, run: Callable[[Any], Any],
+                    current_output: Any, current_ms: float) -> None:
+        try:
+            started = time.perf_counter()
+            output = run(candidate.model)
+            candidate_ms = (time.perf_counter() - started) * 1000
+            items, agreeing, abs_diff = slot.compare(current_output, output)
+        except Exception as e:
+            logger.warning("Shadow run on %s failed: %s", candidate.name, e)
+            items = None
+        with self._lock:
+            self._shadow_pending -= 1
+            candidate.in_flight -= 1
+            if slot.candidate is not candidate:
+                return  # promoted or replaced meanwhile
+            stats = slot.shadow_stats
+            if items is None:
+                stats["errors"] += 1
+                return
+            stats["samples"] += 1
+            stats["items"] += items
+            stats["agreeing"] += agreeing
+            stats["abs_diff"] += abs_diff
+            stats["current_ms"] += current_ms
+            stats["candidate_ms"] += candidate_ms
+            stats["candidate_ms_max"] = max(stats["candidate_ms_max"], candidate_ms)
+
+    # --- Manifest (shared by all workers) ---
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def publish(self, kind: str, entry: Dict[str, Any]) -> None:
+        """
+        Records the wanted versions of one kind ({"name": ..., "shadow":
+        {"name": ..., "fraction": ...} or None}) for every worker, and
+        starts rolling them out in this one.
+        """
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        # Other workers publish too: hold the lock file across the read-modify-write
+        with self._lock, open(f"{self.manifest_path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            manifest = self._read_manifest()
+            manifest[kind] = entry
+            temporary = f"{self.manifest_path}.{os.getpid()}.tmp"
+            with open(temporary, "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(temporary, self.manifest_path)
+        self.reconcile(force=True)
+
+    def wanted(self, kind: str) -> Dict[str, Any]:
+        """The manifest entry for `kind`, defaulting to what this worker runs now."""
+        slot = self._slots[kind]
+        entry = self._read_manifest().get(kind) or {}
+        with self._lock:
+            shadow = {"name": slot.candidate.name, "fraction": slot.shadow_fraction} if slot.candidate else None
+            return {"name": entry.get("name", slot.current.name), "shadow": entry.get("shadow", shadow)}
+
+    def reconcile(self, force: bool = False) -> None:
+        """Starts whatever loads, swaps and shadow changes bring this worker in line with the manifest."""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._manifest_mtime and not force:
+            return
+        self._manifest_mtime = mtime
+        try:
+            manifest = self._read_manifest()
+        except (OSError, ValueError) as e:
+            logger.warning("Unreadable model registry manifest %s: %s", self.manifest_path, e)
+            return
+
+        for kind, slot in list(self._slots.items()):
+            entry = manifest.get(kind) or {}
+            name, shadow = entry.get("name"), entry.get("shadow")
+            if name and name != slot.current.name:
+                if slot.candidate is not None and slot.candidate.name == name:
+                    self.promote(kind)
+                else:
+                    self.deploy(kind, name)
+            elif name:
+                with self._lock:
+                    slot.serve_generation += 1  # back to the current version: drop loads of others
+            if shadow and shadow.get("name") and shadow.get("fraction", 0) > 0:
+                if slot.candidate is not None and slot.candidate.name == shadow["name"]:
+                    with self._lock:
+                        slot.shadow_fraction = shadow["fraction"]
+                        slot.shadow_generation += 1
+                elif shadow["name"] != slot.current.name:
+                    self.deploy(kind, shadow["name"], shadow["fraction"])
+            elif not (name and slot.candidate is not None and slot.candidate.name == name):
+                self.stop_shadow(kind)
+
+    def _start_watcher(self) -> None:
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+            self._watcher.start()
+
+    def _watch(self) -> None:
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                self.reconcile()
+            except Exception as e:
+                logger.warning("Model registry poll failed: %s", e)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            report = {}
+            for kind, slot in self._slots.items():
+                stats = slot.shadow_stats
+                samples = stats["samples"]
+                report[kind] = {
+                    "current": slot.current.describe(),
+                    "candidate": slot.candidate.describe() if slot.candidate else None,
+                    "shadow_fraction": slot.shadow_fraction,
+                    "loading": sorted(slot.loading),
+                    "draining": [version.describe() for version in slot.retired],
+                    "last_error": slot.last_error,
+                    "shadow": {
+                        "samples": samples,
+                        "agreement": stats["agreeing"] / stats["items"] if stats["items"] else None,
+                        "mean_abs_score_diff": stats["abs_diff"] / stats["items"] if stats["items"] else None,
+                        "current_ms_mean": stats["current_ms"] / samples if samples else None,
+                        "candidate_ms_mean": stats["candidate_ms"] / samples if samples else None,
+                        "candidate_ms_max": stats["candidate_ms_max"],
+                        "skipped": stats["skipped"],
+                        "errors": stats["errors"],
+                    },
+                }
+            return report
+
+
+# One per worker process; versions are kept in line across workers through the manifest
+model_registry = ModelRegistry(
+    settings.MODEL_REGISTRY_FILE,
+    poll_seconds=settings.MODEL_REGISTRY_POLL_SECONDS,
+    shadow_queue_size=settings.MODEL_SHADOW_QUEUE_SIZE,
+)
@@ -1,31 +1,301 @@
+# src/services/notification.py
+# Email delivery of alerts: persistent SMTP connections fed by an async queue.
+
+import asyncio
+import html
+import os
+import random
+import re
+import smtplib
+import ssl
+from dataclasses import dataclass
+from email.message import EmailMessage
+from email.utils import formataddr
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+
 from fastapi import BackgroundTasks
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from pydantic import BaseModel
-import os
+
+from src.utils.logging import logger
+
+# Mail is disabled (alerts are not emailed) unless MAIL_SERVER and MAIL_PORT are set
+MAIL_SERVER = os.getenv("MAIL_SERVER")
+MAIL_PORT = int(os.getenv("MAIL_PORT") or 0)
+MAIL_USERNAME = os.getenv("MAIL_USERNAME")
+MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
+MAIL_FROM = os.getenv("MAIL_FROM", "alerts@deepguard.local")
+MAIL_FROM_NAME = os.getenv("MAIL_FROM_NAME", "DeepGuard")
+MAIL_STARTTLS = os.getenv("MAIL_STARTTLS", "true").lower() == "true"
+MAIL_SSL = os.getenv("MAIL_SSL", "false").lower() == "true"
+MAIL_TIMEOUT_SECONDS = float(os.getenv("MAIL_TIMEOUT_SECONDS", "10"))
+# SMTP connections kept open per worker
+MAIL_POOL_SIZE = int(os.getenv("MAIL_POOL_SIZE", "2"))
+# Alerts to the same recipient within this window go out as one digest
+MAIL_DIGEST_SECONDS = float(os.getenv("MAIL_DIGEST_SECONDS", "60"))
+MAIL_MAX_RETRIES = int(os.getenv("MAIL_MAX_RETRIES", "5"))
+MAIL_RETRY_BASE_SECONDS = float(os.getenv("MAIL_RETRY_BASE_SECONDS", "2"))
+# Alerts waiting to be sent; beyond this new ones are dropped
+MAIL_QUEUE_SIZE = int(os.getenv("MAIL_QUEUE_SIZE", "1000"))
+# Who is emailed about harassment alerts (comma-separated), and from which severity up
+MAIL_ALERT_TO = [address.strip() for address in os.getenv("MAIL_ALERT_TO", "").split(",") if address.strip()]
+MAIL_ALERT_MIN_SEVERITY = os.getenv("MAIL_ALERT_MIN_SEVERITY", "high")
+
 
 class EmailSchema(BaseModel):
     email: str
     subject: str
     body: str
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=os.getenv("MAIL_USERNAME"),
-    MAIL_PASSWORD=os.getenv("MAIL_PASSWORD"),
-    MAIL_FROM=os.getenv("MAIL_FROM"),
-    MAIL_PORT=int(os.getenv("MAIL_PORT")),
-    MAIL_SERVER=os.getenv("MAIL_SERVER"),
-    MAIL_FROM_NAME=os.getenv("MAIL_FROM_NAME"),
-    MAIL_TLS=True,
-    MAIL_SSL=False,
-    USE_CREDENTIALS=True,
-)
 
-async def send_email(email: EmailSchema, background_tasks: BackgroundTasks):
-    message = MessageSchema(
-        subject=email.subject,
-        recipients=[email.email],
-        body=email.body,
-        subtype="html"
-    )
-    fm = FastMail(conf)
-    background_tasks.add_task(fm.send_message, message)
\ No newline at end of file
+@dataclass(frozen=True)
+class MailServer:
+    host: str
+    port: int
+    username: Optional[str] = None
+    password: Optional[str] = None
+    starttls: bool = True
+    use_ssl: bool = False
+    timeout: float = 10.0
+
+
+class SMTPConnection:
+    """
+    One persistent SMTP session, opened on first use and reused for every
+    message after that. A session the server has dropped (e.g. after an
+    idle timeout) is reopened once transparently; any other failure closes
+    it, so the next attempt starts fresh. Blocking: call it from a thread.
+    """
+
+    def __init__(self, server: MailServer):
+        self.server = server
+        self._smtp: Optional[smtplib.SMTP] = None
+
+    def _open(self) -> smtplib.SMTP:
+        server = self.server
+        if server.use_ssl:
+            smtp = smtplib.SMTP_SSL(server.host, server.port, timeout=server.timeout,
+                                    context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(server.host, server.port, timeout=server.timeout)
+            if server.starttls:
+                smtp.starttls(context=ssl.create_default_context())
+        if server.username:
+            smtp.login(server.username, server.password or "")
+        return smtp
+
+    def send(self, message: EmailMessage) -> None:
+        try:
+            if self._smtp is None:
+                self._smtp = self._open()
+            try:
+                self._smtp.send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                self._smtp = self._open()
+                self._smtp.send_message(message)
+        except (smtplib.SMTPException, OSError):
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+
+_CONTROL_CHARACTERS = re.compile(r"[\x00-\x1f\x7f]+")
+
+
+def header_text(value: str) -> str:
+    """`value` made safe for a header: CR/LF and other control characters become spaces."""
+    return _CONTROL_CHARACTERS.sub(" ", value).strip()
+
+
+def _is_permanent(error: Exception) -> bool:
+    # 5xx replies and refused recipients won't succeed on a retry
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+
+class AlertMailer:
+    """
+    Delivers alert emails off the request path. enqueue() only appends to
+    an in-memory buffer; the first alert for a recipient opens a
+    `digest_seconds` window, and everything queued for them by then goes
+    out as one email. `pool_size` sender tasks each own a persistent
+    SMTPConnection. Failed sends are retried with exponential backoff and
+    jitter, up to `max_retries` times; flush() sends retries still waiting
+    out their backoff too. Used from the event loop only; the tasks start
+    with the first alert.
+    """
+
+    def __init__(self, server: Optional[MailServer], sender: str, pool_size: int, digest_seconds: float,
+                 max_retries: int, retry_base_seconds: float, queue_size: int):
+        self.server = server
+        self.sender = sender
+        self.pool_size = max(1, pool_size)
+        self.digest_seconds = digest_seconds
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.queue_size = queue_size
+        self._pending: Dict[str, List[Tuple[str, str]]] = {}  # recipient -> [(subject, html body)]
+        self._outbox: Optional[asyncio.Queue] = None  # (recipient, items, attempt) ready to send
+        self._backing_off: Dict[int, Tuple[asyncio.TimerHandle, Tuple[str, List[Tuple[str, str]], int]]] = {}
+        self._retry_ids = count()
+        self._tasks: List[asyncio.Task] = []
+        self._connections: List[SMTPConnection] = []
+        self._queued = 0  # alerts enqueued and not yet sent or given up on
+        self.sent = 0
+        self.emails = 0
+        self.retries = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.server is not None
+
+    def enqueue(self, recipient: str, subject: str, body: str) -> bool:
+        """Queues one alert email; returns False if mail is disabled or the queue is full."""
+        if not self.enabled:
+            return False
+        if self._queued >= self.queue_size:
+            self.dropped += 1
+            logger.warning("Alert email queue full (%d), dropping alert email", self._queued)
+            return False
+        self._start()
+        items = self._pending.get(recipient)
+        if items is None:
+            items = self._pending[recipient] = []
+            asyncio.get_running_loop().call_later(self.digest_seconds, self._release, recipient)
+        items.append((subject, body))
+        self._queued += 1
+        return True
+
+    def _start(self) -> None:
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._outbox = asyncio.Queue()
+        self._connections = [SMTPConnection(self.server) for _ in range(self.pool_size)]
+        self._tasks = [loop.create_task(self._deliver(connection)) for connection in self._connections]
+
+    def _release(self, recipient: str) -> None:
+        items = self._pending.pop(recipient, None)
+        if items:
+            self._outbox.put_nowait((recipient, items, 0))
+
+    def compose(self, recipient: str, items: List[Tuple[str, str]]) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = formataddr((MAIL_FROM_NAME, self.sender))
+        message["To"] = recipient
+        if len(items) == 1:
+            subject, body = items[0]
+            message["Subject"] = header_text(subject)
+        else:
+            message["Subject"] = f"{len(items)} DeepGuard alerts"
+            body = "<hr>".join(f"<h3>{html.escape(subject)}</h3>{body}" for subject, body in items)
+        message.set_content(body, subtype="html")
+        return message
+
+    async def _deliver(self, connection: SMTPConnection) -> None:
+        while True:
+            recipient, items, attempt = await self._outbox.get()
+            try:
+                message = self.compose(recipient, items)
+                await asyncio.to_thread(connection.send, message)
+            except (smtplib.SMTPException, OSError) as e:
+                if attempt >= self.max_retries or _is_permanent(e):
+                    self._give_up(items, attempt, e)
+                else:
+                    delay = self.retry_base_seconds * 2 ** attempt * random.uniform(0.5, 1.5)
+                    self.retries += 1
+                    logger.warning("Alert email failed, retrying in %.1f s: %s", delay, e)
+                    self._retry_later(delay, (recipient, items, attempt + 1))
+            except Exception as e:
+                # e.g. a message compose() rejects: retrying won't help, and
+                # this sender task must survive it
+                self._give_up(items, attempt, e)
+            else:
+                self.sent += len(items)
+                self.emails += 1
+                self._queued -= len(items)
+            finally:
+                self._outbox.task_done()
+
+    def _give_up(self, items: List[Tuple[str, str]], attempt: int, error: Exception) -> None:
+        self.failed += len(items)
+        self._queued -= len(items)
+        logger.error("Alert email with %d alerts failed after %d attempts: %s", len(items), attempt + 1, error)
+
+    def _retry_later(self, delay: float, job: Tuple[str, List[Tuple[str, str]], int]) -> None:
+        retry_id = next(self._retry_ids)
+        handle = asyncio.get_running_loop().call_later(delay, self._retry_now, retry_id)
+        self._backing_off[retry_id] = (handle, job)
+
+    def _retry_now(self, retry_id: int) -> None:
+        entry = self._backing_off.pop(retry_id, None)
+        if entry is not None:
+            entry[0].cancel()
+            self._outbox.put_nowait(entry[1])
+
+    async def flush(self) -> None:
+        """
+        Sends everything buffered now, without waiting out the digest windows
+        or retry backoff; returns once every alert is sent or given up on.
+        """
+        if not self._tasks:
+            return
+        for recipient in list(self._pending):
+            self._release(recipient)
+        while True:
+            for retry_id in list(self._backing_off):
+                self._retry_now(retry_id)
+            await self._outbox.join()
+            if not self._backing_off:
+                break
+
+    async def close(self) -> None:
+        await self.flush()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for connection in self._connections:
+            await asyncio.to_thread(connection.close)
+        self._connections = []
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "enabled": self.enabled,
+            "queued": self._queued,
+            "alerts_sent": self.sent,
+            "emails_sent": self.emails,
+            "retries": self.retries,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+async def send_email(email: EmailSchema, background_tasks: Optional[BackgroundTasks] = None) -> bool:
+    # background_tasks is no longer needed: delivery runs on the alert mailer
+    return alert_mailer.enqueue(email.email, email.subject, email.body)
+
+
+# One per worker process
+alert_mailer = AlertMailer(
+    MailServer(
+        MAIL_SERVER, MAIL_PORT, MAIL_USERNAME, MAIL_PASSWORD,
+        starttls=MAIL_STARTTLS, use_ssl=MAIL_SSL, timeout=MAIL_TIMEOUT_SECONDS,
+    ) if MAIL_SERVER and MAIL_PORT else None,
+    sender=MAIL_FROM,
+    pool_size=MAIL_POOL_SIZE,
+    digest_seconds=MAIL_DIGEST_SECONDS,
+    max_retries=MAIL_MAX_RETRIES,
+    retry_base_seconds=MAIL_RETRY_BASE_SECONDS,
+    queue_size=MAIL_QUEUE_SIZE,
+)
@@ -0,0 +1,156 @@
+# src/services/overload.py
+
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import Enum
+from typing import Deque, Dict, Any, Iterator, List, Optional
+
+from src.core.config import settings
+from src.utils.logging import logger
+
+
+class ServiceMode(str, Enum):
+    """Service levels, from best quality to cheapest."""
+    FULL = "full"                # every model runs
+    DEGRADED = "degraded"        # keyword-only text, sparser video sampling
+    CACHED_ONLY = "cached_only"  # media answered from cache only
+
+
+_LEVELS = [ServiceMode.FULL, ServiceMode.DEGRADED, ServiceMode.CACHED_ONLY]
+
+
+class OverloadController:
+    """
+    Watches inference queue depth and recent queue wait (how long work sat
+    in the scheduler before starting, so a long video does not count as
+    congestion) and steps the service down one mode at a time while either
+    is above its high-water mark; the wait only counts once the window holds
+    `min_samples` of them. It only steps back up once both are below their low-water marks and
+    the mode has held for `cooldown_seconds` (hysteresis against flapping).
+    """
+
+    def __init__(
+        self,
+        queue_high: int,
+        queue_low: int,
+        latency_high_ms: float,
+        latency_low_ms: float,
+        cooldown_seconds: float,
+        window: int = 64,
+        min_samples: int = 8,
+    ):
+        self.queue_high = queue_high
+        self.queue_low = queue_low
+        self.latency_high_ms = latency_high_ms
+        self.latency_low_ms = latency_low_ms
+        self.cooldown_seconds = cooldown_seconds
+        self.min_samples = min_samples
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._depth = 0
+        self._level = 0
+        self._changed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def mode(self) -> ServiceMode:
+        return _LEVELS[self._level]
+
+    @property
+    def queue_depth(self) -> int:
+        return self._depth
+
+    def recent_latency_ms(self) -> float:
+        """95th percentile of the latency window (0 when empty)."""
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def enter(self) -> ServiceMode:
+        """Registers queued work; returns the mode the work should run under."""
+        with self._lock:
+            self._depth += 1
+            self._evaluate()
+            return self.mode
+
+    def exit(self, latency_ms: float) -> None:
+        """Registers finished work; latency_ms is how long it waited to start."""
+        with self._lock:
+            self._depth -= 1
+            self._latencies.append(latency_ms)
+            self._evaluate()
+
+    def _evaluate(self) -> None:
+        now = time.monotonic()
+        latency = self.recent_latency_ms() if len(self._latencies) >= self.min_samples else 0.0
+        settled = now - self._changed_at >= self.cooldown_seconds
+        overloaded = self._depth >= self.queue_high or latency >= self.latency_high_ms
+        relaxed = self._depth <= self.queue_low and latency <= self.latency_low_ms
+
+        if overloaded and self._level < len(_LEVELS) - 1 and (self._level == 0 or settled):
+            self._set_level(self._level + 1, now, latency)
+        elif relaxed and self._level > 0 and settled:
+            self._set_level(self._level - 1, now, latency)
+
+    def _set_level(self, level: int, now: float, latency: float) -> None:
+        previous = self.mode
+        self._level = level
+        self._changed_at = now
+        # Judge each mode on its own latencies, not those of the previous one
+        self._latencies.clear()
+        logger.warning(
+            "Service mode %s -> %s (queue depth %d, p95 latency %.0f ms)",
+            previous.value, self.mode.value, self._depth, latency,
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode.value,
+            "queue_depth": self._depth,
+            "p95_latency_ms": round(self.recent_latency_ms(), 1),
+        }
+
+
+# One controller per worker process
+overload_controller = OverloadController(
+    queue_high=settings.OVERLOAD_QUEUE_HIGH,
+    queue_low=settings.OVERLOAD_QUEUE_LOW,
+    latency_high_ms=settings.OVERLOAD_LATENCY_HIGH_MS,
+    latency_low_ms=settings.OVERLOAD_LATENCY_LOW_MS,
+    cooldown_seconds=settings.OVERLOAD_COOLDOWN_SECONDS,
+    min_samples=settings.OVERLOAD_MIN_SAMPLES,
+)
+
+
+# Modes the current request's inference ran under (None: not tracked)
+_request_modes: contextvars.ContextVar = contextvars.ContextVar("request_modes", default=None)
+
+
+@contextmanager
+def track_request_modes() -> Iterator[List[ServiceMode]]:
+    """Collects the modes inference ran under while handling one request."""
+    modes: List[ServiceMode] = []
+    token = _request_modes.set(modes)
+    try:
+        yield modes
+    finally:
+        _request_modes.reset(token)
+
+
+def note_request_mode(mode: ServiceMode) -> None:
+    modes = _request_modes.get()
+    if modes is not None:
+        modes.append(mode)
+
+
+def lowest_mode(modes: List[ServiceMode]) -> Optional[ServiceMode]:
+    """The cheapest of `modes` (None when empty)."""
+    return max(modes, key=_LEVELS.index) if modes else None
+
+
+def request_mode() -> ServiceMode:
+    """The cheapest mode the current request's inference ran under so far, or the current mode."""
+    return lowest_mode(_request_modes.get() or []) or overload_controller.mode
@@ -0,0 +1,95 @@
+# src/services/reputation.py
+
+import time
+from typing import Optional
+
+import numpy as np
+
+from src.core.config import settings
+
+
+class DecayingCountMinSketch:
+    """
+    Approximate, exponentially decaying counts for an unbounded set of keys
+    in a fixed `depth` x `width` table. Estimates never undercount; they
+    overcount only when keys collide in every row.
+
+    Decay is lazy (forward decay): increments are scaled up by
+    2 ** (age / half_life) instead of decaying every cell, and estimates
+    are scaled back down. The table is renormalized once the scale grows
+    large, so the cost per update stays constant.
+    """
+
+    _RENORMALIZE_AT = 2.0 ** 64
+
+    def __init__(self, width: int, depth: int, half_life_seconds: float):
+        self.width = width
+        self.depth = depth
+        self.half_life = half_life_seconds
+        self._cells = np.zeros((depth, width), dtype=np.float64)
+        self._rows = np.arange(depth)
+        self._origin: Optional[float] = None
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._cells.nbytes
+
+    def _columns(self, key: object) -> np.ndarray:
+        # Double hashing: depth indices from one 64-bit hash
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return (h1 + self._rows * h2) % self.width
+
+    def _scale(self, now: float) -> float:
+        if self._origin is None:
+            self._origin = now
+        scale = 2.0 ** ((now - self._origin) / self.half_life)
+        if scale >= self._RENORMALIZE_AT:
+            self._cells /= scale
+            self._origin = now
+            scale = 1.0
+        return scale
+
+    def add(self, key: object, weight: float = 1.0, now: Optional[float] = None) -> float:
+        """Adds `weight` for key and returns its decayed count, including this addition."""
+        scale = self._scale(time.monotonic() if now is None else now)
+        columns = self._columns(key)
+        current = self._cells[self._rows, columns]
+        # Conservative update: only raise the cells that define the estimate
+        estimate = current.min() + weight * scale
+        self._cells[self._rows, columns] = np.maximum(current, estimate)
+        return estimate / scale
+
+    def estimate(self, key: object, now: Optional[float] = None) -> float:
+        scale = self._scale(time.monotonic() if now is None else now)
+        return self._cells[self._rows, self._columns(key)].min() / scale
+
+
+class SenderReputation:
+    """
+    Recent harassment per (device_id, sender), in bounded memory. Each
+    flagged message adds one; counts halve every `half_life_seconds`.
+    Every `repeats_per_level` recent messages escalate severity one level.
+    """
+
+    def __init__(self, width: int, depth: int, half_life_seconds: float, repeats_per_level: float):
+        self.sketch = DecayingCountMinSketch(width, depth, half_life_seconds)
+        self.repeats_per_level = repeats_per_level
+
+    def record_harassment(self, device_id: str, sender: str) -> float:
+        """Counts one flagged message; returns the sender's recent count."""
+        return self.sketch.add((device_id, sender))
+
+    def escalation_levels(self, recent_count: float) -> int:
+        # recent_count includes the message being scored; only earlier ones escalate it.
+        # The tolerance keeps a few ms of decay from undoing a whole repeat.
+        return int((max(0.0, recent_count - 1) + 1e-3) // self.repeats_per_level)
+
+
+# One per worker process
+sender_reputation = SenderReputation(
+    width=settings.REPUTATION_SKETCH_WIDTH,
+    depth=settings.REPUTATION_SKETCH_DEPTH,
+    half_life_seconds=settings.REPUTATION_HALF_LIFE_SECONDS,
+    repeats_per_level=settings.ESCALATION_REPEATS_PER_LEVEL,
+)
@@ -0,0 +1,127 @@
+# src/services/scheduler.py
+
+import contextvars
+import threading
+from collections import deque
+from concurrent.futures import Future
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from src.core.config import settings
+from src.services.deadline import Deadline, deadline_stats
+
+
+class Priority(IntEnum):
+    """Inference lanes; lower value is served first."""
+    INTERACTIVE = 0  # a user is waiting (real-time notification, single upload)
+    BULK = 1         # background deep scans and batch endpoints
+
+
+# (work, its future, the submitter's context, the submitter's deadline)
+_Job = Tuple[Callable[[], Any], Future, contextvars.Context, Optional[Deadline]]
+
+
+class InferenceScheduler:
+    """
+    Runs model calls on a few worker threads, picking the next job by lane.
+
+    "strict" always drains INTERACTIVE before touching BULK. "weighted" serves
+    lanes in proportion to their weights while both have work (e.g. 8:1), so
+    deep scans keep progressing under a steady stream of alerts. Callers split
+    big batches into chunks so an interactive job never waits behind more than
+    one chunk per thread.
+
+    Jobs run in the caller's context (so they see its request deadline), and
+    a job whose deadline has passed, or whose future was cancelled, is
+    dropped when its turn comes instead of being run.
+    """
+
+    def __init__(self, threads: int, policy: str, weights: Dict[Priority, int]):
+        if policy not in ("strict", "weighted"):
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+        self.policy = policy
+        self.weights = {lane: max(1, weights.get(lane, 1)) for lane in Priority}
+        self._credits = dict(self.weights)
+        self._lanes: Dict[Priority, Deque[_Job]] = {lane: deque() for lane in Priority}
+        self._completed = {lane: 0 for lane in Priority}
+        self._dropped = {lane: 0 for lane in Priority}
+        self._cond = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"inference-{i}", daemon=True)
+            for i in range(max(1, threads))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn: Callable[[], Any], priority: Priority = Priority.INTERACTIVE,
+               deadline: Optional[Deadline] = None) -> Future:
+        future: Future = Future()
+        context = contextvars.copy_context()
+        with self._cond:
+            self._lanes[priority].append((fn, future, context, deadline))
+            self._cond.notify()
+        return future
+
+    def _next_lane(self) -> Optional[Priority]:
+        ready = [lane for lane in Priority if self._lanes[lane]]
+        if not ready:
+            return None
+        if self.policy == "strict":
+            return ready[0]
+
+        # Weighted round robin: spend credits highest-priority first and
+        # refill every lane once the ready ones have used theirs up
+        if all(self._credits[lane] == 0 for lane in ready):
+            self._credits = dict(self.weights)
+        lane = next(lane for lane in ready if self._credits[lane] > 0)
+        self._credits[lane] -= 1
+        return lane
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                lane = self._next_lane()
+                while lane is None:
+                    self._cond.wait()
+                    lane = self._next_lane()
+                fn, future, context, deadline = self._lanes[lane].popleft()
+            if not future.set_running_or_notify_cancel():
+                self._drop(lane, deadline)
+                continue
+            if deadline is not None and deadline.done():
+                future.set_exception(deadline.error())
+                self._drop(lane, deadline)
+                continue
+            try:
+                future.set_result(context.run(fn))
+            except BaseException as e:
+                future.set_exception(e)
+            with self._cond:
+                self._completed[lane] += 1
+
+    def _drop(self, lane: Priority, deadline: Optional[Deadline]) -> None:
+        with self._cond:
+            self._dropped[lane] += 1
+        if deadline is not None:
+            deadline_stats.add("dropped_queued")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "policy": self.policy,
+                "weights": {lane.name.lower(): w for lane, w in self.weights.items()},
+                "queued": {lane.name.lower(): len(q) for lane, q in self._lanes.items()},
+                "completed": {lane.name.lower(): n for lane, n in self._completed.items()},
+                "dropped": {lane.name.lower(): n for lane, n in self._dropped.items()},
+            }
+
+
+# One scheduler per worker process
+scheduler = InferenceScheduler(
+    threads=settings.INFERENCE_THREADS,
+    policy=settings.SCHEDULER_POLICY,
+    weights={
+        Priority.INTERACTIVE: settings.SCHEDULER_INTERACTIVE_WEIGHT,
+        Priority.BULK: settings.SCHEDULER_BULK_WEIGHT,
+    },
+)
@@ -0,0 +1,176 @@
+# src/services/sender_lists.py
+
+import asyncio
+import hashlib
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.core.config import settings
+from src.utils.bloom import BloomFilter
+
+ALLOW = "allow"
+BLOCK = "block"
+# Checked in this order: a sender on both lists is blocked
+LISTS = (BLOCK, ALLOW)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sender_lists (
+    device_id TEXT NOT NULL,
+    list TEXT NOT NULL,
+    sender_key BLOB NOT NULL,
+    PRIMARY KEY (device_id, list, sender_key)
+) WITHOUT ROWID;
+"""
+
+# A device's compiled lists: list name -> Bloom filter (None if the list is empty)
+_Compiled = Dict[str, Optional[BloomFilter]]
+
+
+def sender_key(sender: str) -> bytes:
+    """Senders are matched case-insensitively and stored only as this hash."""
+    return hashlib.blake2b(sender.strip().casefold().encode(), digest_size=16).digest()
+
+
+class SenderLists:
+    """
+    Per-device allow and block lists of senders. The exact lists live in
+    SQLite, keyed by (device_id, list, sender_key); each worker keeps them
+    compiled into one fixed-size Bloom filter per list, so memory per device
+    is constant however long its lists are.
+
+    A Bloom miss (the common case) answers "on neither list" without I/O;
+    only a hit is confirmed with one keyed read, so a false positive never
+    skips or blocks a message. Compiled lists are refreshed from the
+    database every `refresh_seconds`, which is how an upload handled by
+    another worker reaches this one. Used from the event loop only.
+    """
+
+    def __init__(self, path: str, max_entries: int, error_rate: float,
+                 cache_devices: int, refresh_seconds: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.error_rate = error_rate
+        self.cache_devices = cache_devices
+        self.refresh_seconds = refresh_seconds
+        self._compiled: "OrderedDict[str, Tuple[_Compiled, float]]" = OrderedDict()
+        self._initialized = False
+        self.hits = {ALLOW: 0, BLOCK: 0}
+        self.false_positives = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _compile(self, lists: Dict[str, Iterable[bytes]]) -> _Compiled:
+        compiled: _Compiled = {}
+        for name in LISTS:
+            keys = list(lists.get(name, ()))
+            bloom = BloomFilter(self.max_entries, self.error_rate) if keys else None
+            for key in keys:
+                bloom.add(key)
+            compiled[name] = bloom
+        return compiled
+
+    def _store(self, device_id: str, lists: Dict[str, List[bytes]]) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM sender_lists WHERE device_id = ?", (device_id,))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO sender_lists (device_id, list, sender_key) VALUES (?, ?, ?)",
+                    [(device_id, name, key) for name, keys in lists.items() for key in keys],
+                )
+        finally:
+            conn.close()
+
+    def _load(self, device_id: str) -> _Compiled:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT list, sender_key FROM sender_lists WHERE device_id = ?", (device_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        lists: Dict[str, List[bytes]] = {}
+        for name, key in rows:
+            lists.setdefault(name, []).append(key)
+        return self._compile(lists)
+
+    def _confirm(self, device_id: str, name: str, key: bytes) -> bool:
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT 1 FROM sender_lists WHERE device_id = ? AND list = ? AND sender_key = ?",
+                (device_id, name, key),
+            ).fetchone() is not None
+        finally:
+            conn.close()
+
+    def _cache(self, device_id: str, compiled: _Compiled, now: float) -> None:
+        self._compiled[device_id] = (compiled, now)
+        self._compiled.move_to_end(device_id)
+        while len(self._compiled) > self.cache_devices:
+            self._compiled.popitem(last=False)
+
+    async def replace(self, device_id: str, allow: List[str], block: List[str]) -> Dict[str, int]:
+        """Replaces both of a device's lists; returns how many distinct senders each holds."""
+        lists = {ALLOW: sorted({sender_key(s) for s in allow}), BLOCK: sorted({sender_key(s) for s in block})}
+        for name, keys in lists.items():
+            if len(keys) > self.max_entries:
+                raise ValueError(f"The {name} list has {len(keys)} senders; the limit is {self.max_entries}")
+        await asyncio.to_thread(self._store, device_id, lists)
+        self._cache(device_id, self._compile(lists), time.monotonic())
+        return {name: len(keys) for name, keys in lists.items()}
+
+    async def check(self, device_id: str, sender: str, now: Optional[float] = None) -> Optional[str]:
+        """BLOCK or ALLOW if the sender is on one of the device's lists, else None."""
+        now = time.monotonic() if now is None else now
+        entry = self._compiled.get(device_id)
+        if entry is None or now - entry[1] > self.refresh_seconds:
+            compiled = await asyncio.to_thread(self._load, device_id)
+            self._cache(device_id, compiled, now)
+        else:
+            compiled = entry[0]
+            self._compiled.move_to_end(device_id)
+
+        key = sender_key(sender)
+        for name in LISTS:
+            bloom = compiled[name]
+            if bloom is None or key not in bloom:
+                continue
+            if await asyncio.to_thread(self._confirm, device_id, name, key):
+                self.hits[name] += 1
+                return name
+            self.false_positives += 1
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "allow_hits": self.hits[ALLOW],
+            "block_hits": self.hits[BLOCK],
+            "bloom_false_positives": self.false_positives,
+            "cached_devices": len(self._compiled),
+            "bloom_bytes": sum(
+                bloom.memory_bytes
+                for compiled, _ in self._compiled.values()
+                for bloom in compiled.values()
+                if bloom is not None
+            ),
+        }
+
+
+# One per worker process; workers share the database file
+sender_lists = SenderLists(
+    settings.SENDER_LISTS_DB,
+    max_entries=settings.SENDER_LIST_MAX_ENTRIES,
+    error_rate=settings.SENDER_LIST_ERROR_RATE,
+    cache_devices=settings.SENDER_LIST_CACHE_DEVICES,
+    refresh_seconds=settings.SENDER_LIST_REFRESH_SECONDS,
+)
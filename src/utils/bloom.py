@@ -0,0 +1,80 @@
+import hashlib
+import math
+import time
+from typing import Optional
+
+
+def _digest(item: bytes) -> bytes:
+    return hashlib.blake2b(item, digest_size=16).digest()
+
+
+class BloomFilter:
+    """
+    Fixed-size set membership test: "maybe present" or "definitely absent".
+    Sized for `capacity` items at `error_rate` false positives; k bit
+    positions per item come from one 128-bit blake2b digest (double hashing).
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: bytes):
+        digest = _digest(item)
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: bytes) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: bytes) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+
+class RotatingBloomFilter:
+    """
+    Bloom filter over a sliding time window: a current and a previous
+    generation, rotated every `window_seconds`, or earlier once the current
+    one holds `capacity` items. An item stays visible for at most twice
+    `window_seconds`; for at least `window_seconds` only while fewer than
+    `capacity` items arrive per window, otherwise for at least the last
+    `capacity` items added. Memory stays at two fixed-size filters.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, window_seconds: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.window_seconds = window_seconds
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = BloomFilter(capacity, error_rate)
+        self._rotated_at: Optional[float] = None
+
+    def _maybe_rotate(self, now: float) -> None:
+        if self._rotated_at is None:
+            self._rotated_at = now
+        if now - self._rotated_at >= self.window_seconds or self._current.count >= self.capacity:
+            self._previous, self._current = self._current, BloomFilter(self.capacity, self.error_rate)
+            self._rotated_at = now
+
+    def add(self, item: bytes, now: Optional[float] = None) -> None:
+        self._maybe_rotate(time.monotonic() if now is None else now)
+        self._current.add(item)
+
+    def contains(self, item: bytes, now: Optional[float] = None) -> bool:
+        self._maybe_rotate(time.monotonic() if now is None else now)
+        return item in self._current or item in self._previous
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._current.memory_bytes + self._previous.memory_bytes
@@ -1,17 +1,181 @@
+import atexit
+import contextvars
+import json
 import logging
 import os
+import queue
+import random
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterator, Optional
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 LOG_FILE = os.getenv("LOG_FILE", "app.log")
+# "json" (one object per line) or "text" (LOG_FORMAT)
+LOG_OUTPUT = os.getenv("LOG_OUTPUT", "json").lower()
+# Records waiting for the writer thread; beyond this they are dropped, not waited on
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Per-route sampling of INFO/DEBUG lines, e.g.
+# "/api/v1/mobile/analyze-notification=0.01,/api/v1/mobile=0.1" (longest prefix wins).
+# Warnings and errors are always kept.
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+LOG_SAMPLE_DEFAULT = float(os.getenv("LOG_SAMPLE_DEFAULT", "1.0"))
+# Structured fields that carry user content; their values are never written
+LOG_REDACT_FIELDS = os.getenv("LOG_REDACT_FIELDS", "message_text,content,text,messages,sender")
 
-logging.basicConfig(
-    level=LOG_LEVEL,
-    format=LOG_FORMAT,
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+
+def _parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for part in spec.split(","):
+        prefix, sep, rate = part.strip().partition("=")
+        if sep:
+            rates[prefix.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+_sample_rates = _parse_sample_rates(LOG_SAMPLE_RATES)
+_redacted_fields = frozenset(name.strip() for name in LOG_REDACT_FIELDS.split(",") if name.strip())
+
+# (route, sampled) of the request being handled in this task
+_request_context: contextvars.ContextVar = contextvars.ContextVar("log_request_context", default=None)
+
+
+def sample_rate(route: str) -> float:
+    best = None
+    for prefix in _sample_rates:
+        if route.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return _sample_rates[best] if best is not None else LOG_SAMPLE_DEFAULT
+
+
+@contextmanager
+def request_log_context(route: str) -> Iterator[None]:
+    """
+    Tags log records with the route and decides once per request whether its
+    INFO/DEBUG lines are kept, so a sampled request is logged in full.
+    """
+    rate = sample_rate(route)
+    token = _request_context.set((route, rate >= 1.0 or random.random() < rate))
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+
+def redact(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Replaces user content with its length; other fields pass through."""
+    return {
+        name: f"[redacted {len(value) if hasattr(value, '__len__') else 1}]" if name in _redacted_fields else value
+        for name, value in fields.items()
+    }
+
+
+class _SamplingFilter(logging.Filter):
+    """Drops unsampled INFO/DEBUG records in the calling task, before they are queued."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _request_context.get()
+        if context is not None:
+            record.route = context[0]
+            if record.levelno < logging.WARNING and not context[1]:
+                return False
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread without formatting them: the message
+    is only rendered (getMessage) by the formatter on that thread.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            # Tracebacks must be captured while the exception is still live
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            type(self).dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra={"fields": {...}} is merged in, redacted."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        route = getattr(record, "route", None)
+        if route:
+            entry["route"] = route
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(redact(fields))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        return f"{line} {redact(fields)}" if fields else line
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Wait for room rather than failing on a full queue at shutdown
+        self.queue.put(self._sentinel)
+
+
+_listener: Optional[QueueListener] = None
+
+
+def _start_listener() -> None:
+    """(Re)creates the writer thread; also called in forked children, which don't inherit it."""
+    global _listener
+    formatter = JsonFormatter() if LOG_OUTPUT == "json" else _TextFormatter(LOG_FORMAT)
+    handlers = [logging.FileHandler(LOG_FILE), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = _NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(_SamplingFilter())
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = _Listener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener() -> None:
+    # Flushes whatever is still queued
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+_start_listener()
+atexit.register(_stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_start_listener)
 
 logger = logging.getLogger(__name__)
@@ -1,3 +1,8 @@
+import os
+import tempfile
+from typing import List
+
+import cv2
 from PIL import Image
 import numpy as np
 
@@ -10,4 +15,27 @@ def preprocess_image(pil_image: Image.Image, size=(224, 224)):
 def preprocess_video_frame(frame: np.ndarray, size=(224, 224)):
     """Resize and normalize a video frame."""
     frame_resized = cv2.resize(frame, size)
-    return frame_resized / 255.0
\ No newline at end of file
+    return frame_resized / 255.0
+
+def extract_video_frames(video_bytes: bytes, max_frames: int) -> List[Image.Image]:
+    """Decode up to max_frames frames, evenly spaced across the video, as RGB images."""
+    # OpenCV can only open containers from a file path
+    with tempfile.NamedTemporaryFile(suffix=".video", delete=False) as tmp:
+        tmp.write(video_bytes)
+        path = tmp.name
+    try:
+        capture = cv2.VideoCapture(path)
+        total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or max_frames
+        step = max(1, total // max(1, max_frames))
+        frames = []
+        index = 0
+        while len(frames) < max_frames and capture.grab():
+            if index % step == 0:
+                ok, frame = capture.retrieve()
+                if ok:
+                    frames.append(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+            index += 1
+        capture.release()
+        return frames
+    finally:
+        os.remove(path)
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from src.api.admission import AdmissionMiddleware
+from src.core.config import settings
+from src.services.admission import AdmissionController, TokenBucketTable
+
+
+def _controller(**overrides):
+    options = dict(device_rate=1.0, device_burst=5.0, user_rate=10.0, user_burst=8.0,
+                   max_entries=100, prune_interval=60.0)
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+def test_bucket_refills_at_rate():
+    buckets = TokenBucketTable(rate=2.0, burst=4.0, max_entries=10)
+    buckets.consume("d1", 4, now=0.0)
+
+    assert buckets.wait_time("d1", 1, now=0.0) == 0.5
+    assert buckets.wait_time("d1", 1, now=0.5) == 0.0
+    assert buckets.wait_time("d1", 4, now=0.5) == 1.5
+
+
+def test_cost_above_burst_is_capped():
+    """A maximal batch is admissible from a full bucket instead of never"""
+    buckets = TokenBucketTable(rate=1.0, burst=4.0, max_entries=10)
+
+    assert buckets.wait_time("d1", 50, now=0.0) == 0.0
+
+
+def test_prune_drops_full_buckets_and_table_is_bounded():
+    buckets = TokenBucketTable(rate=1.0, burst=2.0, max_entries=3)
+    for i in range(5):
+        buckets.consume(f"d{i}", 1, now=0.0)
+    assert len(buckets) == 3
+
+    buckets.prune(now=10.0)
+    assert len(buckets) == 0
+
+
+def test_device_throttled_independently_of_other_devices():
+    admission = _controller()
+
+    assert admission.admit("d1", "user:alice", cost=5, now=0.0) == 0.0
+    assert admission.admit("d1", "user:alice", cost=1, now=0.0) == 1.0
+    assert admission.admit("d2", "user:alice", cost=1, now=0.0) == 0.0
+    snapshot = admission.snapshot()
+    assert snapshot["admitted"] == 2
+    assert snapshot["throttled_device"] == 1
+
+
+def test_user_limit_spans_devices_and_rejection_charges_nothing():
+    admission = _controller()
+    admission.admit("d1", "user:alice", cost=5, now=0.0)
+
+    # d2 has tokens but alice's bucket (8) can't pay 5 more
+    assert admission.admit("d2", "user:alice", cost=5, now=0.0) > 0
+    assert admission.snapshot()["throttled_user"] == 1
+    # ...and d2 was not charged for the rejected request
+    assert admission.devices.wait_time("d2", 5, now=0.0) == 0.0
+
+
+def test_msgpack_batches_are_costed_per_notification():
+    """A MessagePack body is charged like the same batch in JSON"""
+    msgpack = pytest.importorskip("msgpack")
+    batch = {"device_id": "d1", "notifications": [{"device_id": "d1", "message_text": f"m{i}"} for i in range(7)]}
+
+    assert AdmissionMiddleware._msgpack_cost(msgpack.packb(batch)) == (7, "d1")
+    assert AdmissionMiddleware._json_cost(json.dumps(batch).encode()) == (7, "d1")
+
+
+def test_undecodable_msgpack_is_charged_as_a_full_batch():
+    pytest.importorskip("msgpack")
+    assert AdmissionMiddleware._msgpack_cost(b"\xc1garbage")[0] == settings.MOBILE_MAX_BATCH_SIZE
@@ -0,0 +1,53 @@
+import asyncio
+
+from src.services.analytics import AnalyticsStore, ScanAnalytics
+
+
+def _worker(store):
+    return ScanAnalytics(store, flush_seconds=60, recent_size=5)
+
+
+def test_overview_aggregates_all_workers(tmp_path):
+    """Two workers flushing into one store are reported together"""
+    store = AnalyticsStore(str(tmp_path / "analytics.db"), recent_size=5)
+    first, second = _worker(store), _worker(store)
+
+    async def scenario():
+        first.record(True, "critical", "HIGH", "scan_text")
+        first.record(False, "none", "NONE", "scan_text")
+        second.record(True, "high", "MEDIUM", "notification")
+        await first.flush()
+        await second.flush()
+        return await _worker(store).overview()
+
+    overview = asyncio.run(scenario())
+    assert overview["total_scans"] == 3
+    assert overview["threats_detected"] == 2
+    assert overview["safe_messages"] == 1
+    assert overview["current_hour"] == {"scans": 3, "threats": 2}
+    assert [scan["source"] for scan in overview["recent_activity"]] == ["notification", "scan_text", "scan_text"]
+
+
+def test_unflushed_counts_are_included_for_the_local_worker(tmp_path):
+    store = AnalyticsStore(str(tmp_path / "analytics.db"), recent_size=5)
+    worker = _worker(store)
+    worker.record(True, "high", "MEDIUM", "scan_text")
+
+    overview = asyncio.run(worker.overview())
+    assert overview["total_scans"] == 1
+    assert overview["current_minute"] == {"scans": 0, "threats": 0}  # not flushed yet
+
+
+def test_recent_scans_are_bounded(tmp_path):
+    store = AnalyticsStore(str(tmp_path / "analytics.db"), recent_size=5)
+    worker = _worker(store)
+
+    async def scenario():
+        for _ in range(3):
+            for _ in range(4):
+                worker.record(False, "none", "NONE", "scan_text")
+            await worker.flush()
+
+    asyncio.run(scenario())
+    assert len(store.overview(recent_limit=100)["recent"]) == 5
+    assert store.overview()["totals"] == (12, 0)
@@ -1,6 +1,8 @@
 import pytest
 from fastapi.testclient import TestClient
+from PIL import Image
 from src.main import app
+from src.services.notification import MailServer, SMTPConnection, alert_mailer
 
 client = TestClient(app)
 
@@ -25,4 +27,63 @@ def test_analyze_media_unsupported_file():
     with open("path/to/test_file.txt", "rb") as text_file:
         response = client.post("/analyze_media", files={"file": text_file})
     assert response.status_code == 400
-    assert response.json()["detail"] == "Unsupported file type"
\ No newline at end of file
+    assert response.json()["detail"] == "Unsupported file type"
+
+
+def test_shutdown_sends_alerts_still_in_their_digest_window(monkeypatch):
+    sent = []
+    monkeypatch.setattr(SMTPConnection, "send", lambda self, message: sent.append(message["Subject"]))
+    monkeypatch.setattr(alert_mailer, "server", MailServer("mail.invalid", 25))
+    monkeypatch.setattr(alert_mailer, "digest_seconds", 3600)
+
+    async def enqueue():
+        alert_mailer.enqueue("parent@example.com", "Alert", "<p>x</p>")
+
+    with TestClient(app) as running:
+        running.portal.call(enqueue)
+        assert sent == []
+    assert sent == ["Alert"]
+
+
+def _headers():
+    login_response = client.post("/api/v1/token", data={"username": "johndoe", "password": "secret"})
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+
+def _image(path):
+    Image.new("RGB", (32, 32), "red").save(path)
+    return str(path)
+
+
+def test_batch_keeps_the_order_of_mixed_items(tmp_path):
+    items = [
+        {"type": "harassment", "content": "Hello there!"},
+        {"type": "deepfake", "content": _image(tmp_path / "a.png")},
+        {"type": "harassment", "content": "You're pathetic and should disappear!"},
+        {"type": "deepfake", "content": _image(tmp_path / "b.png")},
+    ]
+    response = client.post("/api/v1/analyze/batch", json={"items": items}, headers=_headers())
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["success"] for result in results] == [True] * 4
+    assert [result["message"] for result in results] == [f"{item['type']} analysis completed" for item in items]
+    for item, result in zip(items, results):
+        # Each result carries the analysis of its own item's type
+        other = "deepfake" if item["type"] == "harassment" else "harassment"
+        assert result["result"][item["type"]] is not None and result["result"][other] is None
+    assert set(response.json()["group_ms"]) == {"deepfake", "harassment"}
+
+
+def test_batch_reports_a_failing_item_in_place(tmp_path):
+    items = [
+        {"type": "deepfake", "content": _image(tmp_path / "a.png")},
+        {"type": "deepfake", "content": str(tmp_path / "missing.png")},
+        {"type": "harassment", "content": "Hello there!"},
+    ]
+    response = client.post("/api/v1/analyze/batch", json={"items": items}, headers=_headers())
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["success"] for result in results] == [True, False, True]
+    assert "Cannot read file" in results[1]["message"] and results[1]["result"] == {}
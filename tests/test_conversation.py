@@ -0,0 +1,48 @@
+from src.services.conversation import ConversationTracker
+
+
+def _tracker(**overrides):
+    options = dict(max_threads=100, idle_seconds=60, decay=0.8, keyword_window=4)
+    options.update(overrides)
+    return ConversationTracker(**options)
+
+
+def test_mild_messages_accumulate_into_a_hostile_thread():
+    tracker = _tracker()
+    key = ("d1", "bob", "SMS")
+    scores = [tracker.update(key, 0.35, ["ugly"], now=float(i))["thread_score"] for i in range(5)]
+
+    assert abs(scores[0] - 0.35) < 1e-9
+    assert scores == sorted(scores)
+    assert scores[-1] > 0.7
+
+
+def test_benign_messages_let_the_thread_score_fade():
+    tracker = _tracker()
+    key = ("d1", "bob", "SMS")
+    hostile = tracker.update(key, 0.9, ["kill"], now=0.0)["thread_score"]
+    for i in range(10):
+        calm = tracker.update(key, 0.0, now=float(i + 1))
+
+    assert calm["thread_score"] < hostile / 2
+    assert calm["thread_messages"] == 11
+    assert calm["thread_keywords"] == ["kill"]
+
+
+def test_threads_are_separate_and_bounded():
+    tracker = _tracker(max_threads=2)
+    tracker.update(("d1", "bob", "SMS"), 0.9, now=0.0)
+    tracker.update(("d1", "bob", "WhatsApp"), 0.0, now=1.0)
+    tracker.update(("d1", "carol", "SMS"), 0.0, now=2.0)
+
+    assert len(tracker) == 2
+    # The oldest thread was evicted, so bob's SMS thread starts over
+    assert tracker.update(("d1", "bob", "SMS"), 0.0, now=3.0)["thread_messages"] == 1
+
+
+def test_idle_threads_are_evicted():
+    tracker = _tracker(idle_seconds=10)
+    tracker.update(("d1", "bob", "SMS"), 0.5, now=0.0)
+    tracker.update(("d1", "carol", "SMS"), 0.5, now=100.0)
+
+    assert len(tracker) == 1
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.api.deadline import DeadlineMiddleware
+from src.services.deadline import (
+    Deadline, DeadlineExceeded, RequestCancelled, current_deadline, deadline_stats,
+)
+from src.services.scheduler import InferenceScheduler, Priority
+
+
+def test_wait_gives_up_at_the_deadline_and_cancels_the_work():
+    async def run():
+        future = asyncio.get_running_loop().create_future()
+        with pytest.raises(DeadlineExceeded):
+            await Deadline(0.05).wait(future)
+        return future.cancelled()
+
+    assert asyncio.run(run())
+
+
+def test_cancel_wakes_the_waiter():
+    async def run():
+        deadline = Deadline(None)
+        future = asyncio.get_running_loop().create_future()
+        asyncio.get_running_loop().call_later(0.05, deadline.cancel)
+        with pytest.raises(RequestCancelled):
+            await deadline.wait(future)
+
+    asyncio.run(run())
+
+
+def test_scheduler_drops_jobs_whose_deadline_passed():
+    scheduler = InferenceScheduler(threads=1, policy="strict", weights={})
+    release = threading.Event()
+    blocker = scheduler.submit(release.wait)
+    ran = []
+    expired = Deadline(0.01)
+    late = scheduler.submit(lambda: ran.append("late"), Priority.INTERACTIVE, expired)
+    on_time = scheduler.submit(lambda: ran.append("on time"), Priority.INTERACTIVE, Deadline(60))
+    dropped_before = deadline_stats.snapshot()["dropped_queued"]
+    time.sleep(0.05)
+    release.set()
+
+    blocker.result(timeout=5)
+    on_time.result(timeout=5)
+    with pytest.raises(DeadlineExceeded):
+        late.result(timeout=5)
+    assert ran == ["on time"]
+    assert deadline_stats.snapshot()["dropped_queued"] == dropped_before + 1
+    assert scheduler.stats()["dropped"]["interactive"] == 1
+
+
+def test_jobs_see_the_submitters_deadline():
+    from src.services.deadline import request_deadline
+
+    scheduler = InferenceScheduler(threads=1, policy="strict", weights={})
+    deadline = Deadline(60)
+    with request_deadline(deadline):
+        seen = scheduler.submit(current_deadline).result(timeout=5)
+    assert seen is deadline
+
+
+def _middleware(app):
+    return DeadlineMiddleware(app, "/api", {"/slow": 1000.0}, max_ms=5000.0)
+
+
+async def _call(middleware, path, headers=(), messages=None):
+    messages = list(messages or [{"type": "http.request", "body": b"", "more_body": False}])
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": path, "headers": list(headers)}
+    await middleware(scope, receive, send)
+    return sent
+
+
+def test_deadline_comes_from_header_or_route_default():
+    seen = {}
+
+    async def app(scope, receive, send):
+        deadline = current_deadline()
+        seen[scope["path"]] = deadline.remaining() if deadline else None
+
+    async def run():
+        middleware = _middleware(app)
+        await _call(middleware, "/api/slow")
+        await _call(middleware, "/api/other")
+        await _call(middleware, "/api/capped", headers=[(b"x-request-deadline-ms", b"99999")])
+
+    asyncio.run(run())
+    assert 0.9 < seen["/api/slow"] <= 1.0
+    assert seen["/api/other"] is None
+    assert 4.9 < seen["/api/capped"] <= 5.0
+
+
+def test_client_disconnect_cancels_the_deadline():
+    async def app(scope, receive, send):
+        await receive()  # the body
+        pending = asyncio.get_running_loop().create_future()
+        await current_deadline().wait(pending)
+
+    async def run():
+        messages = [{"type": "http.request", "body": b"{}", "more_body": False}, {"type": "http.disconnect"}]
+        with pytest.raises(RequestCancelled):
+            await _call(_middleware(app), "/api/slow", messages=messages)
+
+    before = deadline_stats.snapshot()["client_disconnects"]
+    asyncio.run(run())
+    assert deadline_stats.snapshot()["client_disconnects"] == before + 1
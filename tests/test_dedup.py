@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from src.services.dedup import NotificationDeduplicator, notification_key
+from src.utils.bloom import BloomFilter, RotatingBloomFilter
+
+WHEN = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _dedup(**overrides):
+    options = dict(window_seconds=60, error_rate=0.001, lru_size=100)
+    options.update(overrides)
+    return NotificationDeduplicator(**options)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"item-{i}".encode() for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other-{i}".encode() in bloom for i in range(10000))
+    assert false_positives < 300  # ~1% expected
+
+
+def test_rotating_bloom_forgets_after_two_windows():
+    bloom = RotatingBloomFilter(capacity=100, error_rate=0.001, window_seconds=10)
+    bloom.add(b"x", now=0.0)
+
+    assert bloom.contains(b"x", now=9.0)
+    assert bloom.contains(b"x", now=15.0)  # rotated into the previous generation
+    assert not bloom.contains(b"x", now=25.0)
+
+
+def test_rotating_bloom_keeps_the_last_capacity_items_when_full():
+    bloom = RotatingBloomFilter(capacity=100, error_rate=0.001, window_seconds=10)
+    for i in range(250):
+        bloom.add(f"item-{i}".encode(), now=0.0)
+
+    # Rotated early, twice: only the newest generations are left
+    assert all(bloom.contains(f"item-{i}".encode(), now=0.0) for i in range(150, 250))
+    assert sum(bloom.contains(f"item-{i}".encode(), now=0.0) for i in range(100)) < 5
+
+
+def test_every_remembered_alert_is_found_under_load():
+    dedup = _dedup(lru_size=100)
+    for i in range(1000):
+        dedup.put(f"key-{i}".encode(), i, now=0.0)
+
+    assert [dedup.get(f"key-{i}".encode(), now=1.0) for i in range(900, 1000)] == list(range(900, 1000))
+
+
+def test_key_covers_device_timestamp_and_content():
+    key = notification_key("d1", WHEN, "bob", "SMS", "hello")
+
+    assert key == notification_key("d1", WHEN, "bob", "SMS", "hello")
+    assert key != notification_key("d2", WHEN, "bob", "SMS", "hello")
+    assert key != notification_key("d1", datetime(2026, 1, 1, 12, 0, 1), "bob", "SMS", "hello")
+    assert key != notification_key("d1", WHEN, "bob", "SMS", "hello!")
+
+
+def test_duplicate_within_window_gets_original_alert():
+    dedup = _dedup()
+    key = notification_key("d1", WHEN, "bob", "SMS", "hello")
+    dedup.put(key, "alert-1", now=0.0)
+
+    assert dedup.get(key, now=30.0) == "alert-1"
+    assert dedup.get(key, now=61.0) is None
+    assert dedup.get(notification_key("d1", WHEN, "bob", "SMS", "other"), now=1.0) is None
+
+
+def test_concurrent_copy_waits_for_the_first():
+    dedup = _dedup()
+    key = b"k" * 16
+
+    async def scenario():
+        assert dedup.claim(key) is None
+        waiting = dedup.claim(key)
+        dedup.complete(key, "alert-1")
+        return await waiting
+
+    assert asyncio.run(scenario()) == "alert-1"
+    assert dedup.get(key) == "alert-1"
+
+
+def test_released_claim_fails_waiters_and_is_not_remembered():
+    dedup = _dedup()
+    key = b"k" * 16
+
+    async def scenario():
+        dedup.claim(key)
+        waiting = dedup.claim(key)
+        dedup.release(key, RuntimeError("model down"))
+        with pytest.raises(RuntimeError):
+            await waiting
+        return dedup.claim(key)
+
+    assert asyncio.run(scenario()) is None  # a retry may claim it again
+    assert dedup.get(key) is None
@@ -0,0 +1,75 @@
+import pytest
+import torch
+from transformers import ViTConfig, ViTForImageClassification, ViTImageProcessor
+
+from src.models import deepfake
+from src.models.deepfake import DeepfakeModel, cpu_supports_bf16
+
+
+@pytest.fixture
+def tiny_vit(monkeypatch):
+    """Swaps the hub download for a small randomly initialised ViT"""
+    torch.manual_seed(0)
+    config = ViTConfig(
+        image_size=64, patch_size=16, hidden_size=32, num_hidden_layers=2,
+        num_attention_heads=2, intermediate_size=64, num_labels=4,
+    )
+    model = ViTForImageClassification(config)
+    processor = ViTImageProcessor(size={"height": 64, "width": 64})
+    monkeypatch.setattr(deepfake.AutoModelForImageClassification, "from_pretrained", lambda name: model)
+    monkeypatch.setattr(deepfake.AutoImageProcessor, "from_pretrained", lambda name: processor)
+
+
+def probabilities(model, pixel_values):
+    return torch.softmax(model.predict_logits(pixel_values), dim=1)
+
+
+@pytest.mark.parametrize("compile_mode", ["none", "trace"])
+def test_optimized_fp32_matches_eager(tiny_vit, tmp_path, compile_mode):
+    """Channels-last + inference_mode (+ tracing) leaves fp32 outputs unchanged"""
+    pixel_values = torch.rand(8, 3, 64, 64)
+    expected = probabilities(DeepfakeModel("tiny"), pixel_values)
+
+    optimized = DeepfakeModel("tiny", optimized=True, bf16=False,
+                              compile_mode=compile_mode, cache_dir=str(tmp_path))
+
+    assert torch.allclose(probabilities(optimized, pixel_values), expected, atol=1e-4)
+
+
+@pytest.mark.skipif(not cpu_supports_bf16(), reason="CPU has no native bf16")
+def test_optimized_bf16_probability_drift_is_bounded(tiny_vit, tmp_path):
+    """bf16 autocast may shift probabilities, but only by a small margin"""
+    pixel_values = torch.rand(8, 3, 64, 64)
+    expected = probabilities(DeepfakeModel("tiny"), pixel_values)
+
+    optimized = DeepfakeModel("tiny", optimized=True, bf16=True,
+                              compile_mode="trace", cache_dir=str(tmp_path))
+
+    assert (probabilities(optimized, pixel_values) - expected).abs().max() < 0.02
+
+
+def test_traced_graph_is_cached_on_disk(tiny_vit, tmp_path, monkeypatch):
+    """A restarted model reuses the saved TorchScript graph"""
+    first = DeepfakeModel("tiny", optimized=True, compile_mode="trace", cache_dir=str(tmp_path))
+    first.predict_logits(torch.rand(1, 3, 64, 64))
+    assert len(list(tmp_path.glob("deepfake-*-b1.pt"))) == 1
+
+    second = DeepfakeModel("tiny", optimized=True, compile_mode="trace", cache_dir=str(tmp_path))
+    monkeypatch.setattr(torch.jit, "trace", lambda *a, **k: pytest.fail("re-traced"))
+    second.predict_logits(torch.rand(1, 3, 64, 64))
+
+
+def test_local_model_updated_in_place_is_retraced(tiny_vit, tmp_path):
+    """A traced graph is tied to the weights it was traced from"""
+    model_dir, cache_dir = tmp_path / "model", tmp_path / "cache"
+    model_dir.mkdir()
+    (model_dir / "model.safetensors").write_bytes(b"v1")
+    DeepfakeModel(str(model_dir), optimized=True, compile_mode="trace",
+                  cache_dir=str(cache_dir)).predict_logits(torch.rand(1, 3, 64, 64))
+
+    (model_dir / "model.safetensors").write_bytes(b"v2, retrained")
+    DeepfakeModel(str(model_dir), optimized=True, compile_mode="trace",
+                  cache_dir=str(cache_dir)).predict_logits(torch.rand(1, 3, 64, 64))
+
+    assert len(list(cache_dir.glob("deepfake-*-b1.pt"))) == 2
+    assert not list(cache_dir.glob("*.tmp"))
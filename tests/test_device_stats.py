@@ -0,0 +1,43 @@
+from src.services.device_stats import DeviceStats
+
+
+def _stats(tmp_path):
+    return DeviceStats(str(tmp_path / "device_stats.db"), flush_seconds=60)
+
+
+def test_status_merges_stored_and_pending_counts(tmp_path):
+    """Counts are the same before and after a flush"""
+    stats = _stats(tmp_path)
+    stats.record("d1", "WhatsApp", True, "high")
+    stats.record("d1", "SMS", False, "low")
+    before = stats.device_status("d1")
+    stats.flush()
+    stats.record("d1", "SMS", True, "critical")
+    after = stats.device_status("d1")
+
+    assert before["messages_analyzed"] == 2
+    assert after["messages_analyzed"] == 3
+    assert after["harassment_detected"] == 2
+    assert after["severity_histogram"] == {"low": 0, "medium": 0, "high": 1, "critical": 1}
+    assert after["apps"]["SMS"]["messages_analyzed"] == 2
+    assert after["last_seen"] == after["apps"]["SMS"]["last_seen"]
+
+
+def test_flushes_accumulate_and_devices_are_separate(tmp_path):
+    stats = _stats(tmp_path)
+    for _ in range(2):
+        stats.record("d1", "SMS", True, "medium")
+        stats.record("d2", "SMS", False, "low")
+        stats.flush()
+
+    # A fresh instance (another worker) reads the same store
+    other = _stats(tmp_path)
+    assert other.device_status("d1")["harassment_detected"] == 2
+    assert other.device_status("d2")["harassment_detected"] == 0
+    assert other.device_status("unknown") == {
+        "messages_analyzed": 0,
+        "harassment_detected": 0,
+        "severity_histogram": {"low": 0, "medium": 0, "high": 0, "critical": 0},
+        "last_seen": None,
+        "apps": {},
+    }
@@ -0,0 +1,27 @@
+from src.models import harassment
+from src.models.harassment import HarassmentDetector
+
+MAX_TOKENS = 512
+
+
+class FakeSentimentPipeline:
+    """Fails on over-length input unless asked to truncate, as a HF pipeline does"""
+
+    def __call__(self, texts, batch_size=None, truncation=False):
+        if not truncation and any(len(text.split()) > MAX_TOKENS for text in texts):
+            raise IndexError("index out of range in self")
+        return [{"label": "NEGATIVE", "score": 0.9} for _ in texts]
+
+
+def test_long_message_is_scored_on_its_truncated_start(monkeypatch):
+    """
+    Messages beyond the model's input length are truncated (the first 512
+    tokens are scored) instead of failing the sentiment pass for the batch
+    """
+    monkeypatch.setattr(harassment, "pipeline", lambda *args, **kwargs: FakeSentimentPipeline())
+    detector = HarassmentDetector()
+
+    long_text = " ".join(["word"] * (MAX_TOKENS * 2))
+    results = detector.detect_harassment(["short message", long_text])
+
+    assert [result["ai_label"] for result in results] == ["NEGATIVE", "NEGATIVE"]
@@ -0,0 +1,130 @@
+import os
+import sqlite3
+
+from src.services.incident_log import ALERT, INCIDENT, IncidentLog
+
+
+def _log(tmp_path, name="worker-0", segment_bytes=1 << 20):
+    log = IncidentLog(str(tmp_path), name, segment_bytes=segment_bytes, commit_interval_ms=1)
+    log.open()
+    return log
+
+
+def _indexed(tmp_path, record_id):
+    with sqlite3.connect(tmp_path / "index.db") as conn:
+        return conn.execute("SELECT COUNT(*) FROM records WHERE record_id = ?", (record_id,)).fetchone()[0]
+
+
+def test_records_are_readable_before_and_after_commit(tmp_path):
+    log = _log(tmp_path)
+    done = log.append(ALERT, "a1", {"alert": {"alert_id": "a1", "is_harassment": True}})
+    assert log.get(ALERT, "a1")["alert"]["is_harassment"] is True
+
+    done.result(timeout=5)
+    assert log.get(ALERT, "a1") == {"alert": {"alert_id": "a1", "is_harassment": True}}
+    assert log.get(INCIDENT, "a1") is None
+    log.close()
+
+
+def test_index_is_rebuilt_across_segments(tmp_path):
+    """Small segments force rollover; a new instance finds every record"""
+    log = _log(tmp_path, segment_bytes=64)
+    for i in range(10):
+        log.append(ALERT, f"a{i}", {"n": i})
+    log.append(INCIDENT, "i1", {"alert_id": "a3"}).result(timeout=5)
+    log.close()
+    assert len(os.listdir(tmp_path / "worker-0")) > 1
+
+    reopened = _log(tmp_path, segment_bytes=64)
+    assert reopened.get(ALERT, "a7") == {"n": 7}
+    assert reopened.get(INCIDENT, "i1") == {"alert_id": "a3"}
+    reopened.close()
+
+
+def test_torn_tail_is_dropped_on_startup(tmp_path):
+    log = _log(tmp_path)
+    log.append(ALERT, "a1", {"n": 1}).result(timeout=5)
+    log.close()
+    with open(tmp_path / "worker-0" / "00000000.log", "ab") as f:
+        f.write(b'A a2 {"n"')
+
+    reopened = _log(tmp_path)
+    assert reopened.get(ALERT, "a2") is None
+    reopened.append(ALERT, "a3", {"n": 3}).result(timeout=5)
+    assert reopened.get(ALERT, "a3") == {"n": 3}
+    reopened.close()
+
+
+def test_other_workers_records_are_found(tmp_path):
+    """An incident reported to one worker resolves an alert written by another"""
+    first, second = _log(tmp_path, "worker-0"), _log(tmp_path, "worker-1")
+    first.append(ALERT, "a1", {"n": 1}).result(timeout=5)
+
+    assert second.get(ALERT, "a1") == {"n": 1}
+    first.close()
+    second.close()
+
+
+def test_a_held_directory_is_not_shared(tmp_path):
+    """A second writer with the same name gets its own directory"""
+    first, second = _log(tmp_path), _log(tmp_path)
+    assert second.name == "worker-0.1"
+
+    first.append(ALERT, "a1", {"n": 1}).result(timeout=5)
+    second.append(ALERT, "a2", {"n": 2}).result(timeout=5)
+    assert first.get(ALERT, "a2") == {"n": 2}
+    assert second.get(ALERT, "a1") == {"n": 1}
+    first.close()
+    second.close()
+
+    assert _log(tmp_path).name == "worker-0"
+
+
+def test_oldest_segments_are_retired(tmp_path):
+    """Beyond retention_bytes old segments are deleted and dropped from the shared index"""
+    log = IncidentLog(str(tmp_path), "worker-0", segment_bytes=64, commit_interval_ms=1, retention_bytes=256)
+    log.open()
+    reader = _log(tmp_path, "worker-1")
+    log.append(ALERT, "a0", {"n": 0}).result(timeout=5)
+    assert reader.get(ALERT, "a0") == {"n": 0}
+
+    for i in range(1, 40):
+        log.append(ALERT, f"a{i}", {"n": i}).result(timeout=5)
+
+    size = sum(os.path.getsize(path) for path in (tmp_path / "worker-0").glob("*.log"))
+    assert size <= 256 + 64
+    assert log.get(ALERT, "a0") is None and _indexed(tmp_path, "a0") == 0
+    assert log.get(ALERT, "a39") == {"n": 39}
+    assert reader.get(ALERT, "a0") is None
+    log.close()
+    reader.close()
+
+
+def test_reopening_only_indexes_the_unindexed_tail(tmp_path, monkeypatch):
+    log = _log(tmp_path, segment_bytes=64)
+    for i in range(10):
+        log.append(ALERT, f"a{i}", {"n": i})
+    log.append(ALERT, "a10", {"n": 10}).result(timeout=5)
+    log.close()
+    # As if the worker died between the fsync and the index update
+    newest = sorted((tmp_path / "worker-0").glob("*.log"))[-1]
+    with open(newest, "ab") as f:
+        f.write(b'A a11 {"n":11}\n')
+
+    indexed = []
+    index_tail = IncidentLog._index_tail
+    monkeypatch.setattr(IncidentLog, "_index_tail", lambda self: indexed.append(index_tail(self)) or indexed[-1])
+    reopened = _log(tmp_path, segment_bytes=64)
+    assert indexed == [1]
+    assert reopened.get(ALERT, "a11") == {"n": 11}
+    assert reopened.get(ALERT, "a2") == {"n": 2}
+    reopened.close()
+
+
+def test_nothing_is_created_until_opened(tmp_path):
+    log = IncidentLog(str(tmp_path / "incidents"), "worker-0", segment_bytes=1 << 20, commit_interval_ms=1)
+    assert not (tmp_path / "incidents").exists()
+
+    log.append(ALERT, "a1", {"n": 1}).result(timeout=5)
+    assert log.name == "worker-0" and (tmp_path / "incidents" / "worker-0").is_dir()
+    log.close()
@@ -0,0 +1,162 @@
+import asyncio
+import io
+import os
+import time
+import uuid
+
+from fastapi import HTTPException
+
+from src.services.jobs import FAILED, RUNNING, SUCCEEDED, JobStore, MediaJobs
+
+
+def _jobs(tmp_path, analyze, **overrides):
+    options = dict(worker=uuid.uuid4().hex, workers=1, ttl_seconds=60, progress_write_seconds=0.0,
+                   sweep_seconds=60, claim_seconds=0.2)
+    options.update(overrides)
+    return MediaJobs(JobStore(str(tmp_path / "jobs.db")), str(tmp_path / "media"), analyze=analyze, **options)
+
+
+async def _until_finished(jobs, job_id):
+    # Each long poll returns on progress; keep polling until the job is done
+    job = await jobs.get(job_id, "alice", wait=5)
+    while job["status"] not in (SUCCEEDED, FAILED):
+        job = await jobs.get(job_id, "alice", wait=5)
+    return job
+
+
+async def _frames(content, progress, gate=None):
+    for done in range(4):
+        progress(done, 4)
+        if gate is not None:
+            await gate.wait()
+            gate.clear()
+        await asyncio.sleep(0)
+    progress(4, 4)
+    return {"deepfake": {"prediction": "real", "bytes": len(content)}}
+
+
+def test_job_runs_in_the_background_and_keeps_its_result(tmp_path):
+    jobs = _jobs(tmp_path, _frames)
+
+    async def run():
+        job = await jobs.submit(io.BytesIO(b"video"), "deepfake", "alice")
+        finished = await _until_finished(jobs, job["job_id"])
+        await jobs.close()
+        return job, finished
+
+    job, finished = asyncio.run(run())
+    assert job["status"] == "queued"
+    assert finished["status"] == SUCCEEDED
+    assert finished["frames_processed"] == finished["frames_total"] == 4
+    assert finished["result"] == {"deepfake": {"prediction": "real", "bytes": 5}}
+    # Persisted, and the spooled media is gone
+    assert JobStore(str(tmp_path / "jobs.db")).get(job["job_id"])["result"] == finished["result"]
+    assert not list((tmp_path / "media").iterdir())
+
+
+def test_long_poll_returns_on_progress(tmp_path):
+    gate = asyncio.Event()
+    jobs = _jobs(tmp_path, lambda content, progress: _frames(content, progress, gate))
+
+    async def run():
+        job = await jobs.submit(io.BytesIO(b"video"), "deepfake", "alice")
+        first = await jobs.get(job["job_id"], "alice", wait=5)
+        while first["status"] != RUNNING or first["frames_total"] is None:
+            first = await jobs.get(job["job_id"], "alice", wait=5)
+        gate.set()
+        second = await jobs.get(job["job_id"], "alice", wait=5)
+        await jobs.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert second["frames_processed"] > first["frames_processed"]
+
+
+def test_failures_and_other_owners(tmp_path):
+    async def broken(content, progress):
+        raise HTTPException(status_code=400, detail="Unsupported or unreadable media file")
+
+    jobs = _jobs(tmp_path, broken)
+
+    async def run():
+        job = await jobs.submit(io.BytesIO(b"junk"), "deepfake", "alice")
+        failed = await _until_finished(jobs, job["job_id"])
+        other = await jobs.get(job["job_id"], "mallory")
+        await jobs.close()
+        return failed, other
+
+    failed, other = asyncio.run(run())
+    assert failed["status"] == FAILED and failed["error"] == "Unsupported or unreadable media file"
+    assert other is None
+
+
+def test_jobs_expire(tmp_path):
+    jobs = _jobs(tmp_path, _frames, ttl_seconds=0.05)
+
+    async def run():
+        job = await jobs.submit(io.BytesIO(b"video"), "deepfake", "alice")
+        await _until_finished(jobs, job["job_id"])
+        await asyncio.sleep(0.1)
+        expired = await jobs.get(job["job_id"], "alice")
+        swept = await jobs.sweep()
+        await jobs.close()
+        return expired, swept
+
+    assert asyncio.run(run()) == (None, 1)
+
+
+def test_unfinished_jobs_resume_after_restart(tmp_path):
+    async def never(content, progress):
+        await asyncio.Event().wait()
+
+    async def run():
+        crashed = _jobs(tmp_path, never)
+        job = await crashed.submit(io.BytesIO(b"video"), "deepfake", "alice")
+        await asyncio.sleep(0.05)
+        await crashed.close()
+
+        restarted = _jobs(tmp_path, _frames)
+        finished = await _until_finished(restarted, job["job_id"])
+        await restarted.close()
+        return finished
+
+    assert asyncio.run(run())["status"] == SUCCEEDED
+
+
+def test_live_workers_keep_their_jobs(tmp_path):
+    async def never(content, progress):
+        await asyncio.Event().wait()
+
+    async def run():
+        busy = _jobs(tmp_path, never)
+        job = await busy.submit(io.BytesIO(b"video"), "deepfake", "alice")
+        other = _jobs(tmp_path, _frames)
+        await asyncio.sleep(0.5)  # well past claim_seconds, but busy keeps touching its job
+        claimed = await other.claim_orphans()
+        held_by = busy.store.get(job["job_id"])["worker"]
+        await busy.close()
+        await other.close()
+        return claimed, held_by == busy.worker
+
+    assert asyncio.run(run()) == (0, True)
+
+
+def test_concurrent_first_submits_both_spool(tmp_path, monkeypatch):
+    makedirs = os.makedirs
+
+    def slow_makedirs(*args, **kwargs):
+        time.sleep(0.1)
+        makedirs(*args, **kwargs)
+
+    monkeypatch.setattr(os, "makedirs", slow_makedirs)
+    jobs = _jobs(tmp_path, _frames)
+
+    async def run():
+        submitted = await asyncio.gather(*[
+            jobs.submit(io.BytesIO(b"video"), "deepfake", "alice") for _ in range(2)
+        ])
+        finished = [await _until_finished(jobs, job["job_id"]) for job in submitted]
+        await jobs.close()
+        return [job["status"] for job in finished]
+
+    assert asyncio.run(run()) == [SUCCEEDED, SUCCEEDED]
@@ -0,0 +1,61 @@
+import json
+import logging
+
+from src.utils import logging as log_setup
+from src.utils.logging import JsonFormatter, redact, request_log_context
+
+
+def _record(level=logging.INFO, fields=None):
+    record = logging.LogRecord("test", level, __file__, 1, "scored %d of %d", (3, 4), None)
+    if fields is not None:
+        record.fields = fields
+    return record
+
+
+def test_json_formatter_renders_message_and_redacts_content():
+    """Bodies are replaced by their length; other fields are kept"""
+    line = JsonFormatter().format(_record(fields={"content": "you are pathetic", "device_id": "d1"}))
+    entry = json.loads(line)
+
+    assert entry["msg"] == "scored 3 of 4"
+    assert entry["device_id"] == "d1"
+    assert entry["content"] == "[redacted 16]"
+    assert "pathetic" not in line
+
+
+def test_redact_leaves_unlisted_fields():
+    assert redact({"keywords": ["idiot"]}) == {"keywords": ["idiot"]}
+
+
+def test_unsampled_request_drops_info_but_keeps_warnings(monkeypatch):
+    """A request outside the sample keeps only WARNING and above"""
+    monkeypatch.setattr(log_setup, "_sample_rates", {"/api/v1/mobile": 0.0})
+    sampling = log_setup._SamplingFilter()
+
+    with request_log_context("/api/v1/mobile/analyze-notification"):
+        assert not sampling.filter(_record(logging.INFO))
+        warning = _record(logging.WARNING)
+        assert sampling.filter(warning)
+    assert warning.route == "/api/v1/mobile/analyze-notification"
+
+    with request_log_context("/api/v1/health"):
+        assert sampling.filter(_record(logging.INFO))
+
+
+def test_longest_prefix_wins(monkeypatch):
+    monkeypatch.setattr(log_setup, "_sample_rates", {"/api/v1/mobile": 0.1, "/api/v1/mobile/ws": 0.5})
+
+    assert log_setup.sample_rate("/api/v1/mobile/ws/abc") == 0.5
+    assert log_setup.sample_rate("/api/v1/mobile/report-incident") == 0.1
+    assert log_setup.sample_rate("/api/v1/token") == log_setup.LOG_SAMPLE_DEFAULT
+
+
+def test_full_queue_drops_instead_of_blocking():
+    import queue
+
+    handler = log_setup._NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    before = handler.dropped
+    handler.emit(_record())
+    handler.emit(_record())
+
+    assert handler.dropped == before + 1
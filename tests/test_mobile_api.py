@@ -1,10 +1,31 @@
+import json
+import time
+
 import pytest
 from fastapi.testclient import TestClient
 from datetime import datetime
+from src.api import mobile_routes
+from src.core.config import settings
 from src.main import app
+from src.services.overload import ServiceMode, overload_controller
 
 client = TestClient(app)
 
+
+def _headers():
+    login_response = client.post("/api/v1/token", data={"username": "johndoe", "password": "secret"})
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+
+def _notification(message_text, device_id, sender="user1"):
+    return {
+        "sender": sender,
+        "message_text": message_text,
+        "app_name": "WhatsApp",
+        "timestamp": datetime.now().isoformat(),
+        "device_id": device_id,
+    }
+
 def test_mobile_analyze_notification():
     """Test the mobile notification analysis endpoint"""
     
@@ -139,4 +160,203 @@ def test_batch_notifications():
     results = response.json()
     
     assert len(results) == 2
-    assert all("is_harassment" in result for result in results)
\ No newline at end of file
+    assert all("is_harassment" in result for result in results)
+
+
+def test_stream_returns_a_line_per_input():
+    """The NDJSON scan answers every line, and a malformed line does not end the stream"""
+    body = "\n".join([
+        json.dumps(_notification("Hello there!", "stream_device")),
+        "{not json",
+        json.dumps(_notification("You're pathetic and should disappear!", "stream_device", sender="user2")),
+        json.dumps(_notification("See you tomorrow", "stream_device", sender="user3")),
+    ])
+    response = client.post(
+        "/api/v1/mobile/analyze-batch-notifications/stream",
+        content=body,
+        headers={**_headers(), "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    *results, trailer = [json.loads(line) for line in response.text.splitlines()]
+    assert trailer == {"service_mode": "full"}
+    assert sorted(result["line"] for result in results) == [1, 2, 3, 4]
+    assert [result["line"] for result in results if "alert" in result] == [1, 3, 4]
+    assert [result["line"] for result in results if "error" in result] == [2]
+
+
+def test_stream_reports_the_mode_its_chunks_ran_in(monkeypatch):
+    """The header goes out before scoring; the trailer line has the actual mode"""
+    enter = overload_controller.enter
+
+    def degraded():
+        enter()
+        return ServiceMode.DEGRADED
+
+    monkeypatch.setattr(overload_controller, "enter", degraded)
+    response = client.post(
+        "/api/v1/mobile/analyze-batch-notifications/stream",
+        content=json.dumps(_notification("See you at the mall", "stream_mode_device")),
+        headers={**_headers(), "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.headers["X-Service-Mode"] == "full"
+    assert json.loads(response.text.splitlines()[-1]) == {"service_mode": "degraded"}
+
+
+@pytest.fixture
+def scored_batches(monkeypatch):
+    """Sizes of the batches the WebSocket handler scores"""
+    batches = []
+    score = mobile_routes._deduplicated_alerts
+
+    async def recording(notifications, priority):
+        batches.append(len(notifications))
+        return await score(notifications, priority)
+
+    monkeypatch.setattr(mobile_routes, "_deduplicated_alerts", recording)
+    return batches
+
+
+def _socket_url(device_id):
+    token = _headers()["Authorization"].split(" ", 1)[1]
+    return f"/api/v1/mobile/ws/{device_id}?token={token}"
+
+
+def test_websocket_batches_within_the_window(scored_batches, monkeypatch):
+    monkeypatch.setattr(settings, "WS_BATCH_WINDOW_MS", 500.0)
+    with client.websocket_connect(_socket_url("ws_device_window")) as websocket:
+        for ref in range(3):
+            websocket.send_json(dict(_notification(f"Message {ref}", "ws_device_window"), ref=ref))
+        frames = [websocket.receive_json() for _ in range(3)]
+
+    assert [frame["ref"] for frame in frames] == [0, 1, 2]
+    assert all("alert" in frame for frame in frames)
+    assert scored_batches == [3]
+
+
+def test_websocket_flushes_on_the_size_limit(scored_batches, monkeypatch):
+    monkeypatch.setattr(settings, "WS_BATCH_WINDOW_MS", 10_000.0)
+    monkeypatch.setattr(settings, "WS_BATCH_SIZE", 2)
+    started = time.monotonic()
+    with client.websocket_connect(_socket_url("ws_device_size")) as websocket:
+        for ref in range(2):
+            websocket.send_json(dict(_notification(f"Message {ref}", "ws_device_size"), ref=ref))
+        frames = [websocket.receive_json() for _ in range(2)]
+
+    assert time.monotonic() - started < 5  # did not wait out the window
+    assert [frame["ref"] for frame in frames] == [0, 1]
+    assert scored_batches == [2]
+
+
+def test_websocket_closes_cleanly_on_disconnect(scored_batches, monkeypatch):
+    finished = []
+    send_alerts = mobile_routes._send_alerts
+
+    async def recording(*args):
+        await send_alerts(*args)
+        finished.append(True)
+
+    monkeypatch.setattr(mobile_routes, "_send_alerts", recording)
+    with client.websocket_connect(_socket_url("ws_device_close")) as websocket:
+        websocket.send_json(dict(_notification("Hello there!", "ws_device_close"), ref="a"))
+        assert websocket.receive_json()["ref"] == "a"
+        websocket.send_text("{not json")
+        assert "error" in websocket.receive_json()
+
+    # The handler drained and returned without an error once the client left
+    assert finished == [True]
+    assert scored_batches == [1]
+
+
+def _batch(device_id):
+    return {
+        "notifications": [
+            _notification("Hello there!", device_id),
+            _notification("You're pathetic and should disappear!", device_id, sender="user2"),
+        ],
+        "device_id": device_id,
+    }
+
+
+def test_msgpack_request_with_json_response():
+    msgpack = pytest.importorskip("msgpack")
+    response = client.post(
+        "/api/v1/mobile/analyze-batch-notifications",
+        content=msgpack.packb(_batch("msgpack_device_in")),
+        headers={**_headers(), "Content-Type": "application/msgpack"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert len(response.json()) == 2
+
+
+def test_json_request_with_msgpack_response():
+    msgpack = pytest.importorskip("msgpack")
+    response = client.post(
+        "/api/v1/mobile/analyze-batch-notifications",
+        json=_batch("msgpack_device_out"),
+        headers={**_headers(), "Accept": "application/x-msgpack"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    alerts = msgpack.unpackb(response.content)
+    assert len(alerts) == 2 and all("is_harassment" in alert for alert in alerts)
+
+
+def test_unsupported_accept_falls_back_to_json():
+    response = client.post(
+        "/api/v1/mobile/analyze-batch-notifications",
+        json=_batch("msgpack_device_other"),
+        headers={**_headers(), "Accept": "text/csv"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert len(response.json()) == 2
+
+
+def test_malformed_msgpack_body_is_rejected():
+    pytest.importorskip("msgpack")
+    response = client.post(
+        "/api/v1/mobile/analyze-batch-notifications",
+        content=b"\xc1",
+        headers={**_headers(), "Content-Type": "application/msgpack"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_admission_rejections_carry_cors_headers(monkeypatch):
+    monkeypatch.setattr(settings, "MOBILE_MAX_BODY_BYTES", 16)
+    origin = settings.ALLOWED_ORIGINS[0]
+    response = client.post(
+        "/api/v1/mobile/analyze-batch-notifications",
+        json=[_notification("Hello there!", "cors_device")],
+        headers={**_headers(), "Origin": origin},
+    )
+
+    assert response.status_code == 413
+    assert response.headers["access-control-allow-origin"] == origin
+
+
+def test_vectorized_alerts_match_single_alerts():
+    """_build_alerts gives the same alerts as _build_alert across every severity band"""
+    batch = [
+        {"harassment": {"is_harassment": flagged, "confidence": confidence, "categories": ["insult"]}}
+        for confidence in (0.0, 0.3, 0.5, 0.6, 0.7, 0.71, 0.89, 0.9, 0.95, 1.0)
+        for flagged in (True, False)
+    ]
+    batch += [{"harassment": {}}, {"service_mode": "degraded", "harassment": {"is_harassment": True, "confidence": 0.8}}]
+
+    def comparable(alert):
+        return alert.model_dump(exclude={"alert_id", "timestamp"})
+
+    vectorized = mobile_routes._build_alerts(batch)
+    assert [comparable(alert) for alert in vectorized] == [
+        comparable(mobile_routes._build_alert(result)) for result in batch
+    ]
+    assert {alert.severity_level for alert in vectorized} == set(mobile_routes.SEVERITY_ORDER)
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+
+from src.services.model_registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+        self.warmed = False
+
+    def score(self, values):
+        return [{"label": value > 0.5, "score": value} for value in values]
+
+
+def _load(name):
+    if name == "broken":
+        raise OSError("no such model")
+    return FakeModel(name)
+
+
+def _warm_up(model):
+    model.warmed = True
+
+
+def _compare(current, candidate):
+    agreeing = sum(a["label"] == b["label"] for a, b in zip(current, candidate))
+    return len(current), agreeing, sum(abs(a["score"] - b["score"]) for a, b in zip(current, candidate))
+
+
+def _registry(tmp_path, name="v1"):
+    registry = ModelRegistry(str(tmp_path / "registry.json"), poll_seconds=3600, shadow_queue_size=4)
+    registry.register("text", name, _load, _warm_up, _compare)
+    return registry
+
+
+def _until(condition, timeout=5.0):
+    give_up = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < give_up, "timed out"
+        time.sleep(0.01)
+
+
+def test_swap_lets_in_flight_calls_finish_on_the_old_version(tmp_path):
+    registry = _registry(tmp_path)
+    with registry.lease("text") as old:
+        registry.deploy("text", "v2")
+        _until(lambda: registry.status()["text"]["current"]["name"] == "v2")
+        assert old.name == "v1"
+        assert [v["name"] for v in registry.status()["text"]["draining"]] == ["v1"]
+        with registry.lease("text") as new:
+            assert new.name == "v2" and new.warmed
+    assert registry.status()["text"]["draining"] == []
+
+
+def test_failed_load_keeps_the_current_version(tmp_path):
+    registry = _registry(tmp_path)
+    registry.deploy("text", "broken")
+    _until(lambda: registry.status()["text"]["last_error"] is not None)
+    with registry.lease("text") as model:
+        assert model.name == "v1"
+    assert registry.status()["text"]["loading"] == []
+
+
+def test_shadow_compares_the_candidate_off_the_request_path(tmp_path):
+    registry = _registry(tmp_path)
+    registry.deploy("text", "v2", shadow_fraction=1.0)
+    _until(lambda: registry.status()["text"]["candidate"] is not None)
+
+    for values in ([0.9, 0.1], [0.7, 0.2]):
+        with registry.lease("text") as model:
+            current = model.score(values)
+        registry.shadow("text", lambda candidate: candidate.score([v * 0.5 for v in values]), current, 2.0)
+    _until(lambda: registry.status()["text"]["shadow"]["samples"] == 2)
+
+    status = registry.status()["text"]
+    assert status["current"]["name"] == "v1"
+    assert status["shadow"]["agreement"] == 0.5  # 0.9 and 0.7 flip to below 0.5
+    assert status["shadow"]["current_ms_mean"] == 2.0
+
+    assert registry.promote("text") == "v2"
+    status = registry.status()["text"]
+    assert status["current"]["name"] == "v2" and status["candidate"] is None
+
+
+def test_manifest_rolls_versions_out_to_other_workers(tmp_path):
+    first, second = _registry(tmp_path), _registry(tmp_path)
+
+    first.publish("text", {"name": "v1", "shadow": {"name": "v2", "fraction": 0.25}})
+    second.reconcile(force=True)
+    _until(lambda: second.status()["text"]["candidate"] is not None)
+    assert second.status()["text"]["shadow_fraction"] == 0.25
+
+    first.publish("text", {"name": "v2", "shadow": None})
+    second.reconcile(force=True)
+    status = second.status()["text"]
+    assert status["current"]["name"] == "v2" and status["candidate"] is None
+    assert os.path.exists(tmp_path / "registry.json")
+
+    # A worker starting later goes straight to the published version
+    late = _registry(tmp_path)
+    _until(lambda: late.status()["text"]["current"]["name"] == "v2")
+
+
+def test_a_slow_load_does_not_replace_a_newer_version(tmp_path):
+    release = threading.Event()
+
+    def load(name):
+        if name == "v2":
+            release.wait(5)
+        return FakeModel(name)
+
+    registry = ModelRegistry(str(tmp_path / "registry.json"), poll_seconds=3600, shadow_queue_size=4)
+    registry.register("text", "v1", load, _warm_up, _compare)
+    registry.deploy("text", "v2")
+    registry.deploy("text", "v3")
+    _until(lambda: registry.status()["text"]["current"]["name"] == "v3")
+    release.set()
+    _until(lambda: registry.status()["text"]["loading"] == [])
+    assert registry.status()["text"]["current"]["name"] == "v3"
+
+
+def test_concurrent_publishes_keep_every_kind(tmp_path):
+    registries = []
+    for kind in ("a", "b", "c", "d"):
+        registry = ModelRegistry(str(tmp_path / "registry.json"), poll_seconds=3600, shadow_queue_size=4)
+        registry.register(kind, "v1", _load, _warm_up, _compare)
+        registries.append((kind, registry))
+
+    threads = [
+        threading.Thread(target=lambda kind=kind, registry=registry: [
+            registry.publish(kind, {"name": "v1", "shadow": None}) for _ in range(20)
+        ])
+        for kind, registry in registries
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(registries[0][1]._read_manifest()) == ["a", "b", "c", "d"]
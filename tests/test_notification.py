@@ -0,0 +1,178 @@
+import asyncio
+import email
+import smtplib
+import socket
+
+import pytest
+
+from src.services.notification import AlertMailer, MailServer, SMTPConnection
+
+
+def _mailer(server, **overrides):
+    options = dict(sender="alerts@example.com", pool_size=2, digest_seconds=0.05,
+                   max_retries=3, retry_base_seconds=0.01, queue_size=100)
+    options.update(overrides)
+    return AlertMailer(server, **options)
+
+
+@pytest.fixture
+def smtp_server():
+    aiosmtpd = pytest.importorskip("aiosmtpd.controller")
+
+    class Handler:
+        def __init__(self):
+            self.messages = []
+            self.sessions = set()
+
+        async def handle_DATA(self, server, session, envelope):
+            self.messages.append(envelope)
+            self.sessions.add(id(session))
+            return "250 OK"
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    handler = Handler()
+    controller = aiosmtpd.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        yield MailServer("127.0.0.1", port, starttls=False), handler
+    finally:
+        controller.stop()
+
+
+def test_alerts_to_one_recipient_are_sent_as_a_digest(smtp_server):
+    server, handler = smtp_server
+    mailer = _mailer(server)
+
+    async def run():
+        for i in range(3):
+            mailer.enqueue("parent@example.com", f"Alert {i}", f"<p>body {i}</p>")
+        mailer.enqueue("other@example.com", "Alert", "<p>body</p>")
+        await asyncio.sleep(0.2)
+        mailer.enqueue("parent@example.com", "Later", "<p>later</p>")
+        await mailer.close()
+
+    asyncio.run(run())
+    recipients = sorted(envelope.rcpt_tos[0] for envelope in handler.messages)
+    assert recipients == ["other@example.com", "parent@example.com", "parent@example.com"]
+    digest = next(e for e in handler.messages if b"3 DeepGuard alerts" in e.content)
+    assert b"body 2" in digest.content
+    assert mailer.stats()["alerts_sent"] == 5 and mailer.stats()["emails_sent"] == 3
+
+
+def test_connections_are_reused(smtp_server):
+    server, handler = smtp_server
+    connection = SMTPConnection(server)
+    mailer = _mailer(server)
+    for i in range(5):
+        connection.send(mailer.compose("a@example.com", [(f"Alert {i}", "<p>x</p>")]))
+    connection.close()
+
+    assert len(handler.messages) == 5
+    assert len(handler.sessions) == 1
+
+
+def test_failed_sends_are_retried_with_backoff(monkeypatch):
+    attempts = []
+
+    def flaky_send(self, message):
+        attempts.append(message["Subject"])
+        if len(attempts) < 3:
+            raise smtplib.SMTPServerDisconnected("connection lost")
+
+    monkeypatch.setattr(SMTPConnection, "send", flaky_send)
+    mailer = _mailer(MailServer("mail.invalid", 25), pool_size=1)
+
+    async def run():
+        mailer.enqueue("parent@example.com", "Alert", "<p>x</p>")
+        await mailer.flush()
+        await asyncio.sleep(0.2)
+        await mailer.close()
+
+    asyncio.run(run())
+    assert len(attempts) == 3
+    assert mailer.stats()["retries"] == 2 and mailer.stats()["alerts_sent"] == 1
+
+
+def test_permanent_failures_are_not_retried(monkeypatch):
+    def refuse(self, message):
+        raise smtplib.SMTPRecipientsRefused({"x@example.com": (550, b"no such user")})
+
+    monkeypatch.setattr(SMTPConnection, "send", refuse)
+    mailer = _mailer(MailServer("mail.invalid", 25), pool_size=1)
+
+    async def run():
+        mailer.enqueue("x@example.com", "Alert", "<p>x</p>")
+        await mailer.close()
+
+    asyncio.run(run())
+    assert mailer.stats()["failed"] == 1 and mailer.stats()["retries"] == 0
+
+
+def test_disabled_without_a_server():
+    mailer = _mailer(None)
+    assert not mailer.enqueue("parent@example.com", "Alert", "<p>x</p>")
+
+
+def test_header_injection_is_neutralised(smtp_server):
+    """A client-supplied name cannot add header lines to the alert email"""
+    server, handler = smtp_server
+    mailer = _mailer(server)
+
+    async def run():
+        mailer.enqueue("parent@example.com", "Alert on x\r\nBcc: attacker@example.com", "<p>x</p>")
+        await mailer.close()
+
+    asyncio.run(run())
+    assert [envelope.rcpt_tos for envelope in handler.messages] == [["parent@example.com"]]
+    message = email.message_from_bytes(handler.messages[0].content)
+    assert message["Bcc"] is None
+    assert message["Subject"] == "Alert on x Bcc: attacker@example.com"
+
+
+def test_unexpected_errors_do_not_stop_delivery(monkeypatch):
+    sent = []
+
+    def send(self, message):
+        sent.append(message["Subject"])
+
+    monkeypatch.setattr(SMTPConnection, "send", send)
+    mailer = _mailer(MailServer("mail.invalid", 25), pool_size=1)
+    compose = mailer.compose
+
+    def strict_compose(recipient, items):
+        if recipient == "bad":
+            raise ValueError("Header values may not contain linefeed or carriage return characters")
+        return compose(recipient, items)
+
+    monkeypatch.setattr(mailer, "compose", strict_compose)
+
+    async def run():
+        mailer.enqueue("bad", "Alert", "<p>x</p>")
+        await mailer.flush()
+        mailer.enqueue("parent@example.com", "Alert", "<p>x</p>")
+        await mailer.close()
+
+    asyncio.run(run())
+    assert sent == ["Alert"]
+    assert mailer.stats()["failed"] == 1 and mailer.stats()["queued"] == 0
+
+
+def test_close_sends_retries_still_backing_off(monkeypatch):
+    attempts = []
+
+    def flaky_send(self, message):
+        attempts.append(message["Subject"])
+        if len(attempts) < 2:
+            raise smtplib.SMTPServerDisconnected("connection lost")
+
+    monkeypatch.setattr(SMTPConnection, "send", flaky_send)
+    mailer = _mailer(MailServer("mail.invalid", 25), pool_size=1, retry_base_seconds=3600)
+
+    async def run():
+        mailer.enqueue("parent@example.com", "Alert", "<p>x</p>")
+        await mailer.close()
+
+    asyncio.run(run())
+    assert len(attempts) == 2 and mailer.stats()["alerts_sent"] == 1
@@ -0,0 +1,63 @@
+from src.services import overload
+from src.services.overload import OverloadController, ServiceMode
+
+
+def make_controller():
+    return OverloadController(
+        queue_high=3, queue_low=1, latency_high_ms=1000, latency_low_ms=200, cooldown_seconds=10,
+    )
+
+
+def test_deep_queue_steps_down_one_mode_at_a_time(monkeypatch):
+    """Sustained pressure walks full -> degraded -> cached_only, respecting cooldown"""
+    clock = [0.0]
+    monkeypatch.setattr(overload.time, "monotonic", lambda: clock[0])
+    controller = make_controller()
+
+    for _ in range(3):
+        controller.enter()
+    assert controller.mode == ServiceMode.DEGRADED
+
+    controller.enter()
+    assert controller.mode == ServiceMode.DEGRADED  # still cooling down
+
+    clock[0] = 11
+    controller.enter()
+    assert controller.mode == ServiceMode.CACHED_ONLY
+
+
+def test_recovery_requires_low_water_mark_and_cooldown(monkeypatch):
+    """The mode only steps back up once load is well below the trigger"""
+    clock = [0.0]
+    monkeypatch.setattr(overload.time, "monotonic", lambda: clock[0])
+    controller = make_controller()
+    for _ in range(3):
+        controller.enter()
+    assert controller.mode == ServiceMode.DEGRADED
+
+    clock[0] = 11
+    controller.exit(latency_ms=50)  # depth 2: below high, above low
+    assert controller.mode == ServiceMode.DEGRADED
+
+    controller.exit(latency_ms=50)  # depth 1: relaxed
+    assert controller.mode == ServiceMode.FULL
+
+
+def test_high_latency_alone_triggers_degradation():
+    """Long queue waits degrade the service even with a short queue"""
+    controller = make_controller()
+    for _ in range(controller.min_samples):
+        controller.enter()
+        controller.exit(latency_ms=5000)
+
+    assert controller.mode == ServiceMode.DEGRADED
+    assert controller.snapshot()["mode"] == "degraded"
+
+
+def test_a_single_slow_sample_does_not_degrade():
+    """One outlier is not enough evidence of overload"""
+    controller = make_controller()
+    controller.enter()
+    controller.exit(latency_ms=5000)
+
+    assert controller.mode == ServiceMode.FULL
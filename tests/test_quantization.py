@@ -0,0 +1,67 @@
+import torch
+from transformers import DistilBertConfig, DistilBertForSequenceClassification
+
+from src.models import quantization
+
+
+def tiny_distilbert():
+    torch.manual_seed(0)
+    config = DistilBertConfig(vocab_size=100, dim=32, n_layers=2, n_heads=2, hidden_dim=64, num_labels=2)
+    return config, DistilBertForSequenceClassification(config).eval()
+
+
+def test_quantized_model_round_trips_through_cache(tmp_path, monkeypatch):
+    """The cached int8 weights reload into an equivalent model"""
+    config, model = tiny_distilbert()
+    monkeypatch.setattr(quantization.AutoModelForSequenceClassification, "from_pretrained", lambda name: model)
+    monkeypatch.setattr(quantization.AutoConfig, "from_pretrained", lambda name: config)
+
+    built = quantization.build_quantized_model("tiny", str(tmp_path))
+    loaded = quantization.load_quantized_model("tiny", str(tmp_path))
+
+    input_ids = torch.randint(0, 100, (2, 8))
+    with torch.no_grad():
+        fp32 = model(input_ids=input_ids).logits
+        assert torch.equal(built(input_ids=input_ids).logits, loaded(input_ids=input_ids).logits)
+        assert torch.allclose(loaded(input_ids=input_ids).logits, fp32, atol=0.1)
+
+
+def test_approval_is_required_and_reset_on_rebuild(tmp_path, monkeypatch):
+    """Only a passing report activates int8, and rebuilding revokes it"""
+    config, model = tiny_distilbert()
+    monkeypatch.setattr(quantization.AutoModelForSequenceClassification, "from_pretrained", lambda name: model)
+    monkeypatch.setattr(quantization.AutoConfig, "from_pretrained", lambda name: config)
+
+    quantization.build_quantized_model("tiny", str(tmp_path))
+    assert quantization.read_approval(str(tmp_path), "tiny") is None
+
+    quantization.write_approval(str(tmp_path), "tiny", {"approved": False, "label_agreement": 0.9})
+    assert quantization.read_approval(str(tmp_path), "tiny") is None
+
+    quantization.write_approval(str(tmp_path), "tiny", {"approved": True, "label_agreement": 0.99})
+    assert quantization.read_approval(str(tmp_path), "tiny")["label_agreement"] == 0.99
+    assert quantization.read_approval(str(tmp_path), "other-model") is None
+
+    quantization.build_quantized_model("tiny", str(tmp_path))
+    assert quantization.read_approval(str(tmp_path), "tiny") is None
+
+
+def test_artifacts_are_per_model_and_tied_to_the_weights(tmp_path, monkeypatch):
+    """Evaluating another model keeps this one's approval; updating the weights in place revokes it"""
+    config, model = tiny_distilbert()
+    monkeypatch.setattr(quantization.AutoModelForSequenceClassification, "from_pretrained", lambda name: model)
+    monkeypatch.setattr(quantization.AutoConfig, "from_pretrained", lambda name: config)
+    weights = tmp_path / "tiny"
+    weights.mkdir()
+    (weights / "model.safetensors").write_bytes(b"v1")
+    cache = str(tmp_path / "cache")
+
+    quantization.build_quantized_model(str(weights), cache)
+    quantization.write_approval(cache, str(weights), {"approved": True})
+    quantization.build_quantized_model("candidate", cache)
+    assert quantization.read_approval(cache, str(weights)) is not None
+    assert quantization.load_quantized_model(str(weights), cache) is not None
+
+    (weights / "model.safetensors").write_bytes(b"v2, retrained")
+    assert quantization.read_approval(cache, str(weights)) is None
+    assert quantization.load_quantized_model(str(weights), cache) is None
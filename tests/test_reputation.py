@@ -0,0 +1,39 @@
+from src.services.reputation import DecayingCountMinSketch, SenderReputation
+
+
+def test_counts_decay_with_half_life():
+    sketch = DecayingCountMinSketch(width=1024, depth=4, half_life_seconds=10)
+    for _ in range(4):
+        sketch.add("bob", now=0.0)
+
+    assert sketch.estimate("bob", now=0.0) == 4
+    assert abs(sketch.estimate("bob", now=10.0) - 2) < 1e-9
+    assert sketch.estimate("alice", now=0.0) == 0
+
+
+def test_renormalization_keeps_estimates():
+    """Long uptimes rescale the table instead of overflowing it"""
+    sketch = DecayingCountMinSketch(width=64, depth=2, half_life_seconds=1)
+    sketch.add("bob", now=0.0)
+    sketch.add("bob", now=100.0)  # scale 2**100 triggers a renormalization
+
+    assert abs(sketch.estimate("bob", now=100.0) - 1) < 1e-9
+    assert abs(sketch.estimate("bob", now=101.0) - 0.5) < 1e-9
+
+
+def test_memory_is_fixed_regardless_of_senders():
+    sketch = DecayingCountMinSketch(width=256, depth=4, half_life_seconds=60)
+    for i in range(10000):
+        sketch.add(("device", f"sender-{i}"), now=0.0)
+
+    assert sketch.memory_bytes == 256 * 4 * 8
+    assert sketch.estimate(("device", "sender-1"), now=0.0) >= 1  # never undercounts
+
+
+def test_repeated_harassment_escalates():
+    reputation = SenderReputation(width=1024, depth=4, half_life_seconds=3600, repeats_per_level=3)
+    levels = [reputation.escalation_levels(reputation.record_harassment("d1", "bob")) for _ in range(7)]
+
+    assert levels == [0, 0, 0, 1, 1, 1, 2]
+    assert reputation.escalation_levels(reputation.record_harassment("d1", "carol")) == 0
+    assert reputation.escalation_levels(reputation.record_harassment("d2", "bob")) == 0
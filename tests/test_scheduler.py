@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+
+from src.services.scheduler import InferenceScheduler, Priority
+
+
+def run_in_order(policy, jobs):
+    """Queues jobs behind a blocker on one thread and records execution order"""
+    scheduler = InferenceScheduler(threads=1, policy=policy,
+                                   weights={Priority.INTERACTIVE: 2, Priority.BULK: 1})
+    gate = threading.Event()
+    order = []
+    blocker = scheduler.submit(gate.wait, Priority.BULK)
+    futures = [scheduler.submit(lambda name=name: order.append(name), lane) for name, lane in jobs]
+    gate.set()
+    blocker.result(timeout=5)
+    for future in futures:
+        future.result(timeout=5)
+    return order
+
+
+def test_strict_policy_drains_interactive_first():
+    """Interactive jobs overtake every queued bulk chunk"""
+    jobs = [("b1", Priority.BULK), ("b2", Priority.BULK), ("i1", Priority.INTERACTIVE), ("i2", Priority.INTERACTIVE)]
+
+    assert run_in_order("strict", jobs) == ["i1", "i2", "b1", "b2"]
+
+
+def test_weighted_policy_interleaves_lanes_by_weight():
+    """With 2:1 weights bulk still gets every third slot (the blocker took the first)"""
+    jobs = [("b1", Priority.BULK), ("b2", Priority.BULK)] + [(f"i{n}", Priority.INTERACTIVE) for n in range(6)]
+
+    assert run_in_order("weighted", jobs) == ["i0", "i1", "i2", "i3", "b1", "i4", "i5", "b2"]
+
+
+def test_job_errors_reach_the_caller():
+    """An exception inside a job is raised from its future"""
+    scheduler = InferenceScheduler(threads=1, policy="strict", weights={})
+    future = scheduler.submit(lambda: 1 / 0)
+
+    with pytest.raises(ZeroDivisionError):
+        future.result(timeout=5)
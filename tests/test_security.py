@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+
+from src.core import security
+from src.core.security import TokenCache, create_access_token, decode_access_token
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(security, "token_cache", TokenCache(max_size=2))
+
+
+def test_verified_token_is_served_from_cache(monkeypatch):
+    """The signature is only checked on the first use of a token"""
+    token = create_access_token({"sub": "johndoe"})
+    assert decode_access_token(token) == "johndoe"
+
+    monkeypatch.setattr(security.jwt, "decode", lambda *a, **k: pytest.fail("decoded again"))
+    assert decode_access_token(token) == "johndoe"
+
+
+def test_cache_entry_does_not_outlive_exp():
+    """An expired entry is dropped instead of being trusted"""
+    cache = TokenCache(max_size=2)
+    cache.put("token", {"sub": "johndoe", "exp": time.time() - 1})
+
+    assert cache.get("token") is None
+
+
+def test_cache_is_bounded():
+    """The least recently used token is evicted first"""
+    cache = TokenCache(max_size=2)
+    exp = time.time() + 60
+    for token in ("a", "b", "c"):
+        cache.put(token, {"sub": token, "exp": exp})
+
+    assert cache.get("a") is None
+    assert cache.get("c")["sub"] == "c"
+
+
+def test_password_hashing_runs_off_the_event_loop():
+    """The async variants agree with the sync ones"""
+    hashed = asyncio.run(security.get_password_hash_async("hunter2"))
+
+    assert security.verify_password("hunter2", hashed)
+    assert asyncio.run(security.verify_password_async("hunter2", hashed))
+    assert not asyncio.run(security.verify_password_async("wrong", hashed))
+
+
+def test_password_hashing_rejects_when_saturated(monkeypatch):
+    """Beyond PASSWORD_HASH_MAX_PENDING jobs, requests get a 503 instead of queueing"""
+    monkeypatch.setattr(security, "_hash_slots", threading.BoundedSemaphore(1))
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(security._run_hashing(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as error:
+            await security.verify_password_async("secret", "unused")
+        release.set()
+        await first
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "1"
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from src.services.sender_lists import ALLOW, BLOCK, SenderLists, sender_key
+
+
+def _lists(tmp_path, **overrides):
+    options = dict(max_entries=100, error_rate=0.01, cache_devices=10, refresh_seconds=30)
+    options.update(overrides)
+    return SenderLists(str(tmp_path / "sender_lists.db"), **options)
+
+
+def test_sender_key_ignores_case_and_whitespace():
+    assert sender_key(" Mom ") == sender_key("mom")
+    assert sender_key("mom") != sender_key("dad")
+
+
+def test_lists_are_checked_per_device(tmp_path):
+    lists = _lists(tmp_path)
+
+    async def run():
+        await lists.replace("d1", allow=["Mom"], block=["Spammer", "Mom"])
+        await lists.replace("d2", allow=["Spammer"], block=[])
+        return [
+            await lists.check("d1", "spammer"),
+            await lists.check("d1", "mom"),  # on both lists: blocked wins
+            await lists.check("d1", "stranger"),
+            await lists.check("d2", "Spammer"),
+            await lists.check("d3", "Spammer"),
+        ]
+
+    assert asyncio.run(run()) == [BLOCK, BLOCK, None, ALLOW, None]
+
+
+def test_bloom_false_positive_is_not_trusted(tmp_path):
+    # A tiny filter says "maybe" for nearly everyone; the exact confirm says no
+    lists = _lists(tmp_path, max_entries=1, error_rate=0.9)
+
+    async def run():
+        await lists.replace("d1", allow=["Mom"], block=[])
+        return [await lists.check("d1", f"stranger-{i}") for i in range(50)]
+
+    assert all(decision is None for decision in asyncio.run(run()))
+    assert lists.false_positives > 0
+
+
+def test_other_workers_pick_up_uploads_after_refresh(tmp_path):
+    uploader, reader = _lists(tmp_path), _lists(tmp_path)
+
+    async def run():
+        before = await reader.check("d1", "ex", now=0.0)
+        await uploader.replace("d1", allow=[], block=["ex"])
+        cached = await reader.check("d1", "ex", now=10.0)
+        refreshed = await reader.check("d1", "ex", now=31.0)
+        return before, cached, refreshed
+
+    assert asyncio.run(run()) == (None, None, BLOCK)
+
+
+def test_oversized_list_is_refused(tmp_path):
+    lists = _lists(tmp_path, max_entries=2)
+    with pytest.raises(ValueError):
+        asyncio.run(lists.replace("d1", allow=["a", "b", "c"], block=[]))
@@ -0,0 +1,43 @@
+import pytest
+from src.core.config import Settings
+from src.core import threads
+
+
+def make_settings(**overrides):
+    values = {"SECRET_KEY": "test", "API_USERNAME": "test", "API_PASSWORD": "test"}
+    values.update(overrides)
+    return Settings(**values)
+
+
+@pytest.fixture
+def eight_cpus(monkeypatch):
+    monkeypatch.setattr(threads, "_available_cpus", lambda: list(range(8)))
+    monkeypatch.delenv(threads.WORKER_COUNT_ENV, raising=False)
+    monkeypatch.delenv(threads.WORKER_SLOT_ENV, raising=False)
+
+
+def test_plan_splits_cores_between_workers(eight_cpus):
+    """Each of 4 workers gets a quarter of 8 cores"""
+    plan = threads.plan_threads(make_settings(WORKERS=4))
+
+    assert plan.intra_op_threads == 2
+    assert plan.inter_op_threads == 1
+    assert plan.opencv_threads == 2
+    assert plan.cpu_affinity is None
+
+
+def test_plan_never_drops_below_one_thread(eight_cpus):
+    """More workers than cores still leaves every worker one thread"""
+    plan = threads.plan_threads(make_settings(WORKERS=16))
+
+    assert plan.intra_op_threads == 1
+
+
+def test_plan_pins_worker_to_its_slot(eight_cpus, monkeypatch):
+    """Gunicorn's worker count and slot drive the pinned CPU range"""
+    monkeypatch.setenv(threads.WORKER_COUNT_ENV, "2")
+    monkeypatch.setenv(threads.WORKER_SLOT_ENV, "1")
+    plan = threads.plan_threads(make_settings(WORKERS=4, PIN_WORKER_CPUS=True))
+
+    assert plan.workers == 2
+    assert plan.cpu_affinity == [4, 5, 6, 7]